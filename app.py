@@ -1,110 +1,24 @@
-import os, io, json, zipfile
-import requests
+import os, io, json, hashlib, logging, zipfile
+from datetime import datetime
 from pathlib import Path
 
 import streamlit as st
 import pandas as pd
 from dotenv import load_dotenv
 
-from parsing.extractor import load_files_from_uploader
-from utils.text import clean_text
-from cv_analyzer import analyze_cv_with_openai, to_dict, score_candidate_with_ai
+from parsing.extractor import UploadBatch, count_uploaded_documents, iter_files_from_uploader
+from cv_analyzer import OPENAI_MODEL, PROMPT_VERSION, to_dict
+from cv_pipeline import analyze_documents_concurrently, filter_new_documents, score_candidates
+from utils.analysis_cache import get_cache
+from salary.adzuna import get_market_rate
+from utils.metrics import RunMetrics, span, use_metrics
+from utils.prerank import get_prerank_settings
+from utils.embeddings import index_candidates, rank_pool
+from utils.results_store import CandidateStore
+from utils.run_archive import ARCHIVE_SUFFIX, export_run, load_run
 
 load_dotenv()
 
-def get_market_rate(job_title, location):
-    """Fetch market rate data from Adzuna API with detailed debugging"""
-    try:
-        app_id = os.getenv("ADZUNA_APP_ID", "").strip()
-        app_key = os.getenv("ADZUNA_APP_KEY", "").strip()
-        
-        # Debug: Check credentials without exposing them
-        print(f"🔐 Adzuna Debug - Credentials configured: {bool(app_id and app_key and app_id != 'your_adzuna_app_id_here')}")
-        
-        if not app_id or not app_key or app_id == "your_adzuna_app_id_here":
-            print("❌ Adzuna Debug - Credentials not configured properly")
-            return None, "Adzuna API credentials not configured. Please check your .env file."
-        
-        # Clean location for API (extract city name only)
-        location_clean = location.split(",")[0].strip().lower() if location else "london"
-        location_clean = location_clean.replace(" ", "%20")  # URL encode spaces
-        
-        print(f"🌍 Adzuna Debug - Original location: '{location}' -> Cleaned: '{location_clean}'")
-        print(f"💼 Adzuna Debug - Job title: '{job_title}'")
-        
-        # Adzuna API endpoint
-        url = f"https://api.adzuna.com/v1/api/jobs/gb/search/1"
-        params = {
-            "app_id": app_id,
-            "app_key": app_key,
-            "results_per_page": 50,  # Get more results for better average
-            "what": job_title,
-            "where": location_clean,
-            # Remove salary sorting to get representative sample
-            # "sort_by": "salary"  # Removed to avoid high-end bias
-            "what_exclude": "director,vice president,vp,chief,head of,ceo,cto,cmo,senior director",  # Exclude executive roles
-            "salary_min": 25000,  # Set reasonable salary bounds
-            "salary_max": 150000
-        }
-        
-        print(f"🔗 Adzuna Debug - API URL: {url}")
-        print(f"📊 Adzuna Debug - Parameters: {params}")
-        
-        response = requests.get(url, params=params, timeout=10)
-        print(f"📡 Adzuna Debug - Response status: {response.status_code}")
-        
-        response.raise_for_status()
-        
-        data = response.json()
-        jobs = data.get("results", [])
-        total_jobs = data.get("count", 0)
-        
-        print(f"📈 Adzuna Debug - Total jobs found: {total_jobs}, Jobs with salary data: {len(jobs)}")
-        
-        if not jobs:
-            print("❌ Adzuna Debug - No jobs returned from API")
-            return None, f"No salary data found for '{job_title}' in '{location}'"
-        
-        # Extract salary information with debugging
-        salaries = []
-        salary_count = 0
-        for i, job in enumerate(jobs):
-            if job.get("salary_min") and job.get("salary_max"):
-                avg_salary = (job["salary_min"] + job["salary_max"]) / 2
-                salaries.append(avg_salary)
-                salary_count += 1
-                if i < 3:  # Debug first 3 jobs
-                    print(f"💰 Adzuna Debug - Job {i+1}: {job.get('title', 'N/A')} - £{job.get('salary_min', 0):,} to £{job.get('salary_max', 0):,} (avg: £{avg_salary:,.0f})")
-        
-        print(f"💵 Adzuna Debug - Jobs with salary data: {salary_count}/{len(jobs)}")
-        
-        if not salaries:
-            print("❌ Adzuna Debug - No salary information in job results")
-            return None, f"No salary information available for '{job_title}' in '{location}'"
-        
-        # Calculate statistics
-        min_salary = min(salaries)
-        max_salary = max(salaries)
-        avg_salary = sum(salaries) / len(salaries)
-        
-        result = {
-            "min": min_salary,
-            "max": max_salary, 
-            "average": avg_salary,
-            "count": len(salaries)
-        }
-        
-        print(f"✅ Adzuna Debug - Final result: Min £{min_salary:,.0f}, Max £{max_salary:,.0f}, Avg £{avg_salary:,.0f}, Count: {len(salaries)}")
-        
-        return result, None
-        
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Adzuna Debug - Request error: {str(e)}")
-        return None, f"API request failed: {str(e)}"
-    except Exception as e:
-        print(f"❌ Adzuna Debug - Unexpected error: {str(e)}")
-        return None, f"Error fetching market rate: {str(e)}"
-
 st.set_page_config(
     page_title="KSEYE CV Screener", 
     page_icon="assets/kseye_logo.svg", 
@@ -117,6 +31,16 @@ KSEYE_RED = "#e42c2c"
 KSEYE_DARK = "#2c3e50"
 KSEYE_LIGHT = "#f8f9fa"
 
+# Candidate rankings table: sort options (column, ascending) and page sizes
+RANKING_SORTS = {
+    "Rank": ("rank", True),
+    "Company fit": ("company_fit_score", False),
+    "Relevant years": ("relevant_years", False),
+    "Name": ("candidate_name", True),
+}
+RANKING_COLUMNS = ["rank", "candidate_name", "score", "company_fit_score", "relevant_years", "current_title", "brief_summary"]
+RANKING_PAGE_SIZES = [25, 50, 100, 250]
+
 # Custom CSS with KSEYE branding
 st.markdown(f"""
 <style>
@@ -486,13 +410,29 @@ elif page == "CV Analyzer":
     <div class=\"kseye-header\">\n        <h1 class=\"page-title\">CV Analyzer</h1>\n        <p class=\"page-subtitle\">Upload your job requirements and candidate CVs</p>\n    </div>
     """, unsafe_allow_html=True)
 
+    def results_parquet(results_key: str) -> bytes:
+        """Parquet bytes of a run's ranked candidates, encoded once per run"""
+        results = st.session_state[f"analysis_results_{results_key}"]
+        if "parquet" not in results:
+            buffer = io.BytesIO()
+            results["candidates"].to_parquet(buffer)
+            results["parquet"] = buffer.getvalue()
+        return results["parquet"]
+
+    def results_archive(results_key: str) -> bytes:
+        """Saved-run archive of a run, encoded once per run"""
+        results = st.session_state[f"analysis_results_{results_key}"]
+        if "archive" not in results:
+            results["archive"] = export_run(results)
+        return results["archive"]
+
     # Helper to render analysis results (table + details below)
     def render_analysis_results(results_key: str):
         results = st.session_state.get(f"analysis_results_{results_key}")
         if not results:
             return
 
-        scored_candidates = results["scored_candidates"]
+        store = results["candidates"]
         job_title_display = results["job_title"]
         total_candidates = results["total_candidates"]
 
@@ -500,21 +440,54 @@ elif page == "CV Analyzer":
         <div class=\"results-header\">\n            <h2 style=\"color: #2c3e50; margin-bottom: 8px;\">Analysis Results</h2>\n            <p style=\"color: #6c757d; margin: 0;\">Analyzed {total_candidates} candidates for <strong>{job_title_display}</strong></p>\n        </div>
         """, unsafe_allow_html=True)
 
-        # Prepare table rows (cap at 50)
-        max_display = 50
-        display_candidates = scored_candidates[:max_display]
-        if len(scored_candidates) > max_display:
-            st.info(f"Showing top {max_display} candidates out of {len(scored_candidates)} total candidates.")
-
-        candidate_data = []
-        for i, (score, candidate) in enumerate(display_candidates):
-            candidate_data.append({
-                "rank": i + 1,
-                "name": candidate.candidate_name,
-                "summary": getattr(candidate, 'brief_summary', f"{getattr(candidate, 'current_title', 'Professional')} with {getattr(candidate, 'relevant_years', 'N/A')}y relevant experience"),
-                "score": score,
-                "candidate_obj": candidate,
-            })
+        if results.get("imported_from"):
+            exported = datetime.fromtimestamp(results["imported_from"]).strftime("%Y-%m-%d %H:%M")
+            st.caption(f"Loaded from a saved run exported {exported} (model {results.get('model')}, "
+                       f"prompt version {results.get('prompt_version')}) — no AI calls were made.")
+            if results.get("prompt_version") != PROMPT_VERSION:
+                st.warning(f"This run used prompt version {results.get('prompt_version')}; the current version is "
+                           f"{PROMPT_VERSION}, so scores may not be comparable with new analyses.")
+        incremental = results.get("incremental")
+        if incremental:
+            st.caption(f"Incremental run: {incremental['new']} new CV(s) analysed, {incremental['reused']} reused "
+                       f"from the previous results, {incremental['removed']} no longer uploaded.")
+        cache_stats = results.get("cache_stats")
+        if cache_stats:
+            st.caption(f"Analysis cache: {cache_stats['hits']} hit(s), {cache_stats['misses']} miss(es) — cached results cost no API calls.")
+        if results.get("tokens_saved"):
+            st.caption(f"CV compaction saved ~{results['tokens_saved']:,} prompt tokens across this batch.")
+        if results.get("llm_calls_avoided"):
+            st.caption(f"Keyword pre-ranking avoided {results['llm_calls_avoided']:,} AI call(s); pre-filtered CVs are marked in their assessment notes.")
+
+        run_stats = results.get("run_stats")
+        if run_stats:
+            with st.expander("Run stats"):
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("Wall time", f"{run_stats['wall_seconds']:.1f}s")
+                with col2:
+                    st.metric("LLM calls", run_stats["llm_calls"])
+                with col3:
+                    st.metric("Tokens (prompt / completion)", f"{run_stats['prompt_tokens']:,} / {run_stats['completion_tokens']:,}",
+                              help=f"{run_stats.get('cached_tokens', 0):,} prompt tokens served from the provider's prompt cache")
+                with col4:
+                    cost = run_stats.get("estimated_cost_usd")
+                    st.metric("Estimated spend", f"${cost:.4f}" if cost is not None else "n/a")
+                st.caption("Time per stage (extract is worker CPU time and overlaps analysis; llm_* include retries)")
+                st.dataframe(pd.DataFrame(run_stats["stages"]), hide_index=True, use_container_width=True)
+                if run_stats["tokens"]:
+                    st.dataframe(pd.DataFrame(run_stats["tokens"]), hide_index=True, use_container_width=True)
+                st.download_button("Download Prometheus metrics", results.get("run_prometheus", ""),
+                                   file_name="cv_screener_metrics.prom", mime="text/plain")
+
+        if len(store):
+            d1, d2 = st.columns(2)
+            with d1:
+                st.download_button("Download results (Parquet)", results_parquet(results_key),
+                                   file_name="cv_screening_results.parquet", mime="application/octet-stream")
+            with d2:
+                st.download_button("Save run (reload later without AI calls)", results_archive(results_key),
+                                   file_name=f"cv_screening_run{ARCHIVE_SUFFIX}", mime="application/gzip")
 
         # Market Rate Section (if location and job title provided)
         if job_title and location:
@@ -542,20 +515,67 @@ elif page == "CV Analyzer":
 
         st.subheader("Candidate Rankings")
 
-        # Table header (no Action column)
-        h1, h2, h3, h4 = st.columns([0.8, 3, 1, 7.2])
-        with h1: st.markdown("**Rank**")
-        with h2: st.markdown("**Name**")
-        with h3: st.markdown("**Score**")
-        with h4: st.markdown("**Summary**")
-
-        # Table rows (no truncation needed now)
-        for idx, row in enumerate(candidate_data):
-            c1, c2, c3, c4 = st.columns([0.8, 3, 1, 7.2])
-            c1.write(row["rank"]) 
-            c2.write(row["name"]) 
-            c3.write(f"{row['score']:.0f}%") 
-            c4.write(row["summary"])  # Full summary without truncation
+        # Filter and sort the whole table, then render only the current page
+        f1, f2, f3, f4, f5, f6 = st.columns([4, 2, 2, 2, 2, 1])
+        with f1:
+            query = st.text_input("Filter by name, title or summary", key=f"ranking_filter_{results_key}")
+        with f2:
+            min_score = st.slider("Minimum score", 0, 100, 0, key=f"ranking_min_score_{results_key}")
+        with f3:
+            min_company_fit = st.slider("Minimum company fit", 0, 100, 0, key=f"ranking_min_fit_{results_key}")
+        with f4:
+            min_years = st.number_input("Minimum relevant years", min_value=0.0, value=0.0, step=1.0,
+                                        key=f"ranking_min_years_{results_key}")
+        with f5:
+            sort_by = st.selectbox("Sort by", list(RANKING_SORTS), key=f"ranking_sort_{results_key}")
+        with f6:
+            page_size = st.selectbox("Per page", RANKING_PAGE_SIZES, index=1, key=f"ranking_page_size_{results_key}")
+
+        # Skill filter: answered from the store's inverted skill index, no AI calls
+        skill_counts = dict(store.skill_index.skills())
+        # Umbrella categories ("CI/CD", "Unit Testing") count every candidate they match
+        skill_counts.update(store.skill_index.categories())
+        s1, s2 = st.columns([5, 1])
+        with s1:
+            required_skills = st.multiselect("Has skills", list(skill_counts),
+                                             format_func=lambda skill: f"{skill} ({skill_counts[skill]})",
+                                             key=f"ranking_skills_{results_key}")
+        with s2:
+            match_any_skill = st.checkbox("Any of them", key=f"ranking_skills_any_{results_key}",
+                                          help="Match candidates with any selected skill instead of all of them")
+
+        column, ascending = RANKING_SORTS[sort_by]
+        view = store.ranked_view(min_score=min_score, min_company_fit=min_company_fit, min_years=min_years,
+                                 query=query, sort_by=column, ascending=ascending,
+                                 skills=required_skills, match_all_skills=not match_any_skill)
+
+        pages = max(1, (len(view) + page_size - 1) // page_size)
+        # Keyed on the page count so a narrower filter never leaves the page out of range
+        page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1,
+                                      key=f"ranking_page_{results_key}_{pages}_{page_size}")
+        page_rows = view.iloc[(page_number - 1) * page_size:page_number * page_size]
+        if len(view):
+            st.caption(f"Showing {(page_number - 1) * page_size + 1}-{(page_number - 1) * page_size + len(page_rows)} "
+                       f"of {len(view)} matching candidates ({len(store)} total)")
+        st.dataframe(
+            page_rows[RANKING_COLUMNS],
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "rank": st.column_config.NumberColumn("Rank", width="small"),
+                "candidate_name": st.column_config.TextColumn("Name"),
+                "score": st.column_config.ProgressColumn("Score", format="%.0f%%", min_value=0, max_value=100),
+                "company_fit_score": st.column_config.NumberColumn("Company Fit", format="%d%%"),
+                "relevant_years": st.column_config.NumberColumn("Years", format="%.1f"),
+                "current_title": st.column_config.TextColumn("Current Title"),
+                "brief_summary": st.column_config.TextColumn("Summary", width="large"),
+            },
+        )
+
+        candidate_data = [
+            {"rank": rank, "name": name, "score": float(score)}
+            for rank, name, score in zip(page_rows["rank"], page_rows["candidate_name"], page_rows["score"])
+        ]
 
         st.markdown("---")
 
@@ -569,7 +589,7 @@ elif page == "CV Analyzer":
             ]
             
             selected_option = st.selectbox(
-                "Choose candidate for detailed analysis:",
+                "Choose candidate for detailed analysis (from this page):",
                 candidate_options,
                 key="candidate_selector"
             )
@@ -577,9 +597,8 @@ elif page == "CV Analyzer":
             if selected_option != "Select a candidate...":
                 # Find the selected candidate index
                 selected_idx = candidate_options.index(selected_option) - 1
-                chosen = candidate_data[selected_idx]
-                candidate = chosen["candidate_obj"]
-                score = chosen["score"]
+                # Only the chosen candidate is rebuilt from the store
+                score, candidate = store.candidate(candidate_data[selected_idx]["rank"] - 1)
 
                 # Display candidate details
                 st.markdown(f"#### {candidate.candidate_name}")
@@ -634,6 +653,8 @@ elif page == "CV Analyzer":
                             institution = edu.get('institution', 'N/A')
                             year = edu.get('year', 'N/A')
                             st.markdown(f"🎓 **{degree}** — {institution} ({year})")
+        elif len(store):
+            st.info("No candidates match the current filters.")
         else:
             st.info("No candidates to analyze. Please run an analysis first.")
 
@@ -659,6 +680,19 @@ elif page == "CV Analyzer":
             type=["pdf", "docx", "doc", "zip"],
             help="You can upload individual CV files or a ZIP containing multiple CVs",
         )
+        single_pass = st.checkbox(
+            "Single-pass analysis",
+            value=os.getenv("CV_SINGLE_PASS", "").strip().lower() in {"1", "true", "yes"},
+            help="Extract and score each CV in one AI call (half the requests). Untick to use the separate analysis and scoring calls.",
+        )
+        default_top_n, prerank_min_score = get_prerank_settings()
+        prerank_top_n = st.number_input(
+            "Send only the top N CVs to AI (0 = all)",
+            min_value=0,
+            value=default_top_n,
+            step=10,
+            help="CVs are first ranked locally by keyword relevance to the job description; the rest get a basic, unscored-by-AI record.",
+        )
 
         # Full-width button styling with higher specificity
         st.markdown(
@@ -682,6 +716,21 @@ elif page == "CV Analyzer":
             unsafe_allow_html=True,
         )
 
+    with st.expander("Load a saved run"):
+        saved_run = st.file_uploader("Saved run file", type=["gz"], key="saved_run_uploader",
+                                     help=f"A {ARCHIVE_SUFFIX} file from \"Save run\"; results are shown without any AI calls")
+        if saved_run is not None:
+            saved_bytes = saved_run.getvalue()
+            imported_key = f"imported_{hashlib.sha256(saved_bytes).hexdigest()[:16]}"
+            # Only switch to the saved run when it is first loaded, not on every rerun
+            if f"analysis_results_{imported_key}" not in st.session_state:
+                try:
+                    st.session_state[f"analysis_results_{imported_key}"] = load_run(saved_bytes)
+                    st.session_state["current_analysis_key"] = imported_key
+                    st.session_state.pop("selected_candidate_idx", None)
+                except ValueError as e:
+                    st.error(f"❌ Could not load {saved_run.name}: {e}")
+
     analyze_button = st.button("Analyze Candidates", type="primary")
 
     # Analysis Section
@@ -702,14 +751,22 @@ elif page == "CV Analyzer":
             st.error("OpenAI API key not configured. Please add OPENAI_API_KEY to your .env file.")
             st.stop()
 
-        analysis_key = f"{job_title}_{len(uploaded_files)}_{hash(job_description[:100])}"
-        if f"analysis_results_{analysis_key}" not in st.session_state:
+        # Results are kept per job and settings; uploads are diffed against them by content
+        analysis_key = f"{job_title}_{hash(job_description)}_{'single' if single_pass else 'two'}_{prerank_top_n}"
+        upload_signature = [(f.name, getattr(f, "size", None)) for f in uploaded_files]
+        previous = st.session_state.get(f"analysis_results_{analysis_key}")
+        if previous is None or previous.get("upload_signature") != upload_signature:
             with st.spinner("Analyzing candidates... This may take a few moments."):
                 try:
-                    docs = load_files_from_uploader(uploaded_files)
-                    if not docs:
-                        st.error("❌ No valid CV files found in the uploaded files.")
-                        st.stop()
+                    # Only CVs not already screened for this job are analysed; documents
+                    # stream from extraction straight into analysis
+                    known_hashes = previous["candidates"].content_hashes if previous else set()
+                    current_hashes = set()
+                    skipped_docs = []
+                    uploads = UploadBatch(uploaded_files)
+                    docs = filter_new_documents(iter_files_from_uploader(uploads), known_hashes, current_hashes,
+                                                skipped_docs)
+                    upload_docs = count_uploaded_documents(uploads)
 
                     job_context = {
                         "job_title": job_title.strip(),
@@ -717,39 +774,86 @@ elif page == "CV Analyzer":
                         "analysis_instructions": "Analyze each CV against this job and provide detailed insights",
                     }
 
-                    candidates = []
+                    cache = get_cache()
+
                     progress_bar = st.progress(0)
                     status_text = st.empty()
-                    for i, (filename, cv_text) in enumerate(docs):
-                        status_text.text(f"Analyzing {filename}... ({i+1}/{len(docs)})")
-                        cleaned_text = clean_text(cv_text)
-                        analysis = analyze_cv_with_openai(cleaned_text, filename, job_context)
-                        candidates.append(analysis)
-                        progress_bar.progress((i + 1) / len(docs))
+
+                    def on_progress(done, total, filename):
+                        # One step for each CV's analysis and one for its score; CVs skipped so far
+                        # as already screened drop out of the total
+                        total = max(done, (upload_docs - len(skipped_docs)) * 2)
+                        status_text.text(f"Screening... {filename} ({done}/{total} steps)")
+                        progress_bar.progress(min(1.0, done / total))
+
+                    run_metrics = RunMetrics(model=OPENAI_MODEL)
+                    with use_metrics(run_metrics), span("pipeline"):
+                        # Each CV is scored as soon as its analysis is ready
+                        pipeline_result = analyze_documents_concurrently(
+                            docs, job_context, progress_callback=on_progress,
+                            single_pass=single_pass, total=upload_docs,
+                            prerank_top_n=int(prerank_top_n), prerank_min_score=prerank_min_score,
+                            score_job=(job_title, job_description),
+                        )
+                    retained = previous["candidates"].subset(current_hashes) if previous else CandidateStore.from_scored([])
+                    if not pipeline_result.filenames and not len(retained):
+                        status_text.empty()
+                        progress_bar.empty()
+                        st.error("❌ No valid CV files found in the uploaded files.")
+                        st.stop()
+                    candidates = pipeline_result.completed
                     status_text.empty()
                     progress_bar.empty()
+                    for filename, error in pipeline_result.errors:
+                        st.warning(f"⚠️ Could not analyze {filename}: {error}")
 
-                    if not candidates:
+                    if not candidates and not len(retained):
                         st.error("❌ Could not analyze any CVs. Please check the file formats.")
                         st.stop()
 
-                    scored_candidates = []
-                    progress_bar = st.progress(0)
-                    total_candidates_to_score = len(candidates)
-                    for i, candidate in enumerate(candidates):
-                        progress_bar.progress((i + 1) / total_candidates_to_score)
-                        score, reasoning, brief_summary = score_candidate_with_ai(candidate, job_title, job_description)
-                        candidate.ai_score = score
-                        candidate.ai_reasoning = reasoning
-                        candidate.brief_summary = brief_summary
-                        scored_candidates.append((score, candidate))
-                    progress_bar.empty()
-                    scored_candidates.sort(key=lambda x: x[0], reverse=True)
+                    # Scores are already in pipeline_result; this ranks them (and scores any stragglers)
+                    with use_metrics(run_metrics), span("scoring"):
+                        new_scored = score_candidates(pipeline_result, job_title, job_description)
+                    ranked = retained.merge(CandidateStore.from_scored(new_scored))
+
+                    try:
+                        # Keep the candidate pool searchable for future jobs
+                        index_candidates(pipeline_result.content_hashes, pipeline_result.analyses)
+                    except Exception as e:
+                        logging.error(f"Could not index candidate embeddings: {e}")
+
+                    cache_stats = None
+                    if cache:
+                        run_events = run_metrics.events()
+                        cache_stats = {
+                            "hits": run_events.get("cache_hit", 0),
+                            "misses": run_events.get("cache_miss", 0),
+                        }
 
                     st.session_state[f"analysis_results_{analysis_key}"] = {
-                        "scored_candidates": scored_candidates,
+                        "candidates": ranked,
                         "job_title": job_title,
-                        "total_candidates": len(candidates),
+                        "job_context": {
+                            "job_title": job_title.strip(),
+                            "job_description": job_description.strip(),
+                            "location": location.strip(),
+                            "single_pass": single_pass,
+                            "prerank_top_n": int(prerank_top_n),
+                        },
+                        "prompt_version": PROMPT_VERSION,
+                        "model": OPENAI_MODEL,
+                        "total_candidates": len(ranked),
+                        "upload_signature": upload_signature,
+                        "incremental": {
+                            "new": len(new_scored),
+                            "reused": len(retained),
+                            "removed": len(previous["candidates"]) - len(retained),
+                        } if previous else None,
+                        "cache_stats": cache_stats,
+                        "tokens_saved": pipeline_result.tokens_saved,
+                        "llm_calls_avoided": pipeline_result.llm_calls_avoided,
+                        "run_stats": run_metrics.summary(),
+                        "run_prometheus": run_metrics.to_prometheus(),
                     }
                     st.session_state["current_analysis_key"] = analysis_key
                     st.session_state.pop("selected_candidate_idx", None)
@@ -764,3 +868,15 @@ elif page == "CV Analyzer":
     if (not analyze_button) and st.session_state.get("current_analysis_key") and \
        f"analysis_results_{st.session_state['current_analysis_key']}" in st.session_state:
         render_analysis_results(st.session_state["current_analysis_key"])
+
+    with st.expander("Search previously analysed candidates (no AI calls)"):
+        pool_k = st.slider("Candidates to show", min_value=5, max_value=100, value=20, step=5)
+        if st.button("Rank candidate pool against this job"):
+            if not job_title.strip() and not job_description.strip():
+                st.warning("Enter a job title or description to rank the pool against.")
+            else:
+                matches = rank_pool(job_title.strip(), job_description.strip(), k=pool_k)
+                if matches:
+                    st.dataframe(pd.DataFrame(matches).drop(columns=["cv_hash"]), hide_index=True, use_container_width=True)
+                else:
+                    st.info("No candidates indexed yet - analyse some CVs first.")
@@ -0,0 +1,229 @@
+"""
+OpenAI Batch API mode for bulk screening
+Serialises the same requests analyze_cv_with_openai / score_candidate_with_ai would
+send into JSONL batch jobs, submits them, polls until they finish and maps the
+results back to CVAnalysis objects by source_file. Replies are validated against the
+response schema when they come back; broken fields are repaired with a live call. Batches are billed at a
+discount and run outside the interactive rate limits, at the cost of latency
+(up to the 24h completion window), so this suits overnight runs over thousands of CVs.
+"""
+import os
+import io
+import json
+import time
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from cv_analyzer import (
+    analysis_cache_key, analysis_request, cached_result, complete_structured, fallback_analysis, fallback_score,
+    parse_analysis_data, parse_score_data, parse_single_pass_result, scoring_request, score_cache_key, store_result,
+)
+from cv_pipeline import PipelineResult, content_hash, prepare_cv_text
+from openai_client import get_api_key, get_client
+from utils.analysis_cache import get_cache
+from utils.metrics import count, record_llm_call, span
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+DEFAULT_POLL_SECONDS = 30
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# custom_id -> (reply content, None) or (None, error)
+BatchResults = Dict[str, Tuple[Optional[str], Optional[str]]]
+
+
+def get_poll_seconds() -> float:
+    """Seconds between batch status checks (CV_BATCH_POLL_SECONDS)"""
+    try:
+        return max(0.1, float(os.getenv("CV_BATCH_POLL_SECONDS", DEFAULT_POLL_SECONDS)))
+    except ValueError:
+        return DEFAULT_POLL_SECONDS
+
+
+def build_batch_jsonl(requests: Dict[str, Dict[str, Any]]) -> bytes:
+    """One Batch API request line per custom_id -> chat.completions body"""
+    lines = [
+        json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body})
+        for custom_id, body in requests.items()
+    ]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def submit_batch(requests: Dict[str, Dict[str, Any]], description: str = "") -> str:
+    """Upload the requests as a JSONL file and start a batch; returns the batch id"""
+    client = get_client()
+    input_file = client.files.create(file=("cv_batch.jsonl", io.BytesIO(build_batch_jsonl(requests))), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window=BATCH_COMPLETION_WINDOW,
+        metadata={"description": description} if description else None,
+    )
+    print(f"📨 Submitted batch {batch.id} with {len(requests)} request(s) ({description or 'no description'})")
+    return batch.id
+
+
+def wait_for_batch(batch_id: str, poll_seconds: Optional[float] = None, timeout: Optional[float] = None):
+    """Poll a batch until it reaches a terminal status; returns the final batch object"""
+    client = get_client()
+    poll_seconds = poll_seconds or get_poll_seconds()
+    deadline = time.monotonic() + timeout if timeout else None
+    last_status = None
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        progress = f" ({counts.completed}/{counts.total} done, {counts.failed} failed)" if counts else ""
+        if batch.status != last_status:
+            print(f"⏳ Batch {batch_id}: {batch.status}{progress}")
+            last_status = batch.status
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+        if deadline and time.monotonic() > deadline:
+            raise TimeoutError(f"Batch {batch_id} still {batch.status} after {timeout:.0f}s")
+        time.sleep(poll_seconds)
+
+
+def download_batch_results(batch) -> BatchResults:
+    """Read the output and error files of a finished batch into per-request reply contents"""
+    client = get_client()
+    results: BatchResults = {}
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        for line in client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            custom_id = record.get("custom_id", "")
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                error = record.get("error") or response.get("body", {}).get("error") or "request failed"
+                results[custom_id] = (None, str(error))
+                continue
+            record_llm_call("batch", None, response["body"].get("usage"))
+            try:
+                results[custom_id] = (response["body"]["choices"][0]["message"]["content"] or "", None)
+            except (KeyError, IndexError) as e:
+                results[custom_id] = (None, f"{type(e).__name__}: {e}")
+    return results
+
+
+def run_batch(requests: Dict[str, Dict[str, Any]], description: str = "",
+              timeout: Optional[float] = None) -> BatchResults:
+    """Submit, wait for and download one batch; requests missing from the output are reported as errors"""
+    if not requests:
+        return {}
+    with span("batch_wait"):
+        batch = wait_for_batch(submit_batch(requests, description), timeout=timeout)
+    results = download_batch_results(batch) if batch.status == "completed" else {}
+    for custom_id in requests:
+        results.setdefault(custom_id, (None, f"batch {batch.id} {batch.status} without a result"))
+    return results
+
+
+def parse_batch_reply(request: Dict[str, Any], kind: str, content: Optional[str],
+                      error: Optional[str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """(validated JSON, None) for a batch reply, repairing broken fields live, or (None, error)"""
+    if content is None:
+        return None, error
+    try:
+        return complete_structured(request, kind, stage=f"batch_{kind}", content=content), None
+    except Exception as e:
+        count(f"{kind}_fallback")
+        return None, f"{type(e).__name__}: {e}"
+
+
+def run_batch_screening(
+    docs: Iterable[Tuple[str, str]],
+    job_context: Dict[str, Any],
+    single_pass: bool = False,
+    timeout: Optional[float] = None,
+) -> PipelineResult:
+    """
+    Batch counterpart of analyze_documents_concurrently: analyses (and, unless single_pass,
+    a second scoring batch) go through the Batch API. Cached results are reused and never
+    resubmitted; failed requests fall back like the interactive path does.
+    result.scores is always filled with (score, reasoning, brief_summary).
+    """
+    start = time.perf_counter()
+    cache = get_cache()
+    kind = "single_pass" if single_pass else "analysis"
+    job_title = job_context.get('job_title', '')
+    job_description = job_context.get('job_description', '')
+    has_key = bool(get_api_key())
+    if not has_key:
+        logging.warning("OpenAI API key not found, batch mode using fallback analysis")
+
+    result = PipelineResult(filenames=[], analyses=[], scores=[])
+    texts: List[str] = []
+    cached: Dict[int, Dict[str, Any]] = {}
+    requests: Dict[str, Dict[str, Any]] = {}
+    keys: Dict[str, str] = {}
+    for index, (filename, cv_text) in enumerate(docs):
+        text, tokens_saved = prepare_cv_text(filename, cv_text)
+        result.filenames.append(filename)
+        result.content_hashes.append(content_hash(cv_text))
+        result.tokens_saved += tokens_saved
+        texts.append(text)
+        key = analysis_cache_key(kind, text, job_context)
+        data = cached_result(cache, key)
+        if data is not None:
+            cached[index] = data
+        elif has_key:
+            # custom_id is the document index so duplicate filenames can't collide
+            requests[str(index)] = analysis_request(text, job_context, single_pass=single_pass)
+            keys[str(index)] = key
+    print(f"📦 Batch screening {len(result.filenames)} document(s): {len(cached)} cached, {len(requests)} to submit")
+
+    responses = run_batch(requests, description=f"{kind}: {job_title}", timeout=timeout)
+    for index, filename in enumerate(result.filenames):
+        if index in cached:
+            data, error = cached[index], None
+        else:
+            data, error = parse_batch_reply(requests.get(str(index), {}), kind, *responses.get(str(index), (None, None)))
+        if error:
+            print(f"❌ Batch analysis failed for {filename}: {error}")
+            result.errors.append((filename, error))
+        if data is None:
+            analysis = fallback_analysis(texts[index], filename, job_context)
+            result.analyses.append(analysis)
+            result.scores.append(None)
+            continue
+        if index not in cached:
+            store_result(cache, keys[str(index)], data, kind)
+        if single_pass:
+            analysis, score, reasoning, brief_summary = parse_single_pass_result(data, filename)
+            result.scores.append((score, reasoning, brief_summary))
+        else:
+            analysis = parse_analysis_data(data, filename)
+            result.scores.append(None)
+        result.analyses.append(analysis)
+
+    # Second batch scores every analysis that does not have a score yet
+    score_requests: Dict[str, Dict[str, Any]] = {}
+    for index, analysis in enumerate(result.analyses):
+        if result.scores[index] is not None:
+            continue
+        request = scoring_request(analysis, job_title, job_description)
+        data = cached_result(cache, score_cache_key(request))
+        if data is not None:
+            result.scores[index] = parse_score_data(data, analysis)
+        elif has_key:
+            score_requests[str(index)] = request
+
+    score_responses = run_batch(score_requests, description=f"score: {job_title}", timeout=timeout)
+    for index, analysis in enumerate(result.analyses):
+        if result.scores[index] is not None:
+            continue
+        content, error = score_responses.get(str(index), (None, "no API key available"))
+        data, error = parse_batch_reply(score_requests.get(str(index), {}), "score", content, error)
+        brief_summary = f"{analysis.current_title} with {analysis.relevant_years}y relevant experience"
+        if data is None:
+            result.scores[index] = (fallback_score(analysis), f"Batch scoring failed, used fallback: {error}", brief_summary)
+            continue
+        store_result(cache, score_cache_key(score_requests[str(index)]), data, "score")
+        result.scores[index] = parse_score_data(data, analysis)
+
+    result.elapsed = time.perf_counter() - start
+    print(f"🎯 Batch screened {len(result.filenames)} document(s) in {result.elapsed:.1f}s ({len(result.errors)} error(s))")
+    return result
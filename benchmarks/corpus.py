@@ -0,0 +1,125 @@
+"""
+Synthetic CV corpus for benchmarks
+Generates plausible multi-section CVs as PDF, DOCX and TXT files with no extra
+dependencies (PDF and DOCX are written by hand), deterministic for a given seed.
+"""
+import io
+import random
+import zipfile
+from pathlib import Path
+from typing import List, Sequence
+from xml.sax.saxutils import escape
+
+FIRST_NAMES = ["Aisha", "Ben", "Chloe", "Daniel", "Elena", "Farah", "George", "Hana", "Ivan", "Julia",
+               "Kwame", "Lena", "Mohammed", "Nadia", "Oliver", "Priya", "Quentin", "Rosa", "Samir", "Tara"]
+LAST_NAMES = ["Ahmed", "Brown", "Chen", "Dubois", "Evans", "Fernandes", "Garcia", "Hughes", "Iqbal", "Jones",
+              "Khan", "Lopez", "Murphy", "Nowak", "Okafor", "Patel", "Rossi", "Smith", "Tanaka", "Williams"]
+TITLES = ["Data Scientist", "Machine Learning Engineer", "Software Engineer", "Data Analyst",
+          "Backend Developer", "Analytics Engineer", "Research Scientist", "Platform Engineer"]
+COMPANIES = ["Barclays", "Monzo", "Ocado", "Deliveroo", "BT Group", "Sky", "Wise", "Revolut", "HSBC", "Arm"]
+SKILLS = ["Python", "SQL", "scikit-learn", "PyTorch", "TensorFlow", "Spark", "Airflow", "Docker", "Kubernetes",
+          "AWS", "GCP", "Azure", "pandas", "NumPy", "Tableau", "dbt", "Kafka", "FastAPI", "Java", "Go"]
+ACHIEVEMENTS = [
+    "Built credit risk models that reduced default rates by {n}%",
+    "Led a team of {n} engineers delivering a real-time recommendation service",
+    "Cut batch pipeline runtime by {n}% by moving feature engineering to Spark",
+    "Designed A/B testing framework used by {n} product teams",
+    "Deployed {n} models to production with automated monitoring and retraining",
+    "Migrated {n} legacy ETL jobs to Airflow and dbt",
+]
+FORMATS = ("pdf", "docx", "txt")
+
+
+def make_cv_text(rng: random.Random, roles: int = 3) -> str:
+    """One synthetic CV with the usual sections (page breaks as form feeds)"""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    title = rng.choice(TITLES)
+    lines = [name, title, f"{name.split()[0].lower()}@example.com | +44 7700 {rng.randint(100000, 999999)}", "",
+             "Professional Summary",
+             f"{title} with {rng.randint(2, 15)} years of experience building data products in financial services and retail.",
+             "", "Work Experience"]
+    year = 2024
+    for _ in range(roles):
+        start = year - rng.randint(1, 4)
+        lines.append(f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)} ({start} - {year})")
+        for achievement in rng.sample(ACHIEVEMENTS, 3):
+            lines.append(f"- {achievement.format(n=rng.randint(3, 40))}")
+        year = start
+    lines += ["", "Skills", ", ".join(rng.sample(SKILLS, rng.randint(5, 10))),
+              "", "Education", f"BSc Computer Science, University of {rng.choice(['Leeds', 'Bristol', 'Warwick', 'Edinburgh'])} ({year - 3} - {year})",
+              "", "Interests", "Running, chess, open-source contributions",
+              "", "References available on request"]
+    # Split roughly in half to get a two-page document
+    middle = len(lines) // 2
+    return "\n".join(lines[:middle]) + "\f" + "\n".join(lines[middle:])
+
+
+def make_pdf(pages: Sequence[str]) -> bytes:
+    """Minimal PDF with one Helvetica text page per string"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>",
+               f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(len(pages)))}] /Count {len(pages)} >>"]
+    font_id = 3 + 2 * len(pages)
+    for i, text in enumerate(pages):
+        safe_lines = [line.replace("\\", "").replace("(", "").replace(")", "") for line in text.split("\n")]
+        stream = "BT /F1 10 Tf 50 760 Td 13 TL " + " ".join(f"({line}) Tj T*" for line in safe_lines) + " ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+                       f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n{obj}\nendobj\n".encode("latin-1", errors="replace")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+def make_docx(text: str) -> bytes:
+    """Minimal Word document with one paragraph per line"""
+    paragraphs = "".join(f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(line)}</w:t></w:r></w:p>"
+                         for line in text.replace("\f", "\n").split("\n"))
+    document = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                f'<w:body>{paragraphs}</w:body></w:document>')
+    content_types = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                     '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                     '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                     '<Default Extension="xml" ContentType="application/xml"/>'
+                     '<Override PartName="/word/document.xml" '
+                     'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+                     '</Types>')
+    rels = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="word/document.xml"/></Relationships>')
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml", content_types)
+        z.writestr("_rels/.rels", rels)
+        z.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+
+def generate_corpus(directory: Path, size: int, formats: Sequence[str] = FORMATS, seed: int = 0) -> List[Path]:
+    """Write size CVs to directory, cycling through formats; returns their paths"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for i in range(size):
+        fmt = formats[i % len(formats)]
+        text = make_cv_text(rng, roles=rng.randint(2, 5))
+        path = directory/f"cv_{i:05d}.{fmt}"
+        if fmt == "pdf":
+            path.write_bytes(make_pdf(text.split("\f")))
+        elif fmt == "docx":
+            path.write_bytes(make_docx(text))
+        else:
+            path.write_text(text, encoding="utf-8")
+        paths.append(path)
+    return paths
@@ -0,0 +1,271 @@
+"""
+Screening pipeline benchmarks
+Generates a synthetic corpus, points the OpenAI client at the local stub (with
+configurable latency, failure rate and malformed-reply rate) and times each stage in
+isolation: extract, clean, analyze, score, render (candidate store and ranked view) and
+export (CSV), plus the streaming end-to-end run.
+Reports docs/sec, p50/p95 per-document latency and the process peak RSS after each
+stage, and how often replies failed schema validation, were repaired or fell back;
+--baseline compares against a previous --json report and fails on regressions.
+
+Usage:
+    python -m benchmarks.run --docs 200 --latency 0.3 --failure-rate 0.02 --malformed-rate 0.05 --json bench.json
+    python -m benchmarks.run --docs 200 --baseline bench.json --tolerance 0.2
+"""
+import os
+
+# Benchmarks must measure real work, never cached results
+os.environ["CV_CACHE_DISABLED"] = "true"
+
+import argparse
+import json
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from benchmarks.corpus import FORMATS, generate_corpus
+from utils.metrics import RunMetrics, use_metrics
+from utils.openai_stub import start_stub_server
+
+STAGES = ("extract", "clean", "analyze", "score", "render", "export", "end_to_end")
+# Stages faster than this are too noisy to compare against a baseline
+MIN_COMPARABLE_SECONDS = 0.1
+
+
+@dataclass
+class StageReport:
+    stage: str
+    docs: int
+    seconds: float
+    docs_per_sec: float
+    p50_ms: float
+    p95_ms: float
+    peak_rss_mb: float
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for an empty sequence)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))]
+
+
+def peak_rss_mb() -> float:
+    """High-water RSS of this process and its (extraction) children, in MB"""
+    # ru_maxrss is KB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / scale
+
+
+def _report(stage: str, seconds: float, latencies: List[float]) -> StageReport:
+    docs = len(latencies)
+    return StageReport(
+        stage=stage,
+        docs=docs,
+        seconds=round(seconds, 3),
+        docs_per_sec=round(docs / seconds, 2) if seconds else 0.0,
+        p50_ms=round(percentile(latencies, 50) * 1000, 1),
+        p95_ms=round(percentile(latencies, 95) * 1000, 1),
+        peak_rss_mb=round(peak_rss_mb(), 1),
+    )
+
+
+def _timed(fn: Callable, *args):
+    start = time.perf_counter()
+    value = fn(*args)
+    return value, time.perf_counter() - start
+
+
+def _timed_in(metrics: RunMetrics, fn: Callable, *args):
+    # Pool threads don't inherit the caller's context, so bind the run's metrics explicitly
+    with use_metrics(metrics):
+        return _timed(fn, *args)
+
+
+def _timed_read(path: str):
+    # Module-level so it can run in the spawn-based extraction pool
+    from parsing.extractor import read_text
+    return _timed(read_text, path)
+
+
+def _run_parallel(pool, fn: Callable, items: Sequence) -> Tuple[list, List[float], float]:
+    """Map fn over items on pool; returns (results, per-item seconds, wall seconds)"""
+    start = time.perf_counter()
+    outcomes = list(pool.map(fn, items))
+    wall = time.perf_counter() - start
+    return [value for value, _ in outcomes], [seconds for _, seconds in outcomes], wall
+
+
+def run_benchmarks(paths: List[Path], job_context: Dict[str, str], workers: int, extract_workers: int,
+                   metrics: RunMetrics) -> List[StageReport]:
+    """Stage reports; structured-output events (invalid, repaired, fallback) are counted on metrics"""
+    import multiprocessing
+    from cv_analyzer import analyze_cv_with_openai, score_candidate_with_ai
+    from cv_pipeline import PipelineResult, analyze_documents_concurrently, prepare_cv_text, score_candidates
+    from parsing.extractor import LocalFile, iter_files_from_uploader
+    from screen_cli import result_records, write_results
+    from utils.results_store import CandidateStore
+
+    reports = []
+    job_title, job_description = job_context["job_title"], job_context["job_description"]
+
+    print(f"📏 extract: {len(paths)} documents on {extract_workers} process(es)")
+    with ProcessPoolExecutor(max_workers=extract_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        texts, latencies, wall = _run_parallel(pool, _timed_read, [str(p) for p in paths])
+    reports.append(_report("extract", wall, latencies))
+
+    print("📏 clean")
+    start = time.perf_counter()
+    prepared, latencies = [], []
+    for path, text in zip(paths, texts):
+        (cleaned, _), seconds = _timed(prepare_cv_text, path.name, text)
+        prepared.append((path.name, cleaned))
+        latencies.append(seconds)
+    reports.append(_report("clean", time.perf_counter() - start, latencies))
+
+    print(f"📏 analyze: {workers} concurrent request(s)")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        analyses, latencies, wall = _run_parallel(
+            pool, lambda doc: _timed_in(metrics, analyze_cv_with_openai, doc[1], doc[0], job_context), prepared)
+    reports.append(_report("analyze", wall, latencies))
+
+    print(f"📏 score: {workers} concurrent request(s)")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        scores, latencies, wall = _run_parallel(
+            pool, lambda candidate: _timed_in(metrics, score_candidate_with_ai, candidate, job_title, job_description),
+            analyses)
+    reports.append(_report("score", wall, latencies))
+
+    # Render and export are one pass over all candidates; each reports the mean per-document cost
+    print("📏 render: candidate store and ranked view")
+    start = time.perf_counter()
+    store = CandidateStore.from_scored(zip((s[0] for s in scores), analyses))
+    view = store.ranked_view()
+    wall = time.perf_counter() - start
+    reports.append(_report("render", wall, [wall / len(view)] * len(view) if len(view) else []))
+
+    print("📏 export")
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        records = result_records(list(store.scored()))
+        write_results(records, Path(tmp)/"ranked.csv", "csv")
+        wall = time.perf_counter() - start
+    reports.append(_report("export", wall, [wall / len(records)] * len(records) if records else []))
+
+    print("📏 end_to_end: streaming extraction -> analysis -> scoring, pipelined")
+    finished: Dict[str, float] = {}
+    start = time.perf_counter()
+    docs = iter_files_from_uploader([LocalFile(p) for p in paths], max_workers=extract_workers)
+    with use_metrics(metrics):
+        result: PipelineResult = analyze_documents_concurrently(
+            docs, job_context, max_workers=workers,
+            progress_callback=lambda done, total, name: finished.__setitem__(name, time.perf_counter() - start),
+            score_job=(job_title, job_description), scoring_workers=workers,
+        )
+        score_candidates(result, job_title, job_description, max_workers=workers)
+    wall = time.perf_counter() - start
+    # Latency here is time from run start until each document was scored (its last progress step)
+    reports.append(_report("end_to_end", wall, list(finished.values())))
+    return reports
+
+
+def print_reports(reports: List[StageReport]):
+    print(f"\n{'stage':<12}{'docs':>6}{'seconds':>10}{'docs/sec':>10}{'p50 ms':>10}{'p95 ms':>10}{'peak RSS MB':>13}")
+    for r in reports:
+        print(f"{r.stage:<12}{r.docs:>6}{r.seconds:>10.2f}{r.docs_per_sec:>10.2f}{r.p50_ms:>10.1f}{r.p95_ms:>10.1f}{r.peak_rss_mb:>13.1f}")
+
+
+def print_events(events: Dict[str, int], docs: int):
+    """Structured-output events per run, with their rate per document"""
+    if not events:
+        print("\nNo invalid model outputs, repairs or fallbacks")
+        return
+    print(f"\n{'event':<28}{'count':>8}{'per doc':>10}")
+    for event, n in events.items():
+        print(f"{event:<28}{n:>8}{n / docs if docs else 0:>10.3f}")
+
+
+def compare_to_baseline(reports: List[StageReport], baseline_path: Path, tolerance: float) -> List[str]:
+    """Stages whose throughput fell, or p95 rose, by more than tolerance versus the baseline"""
+    baseline = {r["stage"]: r for r in json.loads(baseline_path.read_text())["stages"]}
+    regressions = []
+    for r in reports:
+        base = baseline.get(r.stage)
+        if not base or base["seconds"] < MIN_COMPARABLE_SECONDS:
+            continue
+        if base["docs_per_sec"] and r.docs_per_sec < base["docs_per_sec"] * (1 - tolerance):
+            regressions.append(f"{r.stage}: {r.docs_per_sec} docs/sec vs baseline {base['docs_per_sec']}")
+        if base["p95_ms"] and r.p95_ms > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{r.stage}: p95 {r.p95_ms} ms vs baseline {base['p95_ms']} ms")
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the CV screening pipeline against a local OpenAI stub")
+    parser.add_argument("--docs", type=int, default=100, help="Corpus size")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="Comma-separated mix of pdf,docx,txt")
+    parser.add_argument("--corpus-dir", type=Path, default=None, help="Reuse/keep the corpus here (default: temp dir)")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub seconds per completion")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of completions failing with 429/500")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="Fraction of completions answered with broken JSON")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent OpenAI requests")
+    parser.add_argument("--extract-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, default=None, help="Write the report here")
+    parser.add_argument("--baseline", type=Path, default=None, help="Previous --json report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression vs baseline")
+    args = parser.parse_args(argv)
+
+    server, base_url = start_stub_server(latency=args.latency, failure_rate=args.failure_rate, seed=args.seed,
+                                         malformed_rate=args.malformed_rate)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_KEY"] = "stub"
+    # Keep the client's rate limiter out of the way; the stub is the bottleneck being modelled
+    os.environ.setdefault("OPENAI_RPM_LIMIT", "1000000")
+    os.environ.setdefault("OPENAI_TPM_LIMIT", "1000000000")
+
+    job_context = {
+        "job_title": "Data Scientist",
+        "job_description": "Python, SQL and machine learning in production; Spark and cloud experience a plus.",
+        "analysis_instructions": "Analyze each CV against this job and provide detailed insights",
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_dir = args.corpus_dir or Path(tmp)/"corpus"
+        paths = generate_corpus(corpus_dir, args.docs, [f.strip() for f in args.formats.split(",") if f.strip()], args.seed)
+        print(f"🗂️  Generated {len(paths)} synthetic CVs in {corpus_dir}")
+        metrics = RunMetrics()
+        reports = run_benchmarks(paths, job_context, args.workers, args.extract_workers, metrics)
+    server.shutdown()
+
+    print_reports(reports)
+    events = metrics.events()
+    # The corpus is analysed and scored twice (isolated stages, then end to end)
+    print_events(events, 2 * len(paths))
+    if args.json:
+        args.json.write_text(json.dumps({
+            "config": {k: str(v) for k, v in vars(args).items() if k not in {"json", "baseline"}},
+            "stages": [asdict(r) for r in reports],
+            "events": events,
+        }, indent=2))
+        print(f"\n📄 Report written to {args.json}")
+    if args.baseline:
+        regressions = compare_to_baseline(reports, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"❌ Regression: {line}")
+        if regressions:
+            return 1
+        print(f"✅ No regressions beyond {args.tolerance:.0%} of {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
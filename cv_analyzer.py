@@ -3,20 +3,32 @@ Enhanced CV Analysis with OpenAI
 Provides comprehensive candidate analysis including summaries, skills extraction, 
 and structured scoring for ranking candidates.
 """
-import os
-import json
-from typing import Any, Dict, List, Optional, Union
-from dataclasses import dataclass
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional, Pattern, Sequence, Set, Tuple
+from dataclasses import dataclass, field, replace
 import logging
 
-from openai import OpenAI
 from dotenv import load_dotenv
 
+from openai_client import chat_completion, get_api_key
+from prompts import (
+    PROMPT_VERSION, RESPONSE_SCHEMAS, SCORE_BREAKDOWN_FIELDS, analysis_messages, job_match_messages, profile_messages,
+    prompt_chars, repair_messages, response_format, scoring_messages,
+)
+from utils.analysis_cache import AnalysisCache, get_cache, make_cache_key
+from utils.metrics import count
+from utils.skills import SkillMatcher, get_skill_matcher, normalize_skills
+from utils.structured import parse_json_object, validate
+from utils.tenure import estimate_years_from_mentions, extract_date_ranges, role_blocks, tenure_years
+
 load_dotenv()
 
-@dataclass
+OPENAI_MODEL = "gpt-4o-mini"
+
+@dataclass(slots=True)
 class CVAnalysis:
-    """Structured CV analysis result"""
+    """Structured CV analysis result; the fields after ai_reasoning are filled in by scoring"""
     source_file: str
     candidate_name: str
     current_title: str
@@ -31,6 +43,10 @@ class CVAnalysis:
     company_fit_score: int
     company_fit_analysis: str
     ai_reasoning: str
+    ai_score: float = 0.0
+    brief_summary: str = ""
+    score_breakdown: Dict[str, float] = field(default_factory=dict)
+    content_hash: str = ""
 
 def to_dict(analysis: CVAnalysis) -> dict:
     """Convert CVAnalysis to dictionary"""
@@ -51,212 +67,269 @@ def to_dict(analysis: CVAnalysis) -> dict:
         "ai_reasoning": analysis.ai_reasoning,
     }
 
+def analysis_cache_key(kind: str, cv_text: str, job_context: Dict[str, Any]) -> str:
+    """Cache key covering everything that determines an analysis response"""
+    return make_cache_key(kind, PROMPT_VERSION, OPENAI_MODEL, cv_text,
+                          job_context.get('job_title', ''), job_context.get('job_description', ''))
+
+def cached_result(cache: Optional[AnalysisCache], key: str) -> Optional[Dict[str, Any]]:
+    """Cached reply for key; None on a miss, without a cache or when the cache can't be read"""
+    if cache is None:
+        return None
+    try:
+        return cache.get(key)
+    except (sqlite3.Error, ValueError) as e:
+        logging.error(f"Analysis cache read failed, calling the model instead: {e}")
+        return None
+
+def store_result(cache: Optional[AnalysisCache], key: str, data: Dict[str, Any], kind: str):
+    """
+    Cache a reply; a failed write is logged and never costs the caller the (paid) reply
+    itself. Partial replies (fields dropped after a failed repair) are not cached, so a
+    later run asks the model again instead of reusing the defaults for good.
+    """
+    if cache is None:
+        return
+    if validate(data, RESPONSE_SCHEMAS[kind]):
+        count(f"{kind}_not_cached")
+        return
+    try:
+        cache.set(key, data, kind=kind)
+    except (sqlite3.Error, TypeError, ValueError) as e:
+        logging.error(f"Analysis cache write failed ({kind}), keeping the reply uncached: {e}")
+
+def complete_structured(request: Dict[str, Any], kind: str, stage: str, content: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Validated JSON object for a structured-output request of the given kind (a key of
+    prompts.RESPONSE_SCHEMAS). The reply, or content when it was already obtained (Batch
+    API), is checked against the schema and only missing or invalid fields are
+    re-requested, in one repair call that reuses the conversation. Fields still invalid
+    afterwards are left to the parsers' defaults (store_result won't cache such a reply);
+    raises ValueError when nothing usable (or no score) comes back.
+    """
+    if content is None:
+        response = chat_completion(stage=stage, **request)
+        content = response.choices[0].message.content or ""
+    schema = RESPONSE_SCHEMAS[kind]
+    data = parse_json_object(content)
+    if data is None:
+        problems = {name: "missing (the reply was not a valid JSON object)" for name in schema["properties"]}
+    else:
+        problems = validate(data, schema)
+    if not problems:
+        return data
+
+    count(f"{kind}_invalid")
+    print(f"🔧 Repairing {len(problems)} field(s) of a {kind} response: {', '.join(problems)}")
+    repair = dict(request, messages=repair_messages(request["messages"], content, problems),
+                  response_format=response_format(kind, list(problems)))
+    response = chat_completion(stage=f"{stage}_repair", **repair)
+    repaired = parse_json_object(response.choices[0].message.content or "") or {}
+    data = {**(data or {}), **{name: repaired[name] for name in problems if name in repaired}}
+    remaining = validate(data, schema)
+    if not remaining:
+        count(f"{kind}_repaired")
+        return data
+    count(f"{kind}_repair_failed")
+    if len(remaining) == len(schema["properties"]) or "score" in remaining:
+        raise ValueError(f"invalid {kind} response after repair: {', '.join(remaining)}")
+    logging.warning(f"Using defaults for invalid {kind} field(s): {', '.join(remaining)}")
+    return {name: value for name, value in data.items() if name not in remaining}
+
+def normalized_skill_lists(must_have: List[str], nice_to_have: List[str]) -> tuple[List[str], List[str]]:
+    """Both skill lists in canonical taxonomy names; a must-have is not repeated as a nice-to-have"""
+    must_have = normalize_skills(must_have)
+    return must_have, [skill for skill in normalize_skills(nice_to_have) if skill not in must_have]
+
+def parse_analysis_data(analysis_data: Dict[str, Any], filename: str) -> CVAnalysis:
+    """Build a CVAnalysis from the model's JSON, filling safe defaults"""
+    must_have, nice_to_have = normalized_skill_lists(safe_list(analysis_data.get('must_have_skills', [])),
+                                                     safe_list(analysis_data.get('nice_to_have_skills', [])))
+    # Ensure all required fields with safe defaults
+    return CVAnalysis(
+        source_file=filename,
+        candidate_name=safe_get(analysis_data, 'candidate_name', 'Unknown Candidate'),
+        current_title=safe_get(analysis_data, 'current_title', 'Not specified'),
+        total_years=safe_float(analysis_data.get('total_years', 0)),
+        relevant_years=safe_float(analysis_data.get('relevant_years', 0)),
+        summary=safe_get(analysis_data, 'summary', 'No summary available'),
+        must_have_skills=must_have,
+        nice_to_have_skills=nice_to_have,
+        experience_highlights=safe_list(analysis_data.get('experience_highlights', [])),
+        strengths=safe_list(analysis_data.get('strengths', [])),
+        confidence_notes=safe_get(analysis_data, 'confidence_notes', 'No assessment notes'),
+        company_fit_score=int(max(0, min(100, safe_float(analysis_data.get('company_fit_score', 50))))),
+        company_fit_analysis=safe_get(analysis_data, 'company_fit_analysis', 'No company fit analysis available'),
+        ai_reasoning=safe_get(analysis_data, 'ai_reasoning', 'No AI reasoning available')
+    )
+
+def analysis_request(cv_text: str, job_context: Dict[str, Any], single_pass: bool = False) -> Dict[str, Any]:
+    """chat.completions request body for analysing one CV (shared by live and batch modes)"""
+    return {
+        "model": OPENAI_MODEL,
+        "messages": analysis_messages(cv_text, job_context, single_pass=single_pass),
+        "temperature": 0.2 if single_pass else 0.3,
+        "max_tokens": 2000 if single_pass else 1500,
+        "response_format": response_format("single_pass" if single_pass else "analysis"),
+    }
+
 def analyze_cv_with_openai(cv_text: str, filename: str, job_context: Dict[str, Any]) -> CVAnalysis:
     """
     Analyze CV using OpenAI with comprehensive job-specific insights
     """
     print(f"🤖 Starting AI analysis for: {filename} (CV text: {len(cv_text)} chars)")
     
-    openai_key = os.getenv("OPENAI_API_KEY", "").strip()
+    openai_key = get_api_key()
     
     if not openai_key:
         logging.warning("OpenAI API key not found, using fallback analysis")
         print(f"⚠️  No OpenAI key found, using fallback for: {filename}")
         return fallback_analysis(cv_text, filename, job_context)
     
+    cache = get_cache()
+    cache_key = analysis_cache_key("analysis", cv_text, job_context)
+    cached = cached_result(cache, cache_key)
+    if cached is not None:
+        print(f"💾 Cache hit for {filename}")
+        return parse_analysis_data(cached, filename)
+    
     try:
-        client = OpenAI(api_key=openai_key)
-        
-        # Enhanced prompt for comprehensive analysis
-        prompt = f"""
-You are an expert HR analyst and recruiter. Analyze the following CV against the provided job requirements and KSEYE company profile. Provide detailed insights with separate scoring for job match vs company cultural fit.
-
-JOB CONTEXT:
-Job Title: {job_context.get('job_title', 'Not specified')}
-Job Description: {job_context.get('job_description', 'Not specified')}
-
-COMPANY PROFILE - KSEYE:
-KSEYE is a specialist UK lender that uses data to improve credit decisioning, pricing, and portfolio risk management. We're expanding our analytics team to build robust, production-grade models that drive measurable business outcomes.
-
-KEY RESPONSIBILITIES:
-- Build, validate, and deploy predictive models (default/PD, pricing response, prepayment, fraud/affordability, churn) for lending and portfolio analytics
-- Explore internal & external datasets; design features for time-series, tabular, and occasional NLP tasks
-- Own the model lifecycle: data prep, training, back-testing, calibration/monitoring, A/B tests, and drift alerts
-- Productionise models with MLOps best practices (versioning, CI/CD, reproducibility) in collaboration with Engineering
-- Create clear, business-friendly outputs (dashboards, documentation, and decision playbooks) for Underwriting, Risk, and Collections
-- Champion data quality and model governance (explainability, fairness, and auditability)
-
-KSEYE CULTURE & VALUES (KEY FOR COMPANY FIT SCORING):
-- Hybrid team with product-lean mindset and short iterations
-- Values clean code, reproducible pipelines, and evidence-based decisions
-- End-to-end ownership: problem framing → data → model → deployment → monitoring → business impact
-- Financial services domain expertise is highly valued
-- Tech stack: Python, SQL, scikit-learn, XGBoost/LightGBM, MLflow, Git, Docker, Airflow, Databricks/Spark, AWS, Power BI/Tableau
-- Model governance and explainability focus (regulatory requirements in lending)
-- Production-first mentality (not just research/POCs)
-
-CV TEXT:
-{cv_text}
-
-Please provide a comprehensive analysis in the following JSON format:
-
-{{
-    "candidate_name": "Full name of the candidate (extract from CV)",
-    "current_title": "Current or most recent job title",
-    "total_years": 0.0,
-    "relevant_years": 0.0,
-    "summary": "A 2-3 sentence professional summary highlighting key qualifications and fit for this role",
-    "must_have_skills": ["skill1", "skill2", "skill3"],
-    "nice_to_have_skills": ["skill1", "skill2", "skill3"],
-    "experience_highlights": ["Most relevant experience point 1", "Most relevant experience point 2", "Most relevant experience point 3"],
-    "strengths": ["Key strength 1", "Key strength 2", "Key strength 3"],
-    "confidence_notes": "Brief assessment of candidate technical fit and any concerns or standout qualities",
-    "company_fit_score": 75,
-    "company_fit_analysis": "Company fit assessment focusing on culture and working style alignment with KSEYE values",
-    "ai_reasoning": "Comprehensive analysis including technical assessment, relevant experience evaluation, and company fit insights. Mention the company fit score and whether it's strong/moderate/weak fit for KSEYE's culture and working style."
-}}
-
-SCORING GUIDELINES:
-1. Company Fit Score (0-100) should be INDEPENDENT of technical skills and based on:
-   - Financial services/lending domain experience (+20 points)
-   - Production MLOps experience (not just research) (+15 points)  
-   - End-to-end ownership mindset evidence (+15 points)
-   - Clean code/reproducible pipeline experience (+10 points)
-   - Model governance/explainability experience (+10 points)
-   - Hybrid/agile working experience (+10 points)
-   - Evidence-based decision making approach (+10 points)
-   - Regulatory/compliance awareness (+10 points)
-
-2. AI Reasoning should:
-   - Provide technical assessment of skills and experience
-   - Evaluate job requirements match
-   - ALWAYS reference the company fit score prominently (e.g., "With a company values fit score of 65%, this candidate shows moderate alignment with KSEYE's culture..." or "The 85% company values fit score reflects strong cultural alignment...")
-   - Explain briefly why the company fit score is high/moderate/low
-   - Highlight specific strengths and potential concerns
-   - Be comprehensive but concise (3-4 sentences)
-
-3. Other fields should focus on technical/job matching aspects, not company culture
-
-ANALYSIS GUIDELINES:
-1. Extract the candidate's full name from the CV (usually at the top)
-2. Focus on relevance to the specific job requirements
-3. Extract years of experience accurately (total career vs relevant to this role)
-4. Identify skills that directly match job requirements as "must_have_skills"
-5. Include complementary skills as "nice_to_have_skills"
-6. Highlight the most impressive and relevant experience points
-7. Company fit score should reflect cultural/working style alignment, NOT technical skills
-8. Be honest and differentiate candidates - don't give everyone the same scores
-9. Ensure all fields are properly filled
-
-Return only the JSON object, no additional text.
-"""
-        
-        print(f"🚀 Sending to OpenAI: {filename} (prompt: {len(prompt)} chars)")
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=1500
-        )
-        
-        # Parse response
-        content = response.choices[0].message.content.strip()
-        print(f"✅ OpenAI response received for {filename}: {len(content)} chars")
+        request = analysis_request(cv_text, job_context)
         
-        # Clean JSON if wrapped in code blocks
-        if content.startswith("```json"):
-            content = content[7:]
-        if content.startswith("```"):
-            content = content[3:]
-        if content.endswith("```"):
-            content = content[:-3]
+        print(f"🚀 Sending to OpenAI: {filename} (prompt: {prompt_chars(request['messages'])} chars)")
+        analysis_data = complete_structured(request, "analysis", stage="analyze")
         
-        try:
-            analysis_data = json.loads(content)
-            print(f"📊 JSON parsed successfully for {filename}")
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON parsing failed for {filename}: {str(e)}")
-            print(f"   Raw response: {content[:200]}...")
-            return fallback_analysis(cv_text, filename, job_context)
+        result = parse_analysis_data(analysis_data, filename)
         
-        # Ensure all required fields with safe defaults
-        result = CVAnalysis(
-            source_file=filename,
-            candidate_name=safe_get(analysis_data, 'candidate_name', 'Unknown Candidate'),
-            current_title=safe_get(analysis_data, 'current_title', 'Not specified'),
-            total_years=safe_float(analysis_data.get('total_years', 0)),
-            relevant_years=safe_float(analysis_data.get('relevant_years', 0)),
-            summary=safe_get(analysis_data, 'summary', 'No summary available'),
-            must_have_skills=safe_list(analysis_data.get('must_have_skills', [])),
-            nice_to_have_skills=safe_list(analysis_data.get('nice_to_have_skills', [])),
-            experience_highlights=safe_list(analysis_data.get('experience_highlights', [])),
-            strengths=safe_list(analysis_data.get('strengths', [])),
-            confidence_notes=safe_get(analysis_data, 'confidence_notes', 'No assessment notes'),
-            company_fit_score=int(analysis_data.get('company_fit_score', 50)),
-            company_fit_analysis=safe_get(analysis_data, 'company_fit_analysis', 'No company fit analysis available'),
-            ai_reasoning=safe_get(analysis_data, 'ai_reasoning', 'No AI reasoning available')
-        )
-        print(f"✅ Analysis completed for {filename} -> Candidate: {result.candidate_name}")
-        return result
-        
-    except json.JSONDecodeError as e:
-        print(f"❌ JSON parsing error for {filename}: {str(e)}")
-        logging.error(f"JSON parsing error for {filename}: {e}")
-        return fallback_analysis(cv_text, filename, job_context)
     except Exception as e:
         print(f"❌ OpenAI analysis error for {filename}: {str(e)}")
         logging.error(f"OpenAI analysis error for {filename}: {e}")
+        count("analysis_fallback")
         return fallback_analysis(cv_text, filename, job_context)
+    
+    store_result(cache, cache_key, analysis_data, "analysis")
+    print(f"✅ Analysis completed for {filename} -> Candidate: {result.candidate_name}")
+    return result
 
-def fallback_analysis(cv_text: str, filename: str, job_context: Dict[str, Any]) -> CVAnalysis:
+SCORE_BREAKDOWN_KEYS = tuple(SCORE_BREAKDOWN_FIELDS)
+
+def analyze_and_score_cv_with_openai(cv_text: str, filename: str, job_context: Dict[str, Any]) -> tuple[CVAnalysis, float, str, str]:
     """
-    Fallback analysis when OpenAI is not available
+    Single-pass analysis: one OpenAI call yields both the CVAnalysis and the match score.
+    Returns: (analysis, score 0-100, reasoning, brief_summary); the per-criterion
+    breakdown is attached as analysis.score_breakdown.
     """
-    print(f"⚠️  Using fallback analysis for: {filename} (CV text: {len(cv_text)} chars)")
-    
-    # Basic text analysis
-    lines = [line.strip() for line in cv_text.split('\n') if line.strip()]
-    
-    # Try to find a title (usually in first few lines)
-    current_title = "Not specified"
-    candidate_name = "Unknown Candidate"
+    print(f"🤖 Starting single-pass AI analysis for: {filename} (CV text: {len(cv_text)} chars)")
+    job_title = job_context.get('job_title', '')
+    job_description = job_context.get('job_description', '')
     
-    # Try to extract name from first few lines
-    for line in lines[:5]:
-        if len(line.split()) <= 4 and len(line) > 5 and not any(word in line.lower() for word in ['email', 'phone', 'address', '@']):
-            candidate_name = line[:50]  # Limit length
-            break
+    openai_key = get_api_key()
     
-    for line in lines[:10]:
-        if any(word in line.lower() for word in ['developer', 'engineer', 'manager', 'analyst', 'consultant', 'specialist']):
-            current_title = line[:100]  # Limit length
-            break
+    if not openai_key:
+        logging.warning("OpenAI API key not found, using fallback analysis")
+        analysis = fallback_analysis(cv_text, filename, job_context)
+        return (analysis, *score_candidate_with_ai(analysis, job_title, job_description))
     
-    # Rough year estimation (count year patterns)
-    year_mentions = len([line for line in lines if any(str(year) in line for year in range(2000, 2025))])
-    estimated_years = min(max(year_mentions * 1.2, 1), 15)  # Rough estimate
+    cache = get_cache()
+    cache_key = analysis_cache_key("single_pass", cv_text, job_context)
+    data = cached_result(cache, cache_key)
+    if data is not None:
+        print(f"💾 Cache hit for {filename}")
+        return parse_single_pass_result(data, filename)
     
-    # Basic skills extraction (look for common tech terms)
-    common_skills = ['python', 'java', 'javascript', 'react', 'node', 'sql', 'aws', 'docker', 'kubernetes', 'git']
-    found_skills = [skill for skill in common_skills if skill.lower() in cv_text.lower()]
+    try:
+        request = analysis_request(cv_text, job_context, single_pass=True)
+        
+        print(f"🚀 Sending to OpenAI (single pass): {filename} (prompt: {prompt_chars(request['messages'])} chars)")
+        data = complete_structured(request, "single_pass", stage="analyze_score")
+        
+        result = parse_single_pass_result(data, filename)
+        
+    except Exception as e:
+        print(f"❌ Single-pass analysis error for {filename}: {str(e)}")
+        logging.error(f"Single-pass analysis error for {filename}: {e}")
+        count("single_pass_fallback")
+        analysis = fallback_analysis(cv_text, filename, job_context)
+        brief_summary = f"{analysis.current_title} with {analysis.relevant_years}y relevant experience"
+        return analysis, fallback_score(analysis), f"AI analysis error, used fallback: {str(e)}", brief_summary
     
-    result = CVAnalysis(
+    store_result(cache, cache_key, data, "single_pass")
+    print(f"✅ Single-pass analysis completed for {filename} -> Candidate: {result[0].candidate_name} ({result[1]:.0f}%)")
+    return result
+
+_TITLE_WORDS = re.compile(
+    r"\b(?:developer|engineer|manager|analyst|consultant|specialist|scientist|architect|director|lead|head|"
+    r"officer|administrator|designer)\b", re.IGNORECASE)
+_CONTACT_WORDS = re.compile(r"email|phone|address|@", re.IGNORECASE)
+
+
+def _fallback_candidate(filename: str, cv_text: str, job_skills: Set[str], job_pattern: Optional[Pattern[str]],
+                        matcher: SkillMatcher) -> CVAnalysis:
+    lines = [line.strip() for line in cv_text.split('\n') if line.strip()]
+    # Name: a short line near the top that is not contact details; title: an early line naming a role
+    candidate_name = next((line[:50] for line in lines[:5]
+                           if len(line.split()) <= 4 and len(line) > 5 and not _CONTACT_WORDS.search(line)),
+                          "Unknown Candidate")
+    current_title = next((line[:100] for line in lines[:10] if _TITLE_WORDS.search(line)), "Not specified")
+
+    ranges = extract_date_ranges(cv_text)
+    if ranges:
+        total_years = tenure_years(ranges)
+        tenure_note = f"{total_years:.1f} years from {len(ranges)} dated role(s)"
+    else:
+        total_years = estimate_years_from_mentions(cv_text)
+        tenure_note = "estimated from year mentions (no date ranges found)"
+    if ranges and job_pattern:
+        # A role is relevant when its text mentions any skill the job asks for
+        relevant_years = tenure_years([r for r, block in zip(ranges, role_blocks(cv_text, ranges))
+                                       if job_pattern.search(block)])
+    else:
+        # Assume 70% relevant
+        relevant_years = round(total_years * 0.7, 1)
+
+    found_skills = matcher.find(cv_text)
+    if job_skills:
+        must_have = [skill for skill in found_skills if skill in job_skills]
+        nice_to_have = [skill for skill in found_skills if skill not in job_skills]
+    else:
+        must_have, nice_to_have = found_skills[:5], found_skills[5:]
+
+    return CVAnalysis(
         source_file=filename,
         candidate_name=candidate_name,
         current_title=current_title,
-        total_years=float(estimated_years),
-        relevant_years=float(estimated_years * 0.7),  # Assume 70% relevant
-        summary=f"Candidate with approximately {estimated_years:.0f} years of experience. Basic analysis only - OpenAI required for detailed insights.",
-        must_have_skills=found_skills[:5],
-        nice_to_have_skills=found_skills[5:10] if len(found_skills) > 5 else [],
+        total_years=float(total_years),
+        relevant_years=float(relevant_years),
+        summary=f"Candidate with approximately {total_years:.0f} years of experience. Basic analysis only - OpenAI required for detailed insights.",
+        must_have_skills=must_have[:10],
+        nice_to_have_skills=nice_to_have[:10],
         experience_highlights=["Basic analysis only - full details require OpenAI"],
         strengths=["Analysis requires OpenAI API key"],
-        confidence_notes="Limited analysis - please configure OpenAI API key for comprehensive evaluation",
+        confidence_notes=f"Limited analysis - experience {tenure_note}; please configure OpenAI API key for comprehensive evaluation",
         company_fit_score=50,
         company_fit_analysis="Company fit analysis requires OpenAI API key for comprehensive evaluation",
         ai_reasoning="Basic fallback analysis - OpenAI API key required for comprehensive AI assessment and company fit evaluation"
     )
-    print(f"✅ Fallback analysis completed for {filename} -> Candidate: {candidate_name}")
+
+def fallback_analyses(docs: Sequence[Tuple[str, str]], job_context: Dict[str, Any]) -> List[CVAnalysis]:
+    """
+    Offline analysis of a batch of (filename, cv_text) pairs, used when OpenAI is not
+    available: skills come from the configured taxonomy (utils.skills), experience from
+    the CV's date ranges (utils.tenure). Skills the job description mentions are
+    must-haves and relevant years count only roles that use them.
+    """
+    matcher = get_skill_matcher()
+    job_skills = set(matcher.find(f"{job_context.get('job_title', '')}\n{job_context.get('job_description', '')}"))
+    job_pattern = matcher.pattern(job_skills)
+    return [_fallback_candidate(filename, cv_text, job_skills, job_pattern, matcher) for filename, cv_text in docs]
+
+def fallback_analysis(cv_text: str, filename: str, job_context: Dict[str, Any]) -> CVAnalysis:
+    """
+    Fallback analysis when OpenAI is not available
+    """
+    print(f"⚠️  Using fallback analysis for: {filename} (CV text: {len(cv_text)} chars)")
+    result = fallback_analyses([(filename, cv_text)], job_context)[0]
+    print(f"✅ Fallback analysis completed for {filename} -> Candidate: {result.candidate_name}")
     return result
 
 def safe_get(data: Dict, key: str, default: str = "") -> str:
@@ -292,137 +365,193 @@ def safe_list(value: Any) -> List[str]:
     return []
 
 
+def scoring_request(candidate: CVAnalysis, job_title: str, job_description: str) -> Dict[str, Any]:
+    """chat.completions request body for scoring one analysed candidate"""
+    return {
+        "model": OPENAI_MODEL,
+        "messages": scoring_messages(candidate, job_title, job_description),
+        "temperature": 0.1,
+        "max_tokens": 1000,
+        "response_format": response_format("score"),
+    }
+
+def score_cache_key(request: Dict[str, Any], kind: str = "score") -> str:
+    """Cache key for a scoring request (the messages already encode candidate and job)"""
+    return make_cache_key(kind, PROMPT_VERSION, request["model"], *(m["content"] for m in request["messages"]))
+
+def fallback_score(candidate: CVAnalysis) -> float:
+    """Experience and skill-count heuristic used when AI scoring is unavailable"""
+    base_score = min(95, max(20, candidate.total_years * 8 + candidate.relevant_years * 12))
+    skill_bonus = len(candidate.must_have_skills) * 3 + len(candidate.nice_to_have_skills) * 1.5
+    return min(100, base_score + skill_bonus)
+
+def parse_score_data(result: Dict[str, Any], candidate: CVAnalysis, reasoning_key: str = 'reasoning') -> tuple[float, str, str]:
+    """Extract (score, reasoning, brief_summary) from the model's scoring JSON"""
+    score = float(result.get('score', 0))
+    reasoning = result.get(reasoning_key, 'No reasoning provided')
+    brief_summary = result.get('brief_summary', f"{candidate.current_title} with {candidate.relevant_years}y experience")
+    
+    # Ensure score is within valid range
+    score = max(0, min(100, score))
+    
+    return score, reasoning, brief_summary
+
+def parse_single_pass_result(data: Dict[str, Any], filename: str) -> tuple[CVAnalysis, float, str, str]:
+    """Extract (analysis, score, reasoning, brief_summary) from the single-pass JSON, with its score breakdown"""
+    analysis = parse_analysis_data(data, filename)
+    score, reasoning, brief_summary = parse_score_data(data, analysis, reasoning_key='score_reasoning')
+    analysis.score_breakdown = {key: safe_float(data.get(key, 0)) for key in SCORE_BREAKDOWN_KEYS}
+    return analysis, score, reasoning, brief_summary
+
 def score_candidate_with_ai(candidate: CVAnalysis, job_title: str, job_description: str) -> tuple[float, str, str]:
     """
     Score candidate using AI analysis against job requirements
     Returns: (score 0-100, reasoning, brief_summary)
     """
-    openai_key = os.getenv("OPENAI_API_KEY", "").strip()
+    openai_key = get_api_key()
     
     if not openai_key:
         # Fallback to simple scoring if no API key
-        base_score = min(95, max(20, candidate.total_years * 8 + candidate.relevant_years * 12))
-        skill_bonus = len(candidate.must_have_skills) * 3 + len(candidate.nice_to_have_skills) * 1.5
-        score = min(100, base_score + skill_bonus)
         brief_summary = f"{candidate.current_title} with {candidate.relevant_years}y relevant experience. Skills: {', '.join(candidate.must_have_skills[:3])}."
-        return score, "Fallback scoring used (no API key available)", brief_summary
+        return fallback_score(candidate), "Fallback scoring used (no API key available)", brief_summary
+    
+    request = scoring_request(candidate, job_title, job_description)
+    cache = get_cache()
+    cache_key = score_cache_key(request)
+    cached = cached_result(cache, cache_key)
+    if cached is not None:
+        return parse_score_data(cached, candidate)
     
     try:
-        client = OpenAI(api_key=openai_key)
-        
-        # Prepare candidate summary for scoring
-        candidate_summary = f"""
-Candidate: {candidate.candidate_name}
-Current Title: {candidate.current_title}
-Total Experience: {candidate.total_years} years
-Relevant Experience: {candidate.relevant_years} years
-Summary: {candidate.summary}
-Key Skills: {', '.join(candidate.must_have_skills + candidate.nice_to_have_skills)}
-Experience Highlights: {', '.join(candidate.experience_highlights)}
-Strengths: {', '.join(candidate.strengths)}
-"""
-        
-        scoring_prompt = f"""You are an expert recruiter evaluating candidates. Analyze this candidate against the job requirements and provide a comprehensive score.
-
-JOB REQUIREMENTS:
-Title: {job_title}
-Description: {job_description}
-
-CANDIDATE PROFILE:
-{candidate_summary}
-
-Evaluate the candidate on these criteria and provide a detailed scoring:
-
-1. RELEVANT EXPERIENCE MATCH (40% weight)
-   - How well does their experience align with job requirements?
-   - Quality and depth of relevant experience
-   - Career progression and growth
-
-2. REQUIRED SKILLS COVERAGE (30% weight)
-   - Coverage of must-have technical skills
-   - Proficiency level indicators
-   - Skill depth vs breadth
-
-3. NICE-TO-HAVE SKILLS (15% weight)
-   - Additional valuable skills mentioned
-   - Bonus qualifications
-
-4. EDUCATION & CERTIFICATIONS (10% weight)
-   - Relevant educational background
-   - Professional certifications
-   - Continuous learning indicators
-
-5. OVERALL FIT & POTENTIAL (5% weight)
-   - Cultural fit indicators
-   - Growth potential
-   - Communication skills evident in CV
-
-Provide a final score from 0-100 where:
-- 90-100: Exceptional match, top candidate
-- 80-89: Strong match, excellent candidate  
-- 70-79: Good match, solid candidate
-- 60-69: Moderate match, consider with reservations
-- 50-59: Weak match, likely not suitable
-- 0-49: Poor match, not recommended
-
-Return your response in this exact JSON format:
-{{
-    "score": 85,
-    "reasoning": "Strong candidate with 8+ years relevant experience in Python development. Excellent match for senior role requirements including microservices, AWS, and team leadership. Missing some nice-to-have skills like Kubernetes but overall very well-qualified.",
-    "brief_summary": "Senior Python Developer with 8y experience, matches 85% of requirements with strong microservices & AWS expertise",
-    "experience_match": 88,
-    "skills_coverage": 82,
-    "nice_to_have": 70,
-    "education": 85,
-    "overall_fit": 90
-}}
-
-The brief_summary should be 1-2 sentences maximum showing: current role/title, years of experience, match percentage or key alignment with job requirements, and 1-2 standout relevant skills/strengths."""
-
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert recruiter with deep knowledge of technical roles and candidate evaluation. Provide honest, detailed, and consistent scoring."
-                },
-                {
-                    "role": "user",
-                    "content": scoring_prompt
-                }
-            ],
-            temperature=0.1,
-            max_tokens=1000
-        )
-        
-        # Parse the JSON response
-        result_text = response.choices[0].message.content
-        
-        try:
-            result = json.loads(result_text)
-            score = float(result.get('score', 0))
-            reasoning = result.get('reasoning', 'No reasoning provided')
-            brief_summary = result.get('brief_summary', f"{candidate.current_title} with {candidate.relevant_years}y experience")
-            
-            # Ensure score is within valid range
-            score = max(0, min(100, score))
-            
-            return score, reasoning, brief_summary
-            
-        except json.JSONDecodeError:
-            # Fallback if JSON parsing fails
-            print(f"Failed to parse AI scoring response: {result_text}")
-            fallback_score = min(95, max(20, candidate.total_years * 8 + candidate.relevant_years * 12))
-            skill_bonus = len(candidate.must_have_skills) * 3 + len(candidate.nice_to_have_skills) * 1.5
-            score = min(100, fallback_score + skill_bonus)
-            brief_summary = f"{candidate.current_title} with {candidate.relevant_years}y relevant experience"
-            return score, "AI scoring failed, used fallback calculation", brief_summary
+        result = complete_structured(request, "score", stage="score")
+        scored = parse_score_data(result, candidate)
             
     except Exception as e:
         print(f"Error in AI scoring: {str(e)}")
+        count("score_fallback")
         # Fallback to simple scoring
-        base_score = min(95, max(20, candidate.total_years * 8 + candidate.relevant_years * 12))
-        skill_bonus = len(candidate.must_have_skills) * 3 + len(candidate.nice_to_have_skills) * 1.5
-        score = min(100, base_score + skill_bonus)
         brief_summary = f"{candidate.current_title} with {candidate.relevant_years}y relevant experience"
-        return score, f"AI scoring error, used fallback: {str(e)}", brief_summary
+        return fallback_score(candidate), f"AI scoring error, used fallback: {str(e)}", brief_summary
+    
+    store_result(cache, cache_key, result, "score")
+    return scored
+
+
+# Multi-job screening: one job-independent profile per CV, then a job-match call per role
+
+def profile_request(cv_text: str) -> Dict[str, Any]:
+    """chat.completions request body for a job-independent CV profile"""
+    return {
+        "model": OPENAI_MODEL,
+        "messages": profile_messages(cv_text),
+        "temperature": 0.2,
+        "max_tokens": 1500,
+        "response_format": response_format("profile"),
+    }
+
+def parse_profile_data(data: Dict[str, Any], filename: str) -> CVAnalysis:
+    """
+    CVAnalysis from the profile JSON: every skill goes to must_have_skills and
+    relevant_years equals total_years until a job match narrows them
+    """
+    total_years = safe_float(data.get('total_years', 0))
+    company_fit_analysis = safe_get(data, 'company_fit_analysis', 'No company fit analysis available')
+    return CVAnalysis(
+        source_file=filename,
+        candidate_name=safe_get(data, 'candidate_name', 'Unknown Candidate'),
+        current_title=safe_get(data, 'current_title', 'Not specified'),
+        total_years=total_years,
+        relevant_years=total_years,
+        summary=safe_get(data, 'summary', 'No summary available'),
+        must_have_skills=normalize_skills(safe_list(data.get('skills', []))),
+        nice_to_have_skills=[],
+        experience_highlights=safe_list(data.get('experience_highlights', [])),
+        strengths=safe_list(data.get('strengths', [])),
+        confidence_notes="Job-independent profile",
+        company_fit_score=int(max(0, min(100, safe_float(data.get('company_fit_score', 50))))),
+        company_fit_analysis=company_fit_analysis,
+        ai_reasoning=company_fit_analysis,
+    )
+
+def analyze_profile_with_openai(cv_text: str, filename: str) -> CVAnalysis:
+    """
+    Job-independent profile of a CV (one call, cached per CV text regardless of job)
+    """
+    print(f"🤖 Starting profile analysis for: {filename} (CV text: {len(cv_text)} chars)")
+    if not get_api_key():
+        logging.warning("OpenAI API key not found, using fallback analysis")
+        return fallback_analysis(cv_text, filename, {})
+
+    cache = get_cache()
+    cache_key = analysis_cache_key("profile", cv_text, {})
+    cached = cached_result(cache, cache_key)
+    if cached is not None:
+        print(f"💾 Cache hit for {filename}")
+        return parse_profile_data(cached, filename)
+
+    try:
+        data = complete_structured(profile_request(cv_text), "profile", stage="profile")
+        result = parse_profile_data(data, filename)
+    except Exception as e:
+        print(f"❌ Profile analysis error for {filename}: {str(e)}")
+        logging.error(f"Profile analysis error for {filename}: {e}")
+        count("profile_fallback")
+        return fallback_analysis(cv_text, filename, {})
+    store_result(cache, cache_key, data, "profile")
+    print(f"✅ Profile completed for {filename} -> Candidate: {result.candidate_name}")
+    return result
+
+def job_match_request(profile: CVAnalysis, job_title: str, job_description: str) -> Dict[str, Any]:
+    """chat.completions request body for matching a profiled candidate to one job"""
+    return {
+        "model": OPENAI_MODEL,
+        "messages": job_match_messages(profile, job_title, job_description),
+        "temperature": 0.1,
+        "max_tokens": 1000,
+        "response_format": response_format("job_match"),
+    }
+
+def _profile_for_job(profile: CVAnalysis, job_description: str, data: Optional[Dict[str, Any]] = None) -> CVAnalysis:
+    """Job-specific copy of a profile, from the job-match JSON or, without it, a taxonomy split of the skills"""
+    if data is None:
+        # Taxonomy matching, so "R" or "Go" only count when the job really asks for them
+        job_skills = set(get_skill_matcher().find(job_description))
+        skills = normalize_skills(profile.must_have_skills + profile.nice_to_have_skills)
+        must_have = [skill for skill in skills if skill in job_skills]
+        nice_to_have = [skill for skill in skills if skill not in job_skills]
+        relevant_years = profile.relevant_years
+    else:
+        must_have, nice_to_have = normalized_skill_lists(safe_list(data.get('must_have_skills', [])),
+                                                         safe_list(data.get('nice_to_have_skills', [])))
+        relevant_years = min(safe_float(data.get('relevant_years', profile.total_years)), profile.total_years)
+    return replace(profile, must_have_skills=must_have, nice_to_have_skills=nice_to_have,
+                   relevant_years=relevant_years, score_breakdown={})
+
+def score_profile_for_job(profile: CVAnalysis, job_title: str, job_description: str) -> tuple[CVAnalysis, float, str, str]:
+    """
+    Match a job-independent profile to one job in a single call.
+    Returns: (job-specific copy of the profile, score 0-100, reasoning, brief_summary);
+    the per-criterion breakdown is attached as score_breakdown on the copy.
+    """
+    if not get_api_key():
+        candidate = _profile_for_job(profile, job_description)
+        return (candidate, *score_candidate_with_ai(candidate, job_title, job_description))
+
+    request = job_match_request(profile, job_title, job_description)
+    cache = get_cache()
+    cache_key = score_cache_key(request, kind="job_match")
+    data = cached_result(cache, cache_key)
+    try:
+        if data is None:
+            data = complete_structured(request, "job_match", stage="job_match")
+            store_result(cache, cache_key, data, "job_match")
+        candidate = _profile_for_job(profile, job_description, data)
+        candidate.score_breakdown = {key: safe_float(data.get(key, 0)) for key in SCORE_BREAKDOWN_KEYS}
+        return (candidate, *parse_score_data(data, candidate))
+    except Exception as e:
+        print(f"❌ Job match error for {profile.source_file} / {job_title}: {str(e)}")
+        logging.error(f"Job match error for {profile.source_file} / {job_title}: {e}")
+        count("job_match_fallback")
+        candidate = _profile_for_job(profile, job_description)
+        brief_summary = f"{candidate.current_title} with {candidate.total_years}y experience"
+        return candidate, fallback_score(candidate), f"AI job match error, used fallback: {str(e)}", brief_summary
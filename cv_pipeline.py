@@ -0,0 +1,374 @@
+"""
+Concurrent CV analysis pipeline
+Runs analyze_cv_with_openai (or the single-pass analyze_and_score_cv_with_openai)
+across a batch of documents with a bounded number of in-flight requests,
+reporting progress as each analysis completes, then scores and ranks the results.
+Scoring can be pipelined: each analysis is handed to its own scoring pool as soon
+as it finishes, so a run takes about as long as the slower stage, not the sum.
+Multi-job mode profiles each CV once and ranks the pool separately for every job.
+"""
+import os
+import time
+import logging
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from cv_analyzer import (
+    CVAnalysis, analyze_cv_with_openai, analyze_and_score_cv_with_openai, analyze_profile_with_openai,
+    fallback_analyses, score_candidate_with_ai, score_profile_for_job,
+)
+from openai_client import get_api_key
+from utils.analysis_cache import make_cache_key
+from utils.metrics import span
+from utils.prerank import prerank
+from utils.text import clean_text, compact_cv_text
+
+DEFAULT_MAX_WORKERS = 8
+# Pre-filtered CVs are scored by keyword relevance on a 0-30 scale so they rank
+# below AI-scored candidates, in pre-rank order
+PREFILTERED_MAX_SCORE = 30.0
+
+ProgressCallback = Callable[[int, int, str], None]
+
+
+def get_max_workers() -> int:
+    """Read the configured number of concurrent analyses (CV_ANALYSIS_MAX_WORKERS)"""
+    try:
+        return max(1, int(os.getenv("CV_ANALYSIS_MAX_WORKERS", DEFAULT_MAX_WORKERS)))
+    except ValueError:
+        return DEFAULT_MAX_WORKERS
+
+
+def get_scoring_workers() -> int:
+    """Read the configured number of concurrent scoring requests (CV_SCORING_MAX_WORKERS)"""
+    try:
+        return max(1, int(os.getenv("CV_SCORING_MAX_WORKERS", DEFAULT_MAX_WORKERS)))
+    except ValueError:
+        return DEFAULT_MAX_WORKERS
+
+
+@dataclass
+class PipelineResult:
+    """Per-document outcome of a pipeline run, in input order"""
+    filenames: List[str]
+    analyses: List[Optional[CVAnalysis]]
+    scores: List[Optional[Tuple[float, str, str]]] = field(default_factory=list)
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+    content_hashes: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+    tokens_saved: int = 0
+    llm_calls_avoided: int = 0
+
+    @property
+    def completed(self) -> List[CVAnalysis]:
+        """Analyses that finished without error"""
+        return [a for a in self.analyses if a is not None]
+
+    @property
+    def completed_with_scores(self) -> List[Tuple[CVAnalysis, Optional[Tuple[float, str, str]]]]:
+        """(analysis, single-pass score or None) for analyses that finished without error"""
+        return [(a, s) for a, s in zip(self.analyses, self.scores) if a is not None]
+
+
+def content_hash(cv_text: str) -> str:
+    """Identity of a CV's extracted text, independent of its filename"""
+    return make_cache_key("cv", cv_text)
+
+
+def prepare_cv_text(filename: str, cv_text: str) -> Tuple[str, int]:
+    """Clean and compact CV text to the token budget; returns (text, tokens saved)"""
+    with span("clean"):
+        compacted = compact_cv_text(clean_text(cv_text))
+    if compacted.tokens_saved:
+        print(f"✂️  Compacted {filename}: {compacted.original_tokens} -> {compacted.compacted_tokens} tokens "
+              f"(saved {compacted.tokens_saved}; removed {', '.join(compacted.removed)})")
+    return compacted.text, compacted.tokens_saved
+
+
+def _prefiltered_result(analysis: CVAnalysis, relevance: float, rank: int, total: int) -> Tuple[CVAnalysis, Tuple[float, str, str]]:
+    """Offline analysis record for a CV the keyword pre-ranking kept away from the LLM"""
+    note = f"Not sent for AI analysis: keyword pre-rank {rank} of {total} ({relevance:.0%} of the best match's relevance)"
+    analysis.confidence_notes = note
+    analysis.ai_reasoning = note
+    brief_summary = f"{analysis.current_title} with ~{analysis.relevant_years:.0f}y relevant experience (pre-filtered)"
+    return analysis, (round(PREFILTERED_MAX_SCORE * relevance, 1), note, brief_summary)
+
+
+def _analyze_one(filename: str, cv_text: str, job_context: Dict[str, Any], single_pass: bool, profile: bool = False):
+    prepared_text, tokens_saved = prepare_cv_text(filename, cv_text)
+    if profile:
+        return analyze_profile_with_openai(prepared_text, filename), None, tokens_saved
+    if single_pass:
+        analysis, score, reasoning, brief_summary = analyze_and_score_cv_with_openai(prepared_text, filename, job_context)
+        return analysis, (score, reasoning, brief_summary), tokens_saved
+    return analyze_cv_with_openai(prepared_text, filename, job_context), None, tokens_saved
+
+
+def _analyze_offline(docs: Iterable[Tuple[str, str]], job_context: Dict[str, Any],
+                     progress_callback: Optional[ProgressCallback]) -> PipelineResult:
+    """Whole batch through the offline analyzer in one pass (no API key configured)"""
+    start = time.perf_counter()
+    docs = list(docs)
+    result = PipelineResult(filenames=[filename for filename, _ in docs], analyses=[], scores=[None] * len(docs))
+    result.content_hashes = [content_hash(cv_text) for _, cv_text in docs]
+    with span("fallback_analysis"):
+        result.analyses = list(fallback_analyses([(filename, clean_text(cv_text)) for filename, cv_text in docs], job_context))
+    if progress_callback:
+        for completed, filename in enumerate(result.filenames, start=1):
+            progress_callback(completed, len(docs), filename)
+    result.elapsed = time.perf_counter() - start
+    print(f"⚠️  No OpenAI API key: analyzed {len(docs)} document(s) offline in {result.elapsed:.2f}s")
+    return result
+
+
+def analyze_documents_concurrently(
+    docs: Iterable[Tuple[str, str]],
+    job_context: Dict[str, Any],
+    max_workers: Optional[int] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    single_pass: bool = False,
+    total: Optional[int] = None,
+    prerank_top_n: int = 0,
+    prerank_min_score: float = 0.0,
+    profile: bool = False,
+    score_job: Optional[Tuple[str, str]] = None,
+    scoring_workers: Optional[int] = None,
+) -> PipelineResult:
+    """
+    Analyze (filename, cv_text) pairs with at most max_workers requests in flight.
+    docs may be a list or a generator such as parsing.extractor.iter_files_from_uploader:
+    documents are submitted as they arrive and extraction is paused while more than
+    2 * max_workers analyses are pending, so parsing overlaps network I/O with bounded memory.
+    progress_callback(completed, total, filename) is invoked on the calling thread
+    as each document finishes, so it is safe to update Streamlit widgets from it;
+    total is the supplied estimate (or len(docs)), else the number submitted so far.
+    With single_pass, each document costs one call and result.scores holds
+    (score, reasoning, brief_summary) alongside each analysis.
+    With prerank_top_n and/or prerank_min_score (relative BM25 relevance, 0-1), the whole
+    batch is extracted first and ranked against the job description; only the selected
+    CVs reach the LLM, the rest get a pre-filtered fallback record and a capped score.
+    With profile, each CV gets one job-independent profile call instead (multi-job mode;
+    job_context, single_pass and pre-ranking are ignored).
+    With score_job=(job_title, job_description), each finished analysis is scored right
+    away on a second pool with at most scoring_workers requests in flight, so scoring
+    overlaps analysis and result.scores is filled for every document (score_candidates
+    then only ranks). Progress then counts both stages: total is twice the document count.
+    Without an API key the whole batch goes through the offline analyzer at once
+    (cv_analyzer.fallback_analyses) and pre-ranking is skipped.
+    """
+    if not get_api_key():
+        return _analyze_offline(docs, {} if profile else job_context, progress_callback)
+    max_workers = max_workers or get_max_workers()
+    ranking = None
+    if (prerank_top_n or prerank_min_score) and not profile:
+        docs = list(docs)
+        with span("prerank"):
+            ranking = prerank([clean_text(text) for _, text in docs], job_context.get('job_title', ''),
+                              job_context.get('job_description', ''), prerank_top_n, prerank_min_score)
+        print(f"🔎 Pre-ranking kept {len(docs) - ranking.skipped}/{len(docs)} CV(s) for AI analysis")
+        skipped = [i for i in range(len(docs)) if not ranking.selected[i]]
+        offline = dict(zip(skipped, fallback_analyses([(docs[i][0], clean_text(docs[i][1])) for i in skipped], job_context)))
+    if total is None and hasattr(docs, "__len__"):
+        total = len(docs)
+    max_pending = max_workers * 2
+    result = PipelineResult(filenames=[], analyses=[], scores=[])
+    pipelined = score_job is not None and not profile
+    scoring_workers = scoring_workers or get_scoring_workers()
+    steps = 2 if pipelined else 1
+
+    if pipelined:
+        print(f"⚡ Analyzing and scoring documents with up to {max_workers} analysis and "
+              f"{scoring_workers} scoring request(s) in flight")
+    else:
+        print(f"⚡ Analyzing documents with up to {max_workers} concurrent request(s)")
+    start = time.perf_counter()
+    completed = 0
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cv-analysis") as pool, \
+            ThreadPoolExecutor(max_workers=scoring_workers, thread_name_prefix="cv-scoring") as scoring_pool:
+        pending: Dict[Future, int] = {}
+        scoring: Dict[Future, int] = {}
+
+        def report(filename: str, stages: int = 1):
+            nonlocal completed
+            completed += stages
+            if progress_callback:
+                progress_callback(completed, max(total or 0, len(result.filenames)) * steps, filename)
+
+        def finish(futures):
+            for future in futures:
+                if future in scoring:
+                    i = scoring.pop(future)
+                    try:
+                        result.scores[i] = future.result()
+                    except Exception as e:
+                        # score_candidates scores it again
+                        logging.error(f"Pipelined scoring failed for {result.filenames[i]}: {e}")
+                    report(result.filenames[i])
+                    continue
+                i = pending.pop(future)
+                filename = result.filenames[i]
+                try:
+                    result.analyses[i], result.scores[i], tokens_saved = future.result()
+                    result.tokens_saved += tokens_saved
+                except Exception as e:
+                    logging.error(f"Pipeline analysis failed for {filename}: {e}")
+                    print(f"❌ Pipeline analysis failed for {filename}: {str(e)}")
+                    result.errors.append((filename, str(e)))
+                if pipelined and result.analyses[i] is not None and result.scores[i] is None:
+                    # Hand over to scoring straight away
+                    scored = scoring_pool.submit(contextvars.copy_context().run, score_candidate_with_ai,
+                                                 result.analyses[i], *score_job)
+                    scoring[scored] = i
+                    report(filename)
+                else:
+                    report(filename, steps)
+
+        def wait_any():
+            done, _ = wait(list(pending) + list(scoring), return_when=FIRST_COMPLETED)
+            finish(done)
+
+        for index, (filename, cv_text) in enumerate(docs):
+            result.filenames.append(filename)
+            result.content_hashes.append(content_hash(cv_text))
+            result.analyses.append(None)
+            result.scores.append(None)
+            if ranking is not None and not ranking.selected[index]:
+                result.analyses[-1], result.scores[-1] = _prefiltered_result(
+                    offline[index], float(ranking.relevance[index]), int(ranking.ranks[index]), len(docs))
+                result.llm_calls_avoided += 1 if single_pass else 2
+                report(filename, steps)
+                continue
+            # Copy the context so workers report into the caller's run metrics
+            future = pool.submit(contextvars.copy_context().run, _analyze_one, filename, cv_text, job_context, single_pass, profile)
+            pending[future] = len(result.filenames) - 1
+            # Backpressure: stop pulling documents while too many analyses are queued
+            while len(pending) >= max_pending:
+                wait_any()
+        while pending or scoring:
+            wait_any()
+
+    result.elapsed = time.perf_counter() - start
+    print(f"🎯 {'Analyzed and scored' if pipelined else 'Analyzed'} {len(result.filenames)} document(s) "
+          f"in {result.elapsed:.1f}s ({len(result.errors)} error(s))")
+    if result.llm_calls_avoided:
+        print(f"💸 Pre-ranking avoided {result.llm_calls_avoided} LLM call(s)")
+    return result
+
+
+def score_candidates(
+    result: PipelineResult,
+    job_title: str,
+    job_description: str,
+    max_workers: Optional[int] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> List[Tuple[float, CVAnalysis]]:
+    """
+    Score every completed analysis (reusing single-pass or pipelined scores) with at most max_workers
+    scoring requests in flight. Sets ai_score, ai_reasoning, brief_summary and content_hash
+    on each candidate and returns (score, candidate) sorted best first.
+    progress_callback(completed, total, filename) runs on the calling thread.
+    """
+    max_workers = max_workers or get_max_workers()
+    for candidate, cv_hash in zip(result.analyses, result.content_hashes):
+        if candidate is not None:
+            candidate.content_hash = cv_hash
+    pairs = result.completed_with_scores
+    scored: List[Tuple[float, CVAnalysis]] = []
+
+    def apply(candidate: CVAnalysis, scored_tuple: Tuple[float, str, str]):
+        score, reasoning, brief_summary = scored_tuple
+        candidate.ai_score = score
+        candidate.ai_reasoning = reasoning
+        candidate.brief_summary = brief_summary
+        scored.append((score, candidate))
+        if progress_callback:
+            progress_callback(len(scored), len(pairs), candidate.source_file)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cv-scoring") as pool:
+        futures = {}
+        for candidate, precomputed in pairs:
+            if precomputed is not None:
+                apply(candidate, precomputed)
+            else:
+                future = pool.submit(contextvars.copy_context().run, score_candidate_with_ai, candidate, job_title, job_description)
+                futures[future] = candidate
+        for future in as_completed(futures):
+            # score_candidate_with_ai falls back internally, so this only raises on programming errors
+            apply(futures[future], future.result())
+
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored
+
+
+def filter_new_documents(docs: Iterable[Tuple[str, str]], known_hashes: Set[str],
+                         seen_hashes: Set[str], skipped: Optional[List[str]] = None) -> Iterator[Tuple[str, str]]:
+    """
+    Yield only (filename, cv_text) pairs whose content is not in known_hashes and has not
+    been yielded already. Every document's hash is added to seen_hashes, so afterwards it
+    holds the full set of documents in the upload; the names of skipped documents are
+    appended to skipped as they are passed over.
+    """
+    for filename, cv_text in docs:
+        cv_hash = content_hash(cv_text)
+        duplicate = cv_hash in known_hashes or cv_hash in seen_hashes
+        seen_hashes.add(cv_hash)
+        if duplicate:
+            print(f"⏭️  Skipping {filename}: already screened")
+            if skipped is not None:
+                skipped.append(filename)
+            continue
+        yield filename, cv_text
+
+
+def screen_multiple_jobs(
+    docs: Iterable[Tuple[str, str]],
+    jobs: List[Dict[str, str]],
+    max_workers: Optional[int] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    total: Optional[int] = None,
+) -> Tuple[PipelineResult, Dict[str, List[Tuple[float, CVAnalysis]]]]:
+    """
+    Screen one CV pool against several jobs ({"job_title", "job_description"} dicts with
+    distinct titles): each CV is extracted, cleaned and profiled once, then matched to
+    every job with one call per (CV, job), so N CVs and J jobs cost N + N*J calls instead
+    of 2*N*J. Returns the profiling PipelineResult and, per job title, (score, candidate)
+    sorted best first; candidates are job-specific copies of the shared profile.
+    progress_callback(completed, total, filename) covers both phases.
+    """
+    titles = [job["job_title"] for job in jobs]
+    if len(set(titles)) != len(titles):
+        raise ValueError("Job titles must be distinct in multi-job mode")
+    max_workers = max_workers or get_max_workers()
+    result = analyze_documents_concurrently(docs, {}, max_workers=max_workers, progress_callback=progress_callback,
+                                            total=total, profile=True)
+    profiles = [(profile, cv_hash) for profile, cv_hash in zip(result.analyses, result.content_hashes)
+                if profile is not None]
+    for profile, cv_hash in profiles:
+        profile.content_hash = cv_hash
+
+    rankings: Dict[str, List[Tuple[float, CVAnalysis]]] = {title: [] for title in titles}
+    matches_total = len(profiles) * len(jobs)
+    print(f"🧩 Matching {len(profiles)} profile(s) to {len(jobs)} job(s)")
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cv-job-match") as pool:
+        futures = {}
+        for job in jobs:
+            for profile, _ in profiles:
+                future = pool.submit(contextvars.copy_context().run, score_profile_for_job, profile,
+                                     job["job_title"], job["job_description"])
+                futures[future] = job["job_title"]
+        for done, future in enumerate(as_completed(futures), start=1):
+            # score_profile_for_job falls back internally, so this only raises on programming errors
+            candidate, score, reasoning, brief_summary = future.result()
+            candidate.ai_score = score
+            candidate.ai_reasoning = reasoning
+            candidate.brief_summary = brief_summary
+            rankings[futures[future]].append((score, candidate))
+            if progress_callback:
+                progress_callback(len(result.filenames) + done, len(result.filenames) + matches_total,
+                                  candidate.source_file)
+
+    for ranked in rankings.values():
+        ranked.sort(key=lambda x: x[0], reverse=True)
+    return result, rankings
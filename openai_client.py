@@ -0,0 +1,166 @@
+"""
+Shared OpenAI client
+One connection-pooled client per API key, with request timeouts, exponential
+backoff with jitter on rate limits and server errors, and a client-side
+requests/tokens-per-minute limiter so large batches run at the highest
+sustainable throughput instead of degrading to fallback results.
+"""
+import os
+import time
+import random
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from openai import OpenAI, APIConnectionError, APIStatusError, RateLimitError
+
+from utils.metrics import record_llm_call
+from utils.text import estimate_tokens
+
+DEFAULT_TIMEOUT_SECONDS = 60.0
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_MAX_CONNECTIONS = 32
+DEFAULT_RPM_LIMIT = 500
+DEFAULT_TPM_LIMIT = 200000
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def get_api_key() -> str:
+    """OpenAI API key from the environment ("" when not configured)"""
+    return os.getenv("OPENAI_API_KEY", "").strip()
+
+
+class RateLimiter:
+    """
+    Token buckets for requests and tokens per minute, shared by all threads. A limit of
+    0 (or less) switches that bucket off.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.rpm = max(0.0, requests_per_minute)
+        self.tpm = max(0.0, tokens_per_minute)
+        self._requests = self.rpm
+        self._tokens = self.tpm
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def acquire(self, tokens: int):
+        """Block until one request and `tokens` tokens fit within the per-minute budgets"""
+        if not self.rpm and not self.tpm:
+            return
+        # A single request larger than the whole budget would otherwise wait forever
+        tokens = min(tokens, self.tpm) if self.tpm else 0
+        while True:
+            with self._lock:
+                self._refill()
+                requests_ok = not self.rpm or self._requests >= 1
+                if requests_ok and self._tokens >= tokens:
+                    if self.rpm:
+                        self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                wait = max((1 - self._requests) * 60 / self.rpm if self.rpm else 0,
+                           (tokens - self._tokens) * 60 / self.tpm if self.tpm else 0, 0.01)
+            time.sleep(wait)
+
+
+_clients: Dict[Tuple[str, str], OpenAI] = {}
+_clients_lock = threading.Lock()
+_limiter: Optional[RateLimiter] = None
+
+
+def get_client(api_key: Optional[str] = None) -> OpenAI:
+    """Process-wide client for the given key (and OPENAI_BASE_URL), created on first use"""
+    api_key = api_key or get_api_key()
+    base_url = os.getenv("OPENAI_BASE_URL", "").strip()
+    with _clients_lock:
+        client = _clients.get((api_key, base_url))
+        if client is None:
+            timeout = _env_number("OPENAI_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS)
+            max_connections = int(_env_number("OPENAI_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+            http_client = httpx.Client(
+                timeout=httpx.Timeout(timeout, connect=min(10.0, timeout)),
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            )
+            # Retries are handled in chat_completion so they share the rate limiter
+            client = OpenAI(api_key=api_key, base_url=base_url or None, http_client=http_client, max_retries=0)
+            _clients[(api_key, base_url)] = client
+    return client
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Shared limiter configured from OPENAI_RPM_LIMIT / OPENAI_TPM_LIMIT"""
+    global _limiter
+    with _clients_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(
+                _env_number("OPENAI_RPM_LIMIT", DEFAULT_RPM_LIMIT),
+                _env_number("OPENAI_TPM_LIMIT", DEFAULT_TPM_LIMIT),
+            )
+    return _limiter
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, RateLimitError):
+        # A 429 for an exhausted quota or billing limit won't clear by waiting
+        return "insufficient_quota" not in (getattr(error, "code", None), getattr(error, "type", None))
+    if isinstance(error, APIConnectionError):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+def _backoff_seconds(attempt: int, error: Exception) -> float:
+    """Server-provided Retry-After when present, else exponential backoff with jitter"""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(BACKOFF_MAX_SECONDS, float(retry_after))
+        except ValueError:
+            pass
+    ceiling = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+def chat_completion(messages: List[Dict[str, str]], model: str, max_tokens: int, stage: str = "llm", **kwargs: Any):
+    """
+    chat.completions.create through the shared client, rate limiter and retry policy.
+    Non-retryable errors and the last retryable error are raised to the caller.
+    Latency (including retries) and token usage are recorded under stage in the current run metrics.
+    """
+    client = get_client()
+    limiter = get_rate_limiter()
+    estimated_tokens = sum(estimate_tokens(str(m.get("content", ""))) for m in messages) + max_tokens
+    max_retries = int(_env_number("OPENAI_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+
+    start = time.perf_counter()
+    for attempt in range(max_retries + 1):
+        limiter.acquire(estimated_tokens)
+        try:
+            response = client.chat.completions.create(model=model, messages=messages, max_tokens=max_tokens, **kwargs)
+            record_llm_call(stage, time.perf_counter() - start, getattr(response, "usage", None), retries=attempt)
+            return response
+        except Exception as e:
+            if not _is_retryable(e) or attempt == max_retries:
+                record_llm_call(stage, time.perf_counter() - start, retries=attempt)
+                raise
+            delay = _backoff_seconds(attempt, e)
+            print(f"🔁 OpenAI {type(e).__name__}, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+            logging.warning(f"OpenAI {type(e).__name__}: {e}; retrying in {delay:.1f}s")
+            time.sleep(delay)
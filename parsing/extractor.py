@@ -1,63 +1,339 @@
 from pathlib import Path
-import io, zipfile
+import io, os, shutil, tempfile, time, zipfile, zlib
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from typing import BinaryIO, Iterable, Iterator, Optional, Sequence, Union
 import pdfplumber
 import docx2txt
 
-def read_text(path: Path) -> str:
-    path = Path(path)
+from utils.metrics import observe
+from utils.text import PAGE_SEPARATOR
+
+# Below this many documents the process pool start-up costs more than it saves
+PARALLEL_MIN_DOCS = 4
+# PDFs larger than this are checked for page count and, if long, split
+# into ranges of PDF_PAGES_PER_TASK pages across workers
+LARGE_PDF_BYTES = 1_000_000
+PDF_PAGES_PER_TASK = 25
+# ZIP members that decompress beyond this are spooled to a temporary file
+# instead of being held in memory (CV_SPOOL_THRESHOLD_MB)
+DEFAULT_SPOOL_THRESHOLD_MB = 20
+
+# Reading a damaged, truncated, encrypted (RuntimeError) or unsupported (NotImplementedError) ZIP
+_ZIP_ERRORS = (zipfile.BadZipFile, zlib.error, EOFError, OSError, RuntimeError, NotImplementedError)
+
+class Unreadable:
+    """Stand-in source for an upload or ZIP member that could not be read; extracting it reports error"""
+
+    def __init__(self, error: str):
+        self.error = error
+
+Source = Union[str, Path, bytes, bytearray, memoryview, BinaryIO, Unreadable]
+
+def get_extract_workers() -> int:
+    """Number of extraction processes (CV_EXTRACT_WORKERS, default: CPU count)"""
+    try:
+        return max(1, int(os.getenv("CV_EXTRACT_WORKERS", os.cpu_count() or 1)))
+    except ValueError:
+        return os.cpu_count() or 1
+
+def _as_input(source: Source):
+    """Paths are passed through; bytes-like and file-like sources become rewound streams"""
+    if isinstance(source, (str, Path)):
+        return str(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    source.seek(0)
+    return source
+
+def _read_bytes(source: Source) -> bytes:
+    if isinstance(source, (str, Path)):
+        return Path(source).read_bytes()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    source.seek(0)
+    return source.read()
+
+def _source_size(source: Source) -> int:
+    if isinstance(source, (str, Path)):
+        return Path(source).stat().st_size
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    return source.seek(0, io.SEEK_END)
+
+def _read_pdf_pages(source: Source, start: int = 0, stop: Optional[int] = None) -> str:
+    # Pages are separated by form feeds on their own line so repeated headers/footers can be detected later
+    text_parts = []
+    with pdfplumber.open(_as_input(source)) as pdf:
+        for page in pdf.pages[start:stop]:
+            page_text = page.extract_text() or ""
+            text_parts.append(page_text)
+    return PAGE_SEPARATOR.join(text_parts)
+
+def read_text(source: Source, name: Optional[str] = None) -> str:
+    """
+    Extract text from a path, bytes or binary file-like object.
+    name (or the path itself) decides the format by its extension.
+    """
+    name = name or str(source)
+    suffix = Path(name).suffix.lower()
+    display_name = Path(name).name
     text = ""
-    if path.suffix.lower() == ".pdf":
-        text_parts = []
-        with pdfplumber.open(path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text() or ""
-                text_parts.append(page_text)
-        text = "\n".join(text_parts)
-        print(f"🔍 PDF Extraction: {path.name} -> {len(text)} characters")
-    elif path.suffix.lower() in {".doc", ".docx"}:
-        text = docx2txt.process(str(path)) or ""
-        print(f"🔍 DOCX Extraction: {path.name} -> {len(text)} characters")
+    if suffix == ".pdf":
+        text = _read_pdf_pages(source)
+        print(f"🔍 PDF Extraction: {display_name} -> {len(text)} characters")
+    elif suffix in {".doc", ".docx"}:
+        # docx2txt hands its argument to zipfile.ZipFile, which accepts streams
+        text = docx2txt.process(_as_input(source)) or ""
+        print(f"🔍 DOCX Extraction: {display_name} -> {len(text)} characters")
     else:
+        data = _read_bytes(source)
         try:
-            text = path.read_text(encoding="utf-8", errors="ignore")
-            print(f"🔍 Text Extraction: {path.name} -> {len(text)} characters")
-        except Exception:
-            text = path.read_text(errors="ignore")
-            print(f"🔍 Text Extraction (fallback): {path.name} -> {len(text)} characters")
-    
+            text = data.decode("utf-8")
+            print(f"🔍 Text Extraction: {display_name} -> {len(text)} characters")
+        except UnicodeDecodeError:
+            # Not UTF-8: latin-1 maps every byte, so accents from legacy editors survive
+            text = data.decode("latin-1")
+            print(f"🔍 Text Extraction (fallback): {display_name} -> {len(text)} characters")
+
     return text
 
-def load_files_from_uploader(files) -> list[tuple[str, str]]:
+def _extract_task(name: str, source: Source, page_range: Optional[tuple[int, int]] = None) -> tuple[str, Optional[str], float]:
+    """Worker entry point: returns (text, error, seconds) so one bad file never aborts the batch"""
+    if isinstance(source, Unreadable):
+        return "", source.error, 0.0
+    start = time.perf_counter()
+    try:
+        if page_range is not None:
+            return _read_pdf_pages(source, *page_range), None, time.perf_counter() - start
+        return read_text(source, name), None, time.perf_counter() - start
+    except Exception as e:
+        return "", f"{type(e).__name__}: {e}", time.perf_counter() - start
+
+def _pdf_page_ranges(name: str, source: Source) -> Optional[list[tuple[int, int]]]:
+    """Page ranges for a large PDF, or None if it should be extracted as one task"""
+    if isinstance(source, Unreadable) or Path(name).suffix.lower() != ".pdf" or _source_size(source) < LARGE_PDF_BYTES:
+        return None
+    try:
+        with pdfplumber.open(_as_input(source)) as pdf:
+            page_count = len(pdf.pages)
+    except Exception:
+        return None
+    if page_count <= PDF_PAGES_PER_TASK:
+        return None
+    return [(start, min(start + PDF_PAGES_PER_TASK, page_count)) for start in range(0, page_count, PDF_PAGES_PER_TASK)]
+
+def get_spool_threshold() -> int:
+    """Byte size above which ZIP members are staged on disk"""
+    try:
+        return int(float(os.getenv("CV_SPOOL_THRESHOLD_MB", DEFAULT_SPOOL_THRESHOLD_MB)) * 1024 * 1024)
+    except ValueError:
+        return DEFAULT_SPOOL_THRESHOLD_MB * 1024 * 1024
+
+class _StagingDir:
+    """Temporary directory created only if an oversized ZIP member needs it"""
+
+    def __init__(self):
+        self.path: Optional[Path] = None
+
+    def file_for(self, index: int, name: str) -> Path:
+        if self.path is None:
+            self.path = Path(tempfile.mkdtemp(prefix="cv_upload_"))
+        return self.path/f"{index}_{name}"
+
+    def cleanup(self):
+        if self.path:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.path = None
+
+def _read_upload(f) -> bytes:
+    """Full contents of an uploaded file regardless of its current read position"""
+    if hasattr(f, "seek"):
+        f.seek(0)
+    return f.read()
+
+def _is_extractable(name: str) -> bool:
+    return name.lower().endswith((".pdf",".doc",".docx",".txt"))
+
+def _open_zip(f) -> tuple[Optional[zipfile.ZipFile], list[zipfile.ZipInfo], Optional[str]]:
+    """(archive, extractable members, error) for a ZIP upload, reading its directory in place"""
+    try:
+        if isinstance(f, LocalFile):
+            z = zipfile.ZipFile(f.path)
+        elif hasattr(f, "seek"):
+            f.seek(0)
+            z = zipfile.ZipFile(f)
+        else:
+            z = zipfile.ZipFile(io.BytesIO(f.read()))
+    except _ZIP_ERRORS as e:
+        return None, [], f"{type(e).__name__}: {e}"
+    return z, [info for info in z.infolist() if _is_extractable(info.filename)], None
+
+class UploadBatch:
     """
-    Accepts a list of streamlit UploadedFile objects (.pdf, .docx, .zip) and returns (name, text).
+    Uploaded files with each ZIP's directory read once, shared by count_uploaded_documents()
+    and iter_files_from_uploader(). A ZIP that can't be opened counts as one document, which
+    extraction then reports as failed.
+    """
+
+    def __init__(self, files):
+        self.files = list(files)
+        self.zips = {i: _open_zip(f) for i, f in enumerate(self.files) if f.name.lower().endswith(".zip")}
+
+    def __len__(self) -> int:
+        return sum(len(self.zips[i][1]) if i in self.zips and self.zips[i][0] else 1 for i in range(len(self.files)))
+
+    def close(self):
+        for z, _, _ in self.zips.values():
+            if z is not None:
+                z.close()
+
+def _as_batch(files) -> UploadBatch:
+    return files if isinstance(files, UploadBatch) else UploadBatch(files)
+
+def count_uploaded_documents(files) -> int:
     """
-    results = []
-    print(f"\n📁 Processing {len(files)} uploaded file(s)...")
-    
-    for f in files:
+    Number of documents the uploads will yield (ZIPs counted by extractable members);
+    pass the UploadBatch later given to iter_files_from_uploader to open each ZIP once
+    """
+    return len(_as_batch(files))
+
+def _iter_staged_documents(uploads: UploadBatch, staging: _StagingDir) -> Iterator[tuple[str, Source]]:
+    """Lazily yield (name, bytes, path or Unreadable) for every upload and ZIP member"""
+    spool_threshold = get_spool_threshold()
+    index = 0
+    for i, f in enumerate(uploads.files):
         name = f.name
-        data = f.read()
         print(f"📄 Processing: {name}")
-        
-        if name.lower().endswith(".zip"):
-            print(f"   📦 ZIP file detected, extracting contents...")
-            with zipfile.ZipFile(io.BytesIO(data)) as z:
-                zip_members = [member for member in z.namelist() if member.lower().endswith((".pdf",".doc",".docx",".txt"))]
-                print(f"   📦 Found {len(zip_members)} extractable files in ZIP")
-                
-                for member in zip_members:
-                    with z.open(member) as fh:
-                        tmp = Path("/tmp")/Path(member).name
-                        tmp.write_bytes(fh.read())
-                        extracted_text = read_text(tmp)
-                        results.append((Path(member).name, extracted_text))
-                        print(f"   ✅ Extracted from ZIP: {Path(member).name} -> {len(extracted_text)} characters")
-        else:
-            tmp = Path("/tmp")/name
-            tmp.write_bytes(data)
-            extracted_text = read_text(tmp)
-            results.append((name, extracted_text))
-            print(f"   ✅ Direct extraction: {name} -> {len(extracted_text)} characters")
-    
-    print(f"🎯 Total processed: {len(results)} documents")
-    return results
+        if i not in uploads.zips:
+            index += 1
+            yield name, _read_upload(f)
+            continue
+
+        print(f"   📦 ZIP file detected, extracting contents...")
+        z, zip_members, error = uploads.zips[i]
+        if z is None:
+            index += 1
+            yield name, Unreadable(error)
+            continue
+        print(f"   📦 Found {len(zip_members)} extractable files in ZIP")
+        for info in zip_members:
+            member_name = Path(info.filename).name
+            index += 1
+            source: Source
+            try:
+                if info.file_size <= spool_threshold:
+                    source = z.read(info)
+                else:
+                    # Oversized member: stream to a private temp file rather than memory
+                    source = staging.file_for(index, member_name)
+                    with z.open(info) as src, open(source, "wb") as dst:
+                        shutil.copyfileobj(src, dst)
+            except _ZIP_ERRORS as e:
+                source = Unreadable(f"{type(e).__name__}: {e}")
+            yield member_name, source
+
+def _extract_stream(docs: Iterable[tuple[str, Source]], max_workers: int,
+                    split_large_pdfs: bool = True) -> Iterator[tuple[str, str, Optional[str], float]]:
+    """
+    Yield (name, text, error, extraction seconds) in input order while keeping at most a small window of
+    documents in flight on the process pool, so memory stays bounded for large ZIPs.
+    """
+    docs = iter(docs)
+    head = list(islice(docs, PARALLEL_MIN_DOCS))
+    if max_workers <= 1 or len(head) < PARALLEL_MIN_DOCS:
+        for name, source in chain(head, docs):
+            yield (name, *_extract_task(name, source))
+        return
+
+    window = max_workers * 2
+    print(f"⚙️  Extracting documents on {max_workers} process(es)")
+    # spawn avoids forking the (multi-threaded) Streamlit server process
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending: deque = deque()
+
+        def collect(name, futures):
+            parts, error, seconds = [], None, 0.0
+            for future in futures:
+                try:
+                    text, task_error, task_seconds = future.result()
+                except Exception as e:
+                    text, task_error, task_seconds = "", f"{type(e).__name__}: {e}", 0.0
+                parts.append(text)
+                error = error or task_error
+                seconds += task_seconds
+            return name, PAGE_SEPARATOR.join(parts), error, seconds
+
+        for name, source in chain(head, docs):
+            # One task per document, or one per page range for large PDFs
+            ranges = (_pdf_page_ranges(name, source) if split_large_pdfs else None) or [None]
+            pending.append((name, [pool.submit(_extract_task, name, source, r) for r in ranges]))
+            while len(pending) >= window:
+                yield collect(*pending.popleft())
+        while pending:
+            yield collect(*pending.popleft())
+
+def read_texts_parallel(docs: Sequence[tuple[str, Source]], max_workers: Optional[int] = None,
+                        split_large_pdfs: bool = True) -> list[tuple[str, Optional[str]]]:
+    """
+    Extract text from many (name, source) documents across a process pool.
+    Sources must be paths or bytes when running in parallel (streams can't be sent to workers).
+    Returns (text, error) per document, in input order; failed files get ("", error).
+    """
+    max_workers = max_workers or get_extract_workers()
+    return [(text, error) for _, text, error, _ in _extract_stream(docs, max_workers, split_large_pdfs)]
+
+def iter_files_from_uploader(files, max_workers: Optional[int] = None) -> Iterator[tuple[str, str]]:
+    """
+    Streaming variant of load_files_from_uploader: yields (name, text) as each upload or
+    ZIP member is extracted, so analysis can start before the whole batch is parsed.
+    files is a list of uploads or an UploadBatch. Files that fail to extract, including
+    unreadable ZIPs, are skipped and reported.
+    """
+    max_workers = max_workers or get_extract_workers()
+    uploads = _as_batch(files)
+    staging = _StagingDir()
+    produced = 0
+    print(f"\n📁 Processing {len(uploads.files)} uploaded file(s)...")
+    try:
+        for name, extracted_text, error, seconds in _extract_stream(_iter_staged_documents(uploads, staging), max_workers):
+            # Worker CPU time per document (the pool overlaps these with each other and with analysis)
+            observe("extract", seconds)
+            if error:
+                print(f"   ❌ Extraction failed: {name} -> {error}")
+                continue
+            produced += 1
+            print(f"   ✅ Extracted: {name} -> {len(extracted_text)} characters")
+            yield name, extracted_text
+    finally:
+        staging.cleanup()
+        uploads.close()
+    print(f"🎯 Total processed: {produced} documents")
+
+class LocalFile:
+    """UploadedFile stand-in for a file on disk, read lazily when extracted"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.name = self.path.name
+
+    def read(self) -> bytes:
+        return self.path.read_bytes()
+
+def collect_local_files(path: Union[str, Path]) -> list[LocalFile]:
+    """CVs under a directory (recursively, including ZIPs) or a single file/ZIP, for the uploader functions"""
+    path = Path(path)
+    if path.is_dir():
+        return [LocalFile(p) for p in sorted(path.rglob("*"))
+                if p.is_file() and (_is_extractable(p.name) or p.name.lower().endswith(".zip"))]
+    return [LocalFile(path)]
+
+def load_files_from_uploader(files, max_workers: Optional[int] = None) -> list[tuple[str, str]]:
+    """
+    Accepts a list of streamlit UploadedFile objects (.pdf, .docx, .zip) and returns (name, text).
+    Documents are read from memory and extracted in parallel; only ZIP members larger than
+    the spool threshold touch disk. Files that fail to extract are skipped and reported.
+    """
+    return list(iter_files_from_uploader(files, max_workers=max_workers))
@@ -0,0 +1,391 @@
+"""
+Prompt templates for CV analysis and scoring
+Every request is assembled static-first: the system message holds the instructions,
+KSEYE company profile, JSON schema and guidelines, which are identical for every call
+of a kind; the user message then holds the job context followed by the CV (or
+candidate profile). Calls in a batch therefore share a long common prefix that the
+provider's prompt caching can serve (cached tokens are recorded in the run metrics).
+"""
+import json
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from cv_analyzer import CVAnalysis
+
+# Bump whenever a template or its expected JSON changes so cached results are not reused
+PROMPT_VERSION = "2025.3"
+
+Messages = List[Dict[str, str]]
+
+# JSON schemas for structured outputs (strict mode: every field required, no extras);
+# value ranges are not expressible in strict mode and are clamped when parsing
+
+STRING = {"type": "string"}
+NUMBER = {"type": "number"}
+INTEGER = {"type": "integer"}
+STRING_LIST = {"type": "array", "items": STRING}
+
+ANALYSIS_FIELDS = {
+    "candidate_name": STRING,
+    "current_title": STRING,
+    "total_years": NUMBER,
+    "relevant_years": NUMBER,
+    "summary": STRING,
+    "must_have_skills": STRING_LIST,
+    "nice_to_have_skills": STRING_LIST,
+    "experience_highlights": STRING_LIST,
+    "strengths": STRING_LIST,
+    "confidence_notes": STRING,
+    "company_fit_score": INTEGER,
+    "company_fit_analysis": STRING,
+    "ai_reasoning": STRING,
+}
+SCORE_BREAKDOWN_FIELDS = {
+    "experience_match": NUMBER,
+    "skills_coverage": NUMBER,
+    "nice_to_have": NUMBER,
+    "education": NUMBER,
+    "overall_fit": NUMBER,
+}
+SCORE_FIELDS = {"score": NUMBER, "reasoning": STRING, "brief_summary": STRING, **SCORE_BREAKDOWN_FIELDS}
+SINGLE_PASS_FIELDS = {**ANALYSIS_FIELDS, "score": NUMBER, "score_reasoning": STRING, "brief_summary": STRING,
+                      **SCORE_BREAKDOWN_FIELDS}
+PROFILE_FIELDS = {
+    "candidate_name": STRING,
+    "current_title": STRING,
+    "total_years": NUMBER,
+    "summary": STRING,
+    "skills": STRING_LIST,
+    "experience_highlights": STRING_LIST,
+    "strengths": STRING_LIST,
+    "company_fit_score": INTEGER,
+    "company_fit_analysis": STRING,
+}
+JOB_MATCH_FIELDS = {"score": NUMBER, "reasoning": STRING, "brief_summary": STRING, "relevant_years": NUMBER,
+                    "must_have_skills": STRING_LIST, "nice_to_have_skills": STRING_LIST, **SCORE_BREAKDOWN_FIELDS}
+
+
+# Example values shown to the model; the JSON formats below list exactly the fields of the
+# matching RESPONSE_SCHEMAS entry, in schema order, so prompts and schemas cannot drift apart
+FIELD_EXAMPLES: Dict[str, Any] = {
+    "candidate_name": "Full name of the candidate (extract from CV)",
+    "current_title": "Current or most recent job title",
+    "total_years": 0.0,
+    "relevant_years": 0.0,
+    "summary": "A 2-3 sentence professional summary highlighting key qualifications and fit for this role",
+    "must_have_skills": ["skill1", "skill2", "skill3"],
+    "nice_to_have_skills": ["skill1", "skill2", "skill3"],
+    "experience_highlights": ["Most relevant experience point 1", "Most relevant experience point 2", "Most relevant experience point 3"],
+    "strengths": ["Key strength 1", "Key strength 2", "Key strength 3"],
+    "confidence_notes": "Brief assessment of candidate technical fit and any concerns or standout qualities",
+    "company_fit_score": 75,
+    "company_fit_analysis": "Company fit assessment focusing on culture and working style alignment with KSEYE values",
+    "ai_reasoning": "Comprehensive analysis including technical assessment, relevant experience evaluation, and company fit insights. Mention the company fit score and whether it's strong/moderate/weak fit for KSEYE's culture and working style.",
+    "score": 85,
+    "reasoning": "Strong candidate with 8+ years relevant experience in Python development. Excellent match for senior role requirements including microservices, AWS, and team leadership. Missing some nice-to-have skills like Kubernetes but overall very well-qualified.",
+    "score_reasoning": "Recruiter-style justification of the overall match score against the job requirements.",
+    "brief_summary": "Senior Python Developer with 8y experience, matches 85% of requirements with strong microservices & AWS expertise",
+    "experience_match": 88,
+    "skills_coverage": 82,
+    "nice_to_have": 70,
+    "education": 85,
+    "overall_fit": 90,
+}
+
+
+def json_format(fields: Dict[str, Any], **examples: Any) -> str:
+    """Example JSON object with one entry per field (one line each), from FIELD_EXAMPLES unless overridden"""
+    values = {name: examples[name] if name in examples else FIELD_EXAMPLES[name] for name in fields}
+    lines = (f'    "{name}": {json.dumps(value, ensure_ascii=False)}' for name, value in values.items())
+    return "{\n" + ",\n".join(lines) + "\n}"
+
+
+ANALYSIS_JSON_FORMAT = json_format(ANALYSIS_FIELDS)
+SINGLE_PASS_JSON_FORMAT = json_format(SINGLE_PASS_FIELDS)
+SCORE_JSON_FORMAT = json_format(SCORE_FIELDS)
+
+KSEYE_COMPANY_PROFILE = """COMPANY PROFILE - KSEYE:
+KSEYE is a specialist UK lender that uses data to improve credit decisioning, pricing, and portfolio risk management. We're expanding our analytics team to build robust, production-grade models that drive measurable business outcomes.
+
+KEY RESPONSIBILITIES:
+- Build, validate, and deploy predictive models (default/PD, pricing response, prepayment, fraud/affordability, churn) for lending and portfolio analytics
+- Explore internal & external datasets; design features for time-series, tabular, and occasional NLP tasks
+- Own the model lifecycle: data prep, training, back-testing, calibration/monitoring, A/B tests, and drift alerts
+- Productionise models with MLOps best practices (versioning, CI/CD, reproducibility) in collaboration with Engineering
+- Create clear, business-friendly outputs (dashboards, documentation, and decision playbooks) for Underwriting, Risk, and Collections
+- Champion data quality and model governance (explainability, fairness, and auditability)
+
+KSEYE CULTURE & VALUES (KEY FOR COMPANY FIT SCORING):
+- Hybrid team with product-lean mindset and short iterations
+- Values clean code, reproducible pipelines, and evidence-based decisions
+- End-to-end ownership: problem framing → data → model → deployment → monitoring → business impact
+- Financial services domain expertise is highly valued
+- Tech stack: Python, SQL, scikit-learn, XGBoost/LightGBM, MLflow, Git, Docker, Airflow, Databricks/Spark, AWS, Power BI/Tableau
+- Model governance and explainability focus (regulatory requirements in lending)
+- Production-first mentality (not just research/POCs)"""
+
+COMPANY_FIT_GUIDELINES = """1. Company Fit Score (0-100) should be INDEPENDENT of technical skills and based on:
+   - Financial services/lending domain experience (+20 points)
+   - Production MLOps experience (not just research) (+15 points)  
+   - End-to-end ownership mindset evidence (+15 points)
+   - Clean code/reproducible pipeline experience (+10 points)
+   - Model governance/explainability experience (+10 points)
+   - Hybrid/agile working experience (+10 points)
+   - Evidence-based decision making approach (+10 points)
+   - Regulatory/compliance awareness (+10 points)"""
+
+SCORING_CRITERIA = """1. RELEVANT EXPERIENCE MATCH (40% weight)
+   - How well does their experience align with job requirements?
+   - Quality and depth of relevant experience
+   - Career progression and growth
+
+2. REQUIRED SKILLS COVERAGE (30% weight)
+   - Coverage of must-have technical skills
+   - Proficiency level indicators
+   - Skill depth vs breadth
+
+3. NICE-TO-HAVE SKILLS (15% weight)
+   - Additional valuable skills mentioned
+   - Bonus qualifications
+
+4. EDUCATION & CERTIFICATIONS (10% weight)
+   - Relevant educational background
+   - Professional certifications
+   - Continuous learning indicators
+
+5. OVERALL FIT & POTENTIAL (5% weight)
+   - Cultural fit indicators
+   - Growth potential
+   - Communication skills evident in CV
+
+Provide a final score from 0-100 where:
+- 90-100: Exceptional match, top candidate
+- 80-89: Strong match, excellent candidate  
+- 70-79: Good match, solid candidate
+- 60-69: Moderate match, consider with reservations
+- 50-59: Weak match, likely not suitable
+- 0-49: Poor match, not recommended"""
+
+PROFILE_JSON_FORMAT = json_format(
+    PROFILE_FIELDS,
+    summary="A 2-3 sentence professional summary of the candidate's career and expertise",
+    skills=["Every technical and professional skill evidenced in the CV"],
+    experience_highlights=[f"Most significant experience point {i}" for i in range(1, 6)],
+)
+
+JOB_MATCH_JSON_FORMAT = json_format(
+    JOB_MATCH_FIELDS,
+    relevant_years=6.5,
+    must_have_skills=["Candidate skills that directly match the job requirements"],
+    nice_to_have_skills=["Candidate skills that complement the role"],
+)
+
+
+SCORING_SYSTEM_PROMPT = "You are an expert recruiter with deep knowledge of technical roles and candidate evaluation. Provide honest, detailed, and consistent scoring."
+
+BRIEF_SUMMARY_GUIDELINE = "The brief_summary should be 1-2 sentences maximum showing: current role/title, years of experience, match percentage or key alignment with job requirements, and 1-2 standout relevant skills/strengths."
+
+SINGLE_PASS_SCORING_SECTION = f"""
+MATCH SCORING (single pass):
+In the same JSON object, also score the candidate against the job requirements on these criteria:
+
+{SCORING_CRITERIA}
+
+"score" is the final 0-100 match score and "score_reasoning" explains it.
+{BRIEF_SUMMARY_GUIDELINE}
+"""
+
+
+def _analysis_system_prompt(single_pass: bool) -> str:
+    example = SINGLE_PASS_JSON_FORMAT if single_pass else ANALYSIS_JSON_FORMAT
+    scoring_section = SINGLE_PASS_SCORING_SECTION if single_pass else ""
+    return f"""You are an expert HR analyst and recruiter. Analyze the CV in the user message against the job requirements given there and the KSEYE company profile below. Provide detailed insights with separate scoring for job match vs company cultural fit.
+
+{KSEYE_COMPANY_PROFILE}
+
+Please provide a comprehensive analysis in the following JSON format:
+
+{example}
+
+SCORING GUIDELINES:
+{COMPANY_FIT_GUIDELINES}
+
+2. AI Reasoning should:
+   - Provide technical assessment of skills and experience
+   - Evaluate job requirements match
+   - ALWAYS reference the company fit score prominently (e.g., "With a company values fit score of 65%, this candidate shows moderate alignment with KSEYE's culture..." or "The 85% company values fit score reflects strong cultural alignment...")
+   - Explain briefly why the company fit score is high/moderate/low
+   - Highlight specific strengths and potential concerns
+   - Be comprehensive but concise (3-4 sentences)
+
+3. Other fields should focus on technical/job matching aspects, not company culture
+
+ANALYSIS GUIDELINES:
+1. Extract the candidate's full name from the CV (usually at the top)
+2. Focus on relevance to the specific job requirements
+3. Extract years of experience accurately (total career vs relevant to this role)
+4. Identify skills that directly match job requirements as "must_have_skills"
+5. Include complementary skills as "nice_to_have_skills"
+6. Highlight the most impressive and relevant experience points
+7. Company fit score should reflect cultural/working style alignment, NOT technical skills
+8. Be honest and differentiate candidates - don't give everyone the same scores
+9. Ensure all fields are properly filled
+{scoring_section}
+Return only the JSON object, no additional text."""
+
+ANALYSIS_SYSTEM_PROMPT = _analysis_system_prompt(single_pass=False)
+SINGLE_PASS_SYSTEM_PROMPT = _analysis_system_prompt(single_pass=True)
+
+SCORING_INSTRUCTIONS = f"""{SCORING_SYSTEM_PROMPT}
+
+You are evaluating candidates. Analyze the candidate in the user message against the job requirements given there and provide a comprehensive score.
+
+Evaluate the candidate on these criteria and provide a detailed scoring:
+
+{SCORING_CRITERIA}
+
+Return your response in this exact JSON format:
+{SCORE_JSON_FORMAT}
+
+{BRIEF_SUMMARY_GUIDELINE}"""
+
+PROFILE_SYSTEM_PROMPT = f"""You are an expert HR analyst. Build a job-independent profile of the CV in the user message for the KSEYE company profile below. Do not assume any specific role: capture the candidate's full skill inventory and career so they can later be matched against several jobs.
+
+{KSEYE_COMPANY_PROFILE}
+
+Please provide the profile in the following JSON format:
+
+{PROFILE_JSON_FORMAT}
+
+SCORING GUIDELINES:
+{COMPANY_FIT_GUIDELINES}
+
+PROFILE GUIDELINES:
+1. Extract the candidate's full name from the CV (usually at the top)
+2. List every skill the CV evidences in "skills", most prominent first
+3. Extract total career years accurately
+4. Highlight the most impressive experience points, whatever the role
+5. Be honest and differentiate candidates - don't give everyone the same scores
+
+Return only the JSON object, no additional text."""
+
+JOB_MATCH_INSTRUCTIONS = f"""{SCORING_SYSTEM_PROMPT}
+
+You are evaluating candidates. Match the candidate profile in the user message against the job requirements given there and provide a comprehensive score.
+
+Evaluate the candidate on these criteria and provide a detailed scoring:
+
+{SCORING_CRITERIA}
+
+Return your response in this exact JSON format:
+{JOB_MATCH_JSON_FORMAT}
+
+"relevant_years" is the part of the candidate's experience relevant to this role. Split the candidate's skills into "must_have_skills" (directly match the job requirements) and "nice_to_have_skills" (complementary), using only skills from the profile.
+{BRIEF_SUMMARY_GUIDELINE}"""
+
+
+def _job_section(job_title: str, job_description: str) -> str:
+    return f"""JOB CONTEXT:
+Job Title: {job_title or 'Not specified'}
+Job Description: {job_description or 'Not specified'}"""
+
+
+def _messages(system: str, user: str) -> Messages:
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+
+def analysis_messages(cv_text: str, job_context: Dict[str, Any], single_pass: bool = False) -> Messages:
+    """
+    CV analysis messages; single_pass also requests the match score breakdown
+    """
+    job = _job_section(job_context.get('job_title', ''), job_context.get('job_description', ''))
+    return _messages(SINGLE_PASS_SYSTEM_PROMPT if single_pass else ANALYSIS_SYSTEM_PROMPT,
+                     f"{job}\n\nCV TEXT:\n{cv_text}")
+
+
+def _candidate_section(candidate: "CVAnalysis", label: str = "Key Skills", relevant: bool = True) -> str:
+    lines = [
+        f"Candidate: {candidate.candidate_name}",
+        f"Current Title: {candidate.current_title}",
+        f"Total Experience: {candidate.total_years} years",
+    ]
+    if relevant:
+        lines.append(f"Relevant Experience: {candidate.relevant_years} years")
+    lines += [
+        f"Summary: {candidate.summary}",
+        f"{label}: {', '.join(candidate.must_have_skills + candidate.nice_to_have_skills)}",
+        f"Experience Highlights: {', '.join(candidate.experience_highlights)}",
+        f"Strengths: {', '.join(candidate.strengths)}",
+    ]
+    return "CANDIDATE PROFILE:\n" + "\n".join(lines)
+
+
+def scoring_messages(candidate: "CVAnalysis", job_title: str, job_description: str) -> Messages:
+    """
+    Second-pass scoring messages for an existing CVAnalysis
+    """
+    return _messages(SCORING_INSTRUCTIONS,
+                     f"{_job_section(job_title, job_description)}\n\n{_candidate_section(candidate)}")
+
+
+def profile_messages(cv_text: str) -> Messages:
+    """
+    Job-independent profile messages: everything about a CV that does not depend on
+    the role, so it can be shared across several jobs
+    """
+    return _messages(PROFILE_SYSTEM_PROMPT, f"CV TEXT:\n{cv_text}")
+
+
+def job_match_messages(profile: "CVAnalysis", job_title: str, job_description: str) -> Messages:
+    """
+    Per-job messages for a profiled candidate: score the match and fill the job-specific
+    fields (relevant years, matching and complementary skills)
+    """
+    return _messages(JOB_MATCH_INSTRUCTIONS,
+                     f"{_job_section(job_title, job_description)}\n\n"
+                     f"{_candidate_section(profile, label='Skills', relevant=False)}")
+
+
+def prompt_chars(messages: Messages) -> int:
+    return sum(len(m["content"]) for m in messages)
+
+
+def object_schema(properties: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "object", "properties": dict(properties), "required": list(properties), "additionalProperties": False}
+
+
+RESPONSE_SCHEMAS = {
+    "analysis": object_schema(ANALYSIS_FIELDS),
+    "single_pass": object_schema(SINGLE_PASS_FIELDS),
+    "score": object_schema(SCORE_FIELDS),
+    "profile": object_schema(PROFILE_FIELDS),
+    "job_match": object_schema(JOB_MATCH_FIELDS),
+}
+
+
+def response_format(kind: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Structured-output response_format for a response kind, optionally limited to
+    some of its fields (targeted repairs)
+    """
+    schema = RESPONSE_SCHEMAS[kind]
+    name = f"cv_{kind}"
+    if fields is not None:
+        schema = object_schema({field: schema["properties"][field] for field in fields})
+        name = f"cv_{kind}_repair"
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+def repair_messages(messages: Messages, content: str, problems: Dict[str, str]) -> Messages:
+    """
+    The original conversation plus the flawed reply and a request to resend only the
+    broken fields; the shared prefix keeps the repair call cheap
+    """
+    issues = "\n".join(f"- {field}: {problem}" for field, problem in problems.items())
+    return messages + [
+        {"role": "assistant", "content": content},
+        {"role": "user", "content": f"""Some fields of your JSON response are missing or invalid:
+{issues}
+
+Return a JSON object containing only these fields, with corrected values. Do not repeat the other fields."""},
+    ]
@@ -0,0 +1,274 @@
+"""
+Adzuna market-rate lookups
+get_market_rate() serves results from a TTL cache (in-process, plus an optional
+JSON file on disk) keyed by normalised job title and city. Entries past their TTL
+are still returned immediately while a background thread refreshes them, so the
+market panel renders instantly on Streamlit reruns and each query costs one API
+call per TTL period. Queries with no salary data are remembered for a shorter TTL
+and failed requests for a minute, and concurrent misses on one query share a
+single fetch.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+DEFAULT_CACHE_PATH = ".cache/market_rates.json"
+DEFAULT_TTL_HOURS = 24
+# Entries older than this are refetched synchronously instead of served stale
+DEFAULT_MAX_STALE_DAYS = 7
+# "No salary data" answers may change sooner than real results; errors are retried soon
+DEFAULT_EMPTY_TTL_HOURS = 1
+DEFAULT_ERROR_TTL_SECONDS = 60
+
+MarketRate = Tuple[Optional[Dict[str, Any]], Optional[str]]
+
+
+def fetch_market_rate(job_title, location):
+    """Fetch market rate data from Adzuna API with detailed debugging (uncached)"""
+    result, error, _ = _fetch_market_rate(job_title, location)
+    return result, error
+
+
+def _fetch_market_rate(job_title, location) -> Tuple[Optional[Dict[str, Any]], Optional[str], bool]:
+    """fetch_market_rate() plus whether a failure is transient (worth retrying soon)"""
+    try:
+        app_id = os.getenv("ADZUNA_APP_ID", "").strip()
+        app_key = os.getenv("ADZUNA_APP_KEY", "").strip()
+        
+        # Debug: Check credentials without exposing them
+        print(f"🔐 Adzuna Debug - Credentials configured: {bool(app_id and app_key and app_id != 'your_adzuna_app_id_here')}")
+        
+        if not app_id or not app_key or app_id == "your_adzuna_app_id_here":
+            print("❌ Adzuna Debug - Credentials not configured properly")
+            return None, "Adzuna API credentials not configured. Please check your .env file.", True
+        
+        # Clean location for API (extract city name only)
+        location_clean = location.split(",")[0].strip().lower() if location else "london"
+        location_clean = location_clean.replace(" ", "%20")  # URL encode spaces
+        
+        print(f"🌍 Adzuna Debug - Original location: '{location}' -> Cleaned: '{location_clean}'")
+        print(f"💼 Adzuna Debug - Job title: '{job_title}'")
+        
+        # Adzuna API endpoint
+        url = f"https://api.adzuna.com/v1/api/jobs/gb/search/1"
+        params = {
+            "app_id": app_id,
+            "app_key": app_key,
+            "results_per_page": 50,  # Get more results for better average
+            "what": job_title,
+            "where": location_clean,
+            # Remove salary sorting to get representative sample
+            # "sort_by": "salary"  # Removed to avoid high-end bias
+            "what_exclude": "director,vice president,vp,chief,head of,ceo,cto,cmo,senior director",  # Exclude executive roles
+            "salary_min": 25000,  # Set reasonable salary bounds
+            "salary_max": 150000
+        }
+        
+        print(f"🔗 Adzuna Debug - API URL: {url}")
+        print(f"📊 Adzuna Debug - Parameters: {params}")
+        
+        response = requests.get(url, params=params, timeout=10)
+        print(f"📡 Adzuna Debug - Response status: {response.status_code}")
+        
+        response.raise_for_status()
+        
+        data = response.json()
+        jobs = data.get("results", [])
+        total_jobs = data.get("count", 0)
+        
+        print(f"📈 Adzuna Debug - Total jobs found: {total_jobs}, Jobs with salary data: {len(jobs)}")
+        
+        if not jobs:
+            print("❌ Adzuna Debug - No jobs returned from API")
+            return None, f"No salary data found for '{job_title}' in '{location}'", False
+        
+        # Extract salary information with debugging
+        salaries = []
+        salary_count = 0
+        for i, job in enumerate(jobs):
+            if job.get("salary_min") and job.get("salary_max"):
+                avg_salary = (job["salary_min"] + job["salary_max"]) / 2
+                salaries.append(avg_salary)
+                salary_count += 1
+                if i < 3:  # Debug first 3 jobs
+                    print(f"💰 Adzuna Debug - Job {i+1}: {job.get('title', 'N/A')} - £{job.get('salary_min', 0):,} to £{job.get('salary_max', 0):,} (avg: £{avg_salary:,.0f})")
+        
+        print(f"💵 Adzuna Debug - Jobs with salary data: {salary_count}/{len(jobs)}")
+        
+        if not salaries:
+            print("❌ Adzuna Debug - No salary information in job results")
+            return None, f"No salary information available for '{job_title}' in '{location}'", False
+        
+        # Calculate statistics
+        min_salary = min(salaries)
+        max_salary = max(salaries)
+        avg_salary = sum(salaries) / len(salaries)
+        
+        result = {
+            "min": min_salary,
+            "max": max_salary, 
+            "average": avg_salary,
+            "count": len(salaries)
+        }
+        
+        print(f"✅ Adzuna Debug - Final result: Min £{min_salary:,.0f}, Max £{max_salary:,.0f}, Avg £{avg_salary:,.0f}, Count: {len(salaries)}")
+        
+        return result, None, False
+        
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Adzuna Debug - Request error: {str(e)}")
+        return None, f"API request failed: {str(e)}", True
+    except Exception as e:
+        print(f"❌ Adzuna Debug - Unexpected error: {str(e)}")
+        return None, f"Error fetching market rate: {str(e)}", True
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def normalize_query(job_title: str, location: str) -> str:
+    """Cache key: lower-cased, whitespace-collapsed title and city (first part of location)"""
+    title = " ".join((job_title or "").lower().split())
+    city = " ".join((location or "").split(",")[0].lower().split()) or "london"
+    return f"{title}|{city}"
+
+
+class MarketRateCache:
+    """
+    TTL cache of market-rate results with stale-while-revalidate. Empty answers are
+    cached for empty_ttl_hours and errors (in memory only) for error_ttl_seconds; both
+    are refetched once expired rather than served stale.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH, ttl_hours: float = DEFAULT_TTL_HOURS,
+                 max_stale_days: float = DEFAULT_MAX_STALE_DAYS, empty_ttl_hours: float = DEFAULT_EMPTY_TTL_HOURS,
+                 error_ttl_seconds: float = DEFAULT_ERROR_TTL_SECONDS):
+        self.path = Path(path) if path else None
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_stale_seconds = max_stale_days * 86400
+        self.empty_ttl_seconds = empty_ttl_hours * 3600
+        self.error_ttl_seconds = error_ttl_seconds
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._refreshing: set = set()
+        # One lock per query so concurrent misses wait for a single synchronous fetch
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            self._entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logging.error(f"Market rate cache unreadable, starting empty: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            persistent = {key: entry for key, entry in self._entries.items() if not entry.get("transient")}
+            tmp.write_text(json.dumps(persistent), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logging.error(f"Could not write market rate cache: {e}")
+
+    def _store(self, key: str, result: Optional[Dict[str, Any]], error: Optional[str] = None,
+               transient: bool = False):
+        entry: Dict[str, Any] = {"result": result, "fetched_at": time.time()}
+        if not result:
+            entry.update(error=error, ttl=self.error_ttl_seconds if transient else self.empty_ttl_seconds,
+                         transient=transient)
+        with self._lock:
+            self._entries[key] = entry
+            self._save()
+
+    def _refresh(self, key: str, job_title: str, location: str):
+        try:
+            result, _, _ = _fetch_market_rate(job_title, location)
+            if result:
+                self._store(key, result)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _cached(self, key: str, job_title: str, location: str) -> Optional[MarketRate]:
+        """Servable cached answer for key (starting a background refresh if stale), else None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            age = time.time() - entry["fetched_at"]
+            if not entry["result"]:
+                if age > entry.get("ttl", 0):
+                    return None
+                print(f"💾 Market rate cache hit for '{key}' (no data)")
+                return None, entry.get("error")
+            stale = age > self.ttl_seconds
+            if stale and age <= self.max_stale_seconds and key not in self._refreshing:
+                self._refreshing.add(key)
+                print(f"♻️  Market rate for '{key}' is stale, refreshing in background")
+                threading.Thread(target=self._refresh, args=(key, job_title, location), daemon=True).start()
+        if stale and age > self.max_stale_seconds:
+            return None
+        print(f"💾 Market rate cache hit for '{key}'")
+        return entry["result"], None
+
+    def get(self, job_title: str, location: str) -> MarketRate:
+        """Fresh or stale cached result if available, else a synchronous fetch"""
+        key = normalize_query(job_title, location)
+        cached = self._cached(key, job_title, location)
+        if cached is not None:
+            return cached
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+        with fetch_lock:
+            # Another session may have fetched this query while we waited
+            cached = self._cached(key, job_title, location)
+            if cached is not None:
+                return cached
+            result, error, transient = _fetch_market_rate(job_title, location)
+            self._store(key, result, error, transient)
+        return result, error
+
+    def clear(self):
+        """Remove every cached entry (and the on-disk file)"""
+        with self._lock:
+            self._entries = {}
+            self._save()
+
+
+_cache: Optional[MarketRateCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_market_rate_cache() -> MarketRateCache:
+    """Shared cache configured from ADZUNA_CACHE_* env vars (ADZUNA_CACHE_PATH="" keeps it in memory)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MarketRateCache(
+                path=os.getenv("ADZUNA_CACHE_PATH", DEFAULT_CACHE_PATH).strip() or None,
+                ttl_hours=_env_float("ADZUNA_CACHE_TTL_HOURS", DEFAULT_TTL_HOURS),
+                max_stale_days=_env_float("ADZUNA_CACHE_MAX_STALE_DAYS", DEFAULT_MAX_STALE_DAYS),
+                empty_ttl_hours=_env_float("ADZUNA_CACHE_EMPTY_TTL_HOURS", DEFAULT_EMPTY_TTL_HOURS),
+                error_ttl_seconds=_env_float("ADZUNA_CACHE_ERROR_TTL_SECONDS", DEFAULT_ERROR_TTL_SECONDS),
+            )
+    return _cache
+
+
+def get_market_rate(job_title: str, location: str) -> MarketRate:
+    """Market rate (min/max/average/count) for a title and location, served from cache when possible"""
+    return get_market_rate_cache().get(job_title, location)
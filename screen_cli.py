@@ -0,0 +1,260 @@
+"""
+Headless CV screening
+Runs the same extraction, analysis and scoring pipeline as the Streamlit app from
+the command line (cron, job queues) and writes ranked results as JSONL, CSV or Parquet,
+optionally with run metrics in Prometheus text format.
+
+Usage:
+    python screen_cli.py --job-title "Data Scientist" --job-description job.txt \
+        --cvs ./cvs_or_archive.zip --output ranked.csv --workers 16
+    python screen_cli.py --jobs jobs.json --cvs ./cvs --output ranked.csv   # one ranking per job
+"""
+import argparse
+import csv
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from cv_analyzer import OPENAI_MODEL, CVAnalysis, to_dict
+from cv_pipeline import (
+    PipelineResult, analyze_documents_concurrently, get_max_workers, get_scoring_workers, score_candidates,
+    screen_multiple_jobs,
+)
+from parsing.extractor import UploadBatch, collect_local_files, count_uploaded_documents, iter_files_from_uploader
+from utils.metrics import RunMetrics, span, use_metrics
+from utils.prerank import get_prerank_settings
+from utils.embeddings import index_candidates, rank_pool
+
+load_dotenv()
+
+OUTPUT_FORMATS = ("jsonl", "csv", "parquet")
+
+
+def result_records(scored: List[Tuple[float, CVAnalysis]]) -> List[Dict[str, Any]]:
+    """One flat record per ranked candidate"""
+    records = []
+    for rank, (score, candidate) in enumerate(scored, start=1):
+        record = {"rank": rank, "score": round(score, 1)}
+        record.update(to_dict(candidate))
+        record["brief_summary"] = getattr(candidate, "brief_summary", "")
+        for key, value in (getattr(candidate, "score_breakdown", None) or {}).items():
+            record[f"score_{key}"] = value
+        records.append(record)
+    return records
+
+
+def write_results(records: List[Dict[str, Any]], output: Path, fmt: str):
+    """Write records as JSONL, CSV (lists joined with "; ") or Parquet (needs pandas + pyarrow)"""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "jsonl":
+        with open(output, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    elif fmt == "csv":
+        fieldnames = list(dict.fromkeys(key for record in records for key in record))
+        with open(output, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for record in records:
+                writer.writerow({k: "; ".join(map(str, v)) if isinstance(v, list) else v for k, v in record.items()})
+    else:
+        import pandas as pd
+        pd.DataFrame(records).to_parquet(output, index=False)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Screen a directory or ZIP of CVs against a job description")
+    parser.add_argument("--job-title")
+    parser.add_argument("--job-description", type=Path, help="Text file with the job description")
+    parser.add_argument("--jobs", type=Path, default=None,
+                        help="JSON list of {\"job_title\", \"job_description\"} to rank the same CVs for several jobs "
+                             "(each CV is profiled once; writes one output per job)")
+    parser.add_argument("--cvs", type=Path, help="Directory of CVs (searched recursively) or a ZIP/CV file")
+    parser.add_argument("--output", type=Path, help="Output file (.jsonl, .csv or .parquet)")
+    parser.add_argument("--rank-pool", type=int, default=0, metavar="K",
+                        help="Instead of screening, print the K best previously indexed candidates for this job (no LLM calls)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, help="Output format (default: from the output extension)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"Concurrent analysis requests (default: CV_ANALYSIS_MAX_WORKERS or {get_max_workers()})")
+    parser.add_argument("--scoring-workers", type=int, default=None,
+                        help=f"Concurrent scoring requests, overlapping analysis (default: CV_SCORING_MAX_WORKERS "
+                             f"or {get_scoring_workers()})")
+    parser.add_argument("--extract-workers", type=int, default=None, help="Extraction processes (default: CV_EXTRACT_WORKERS)")
+    parser.add_argument("--single-pass", action="store_true", help="Analyse and score each CV in one call")
+    parser.add_argument("--batch", action="store_true", help="Use the OpenAI Batch API (cheaper, completes within 24h)")
+    parser.add_argument("--batch-timeout", type=float, default=None, help="Give up waiting for a batch after this many seconds")
+    default_top_n, default_min_score = get_prerank_settings()
+    parser.add_argument("--prerank-top-n", type=int, default=default_top_n,
+                        help="Only send the N most keyword-relevant CVs to the LLM (0 = all; CV_PRERANK_TOP_N)")
+    parser.add_argument("--prerank-min-score", type=float, default=default_min_score,
+                        help="Only send CVs with at least this relevance relative to the best CV, 0-1 (CV_PRERANK_MIN_SCORE)")
+    parser.add_argument("--metrics", type=Path, default=None, help="Also write run metrics in Prometheus text format here")
+    args = parser.parse_args(argv)
+    if args.jobs is None and (not args.job_title or args.job_description is None):
+        parser.error("--job-title and --job-description are required unless --jobs is given")
+    if args.jobs is not None and args.rank_pool:
+        parser.error("--rank-pool takes a single --job-title/--job-description")
+    if not args.rank_pool and (args.cvs is None or args.output is None):
+        parser.error("--cvs and --output are required unless --rank-pool is given")
+    return args
+
+
+def load_jobs(path: Path) -> List[Dict[str, str]]:
+    """Jobs from a JSON list of {"job_title", "job_description"} objects"""
+    jobs = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(jobs, list) or not jobs or not all(
+            isinstance(job, dict) and str(job.get("job_title", "")).strip() and str(job.get("job_description", "")).strip()
+            for job in jobs):
+        raise ValueError(f"{path} must be a non-empty JSON list of objects with job_title and job_description")
+    return [{"job_title": job["job_title"].strip(), "job_description": job["job_description"].strip()} for job in jobs]
+
+
+def job_output_path(output: Path, job_title: str) -> Path:
+    """Per-job output file: ranked.csv -> ranked_data-scientist.csv"""
+    slug = re.sub(r"[^a-z0-9]+", "-", job_title.lower()).strip("-") or "job"
+    return output.with_name(f"{output.stem}_{slug}{output.suffix}")
+
+
+def print_pool_ranking(job_title: str, job_description: str, k: int):
+    matches = rank_pool(job_title, job_description, k=k)
+    if not matches:
+        print("No candidates indexed yet - screen some CVs first")
+        return
+    for rank, match in enumerate(matches, start=1):
+        print(f"{rank:>4}. {match['similarity']:.3f}  {match['candidate_name']} - {match['current_title']} ({match['source_file']})")
+
+
+def print_run_report(metrics: RunMetrics, pipeline_result: PipelineResult, metrics_path: Optional[Path] = None):
+    """Stage timings, token usage and per-file errors of a finished run"""
+    summary = metrics.summary()
+    print("⏱️  Stage timings (extract is worker CPU time and overlaps the pipeline; llm_* include retries):")
+    print(f"   {'stage':<18}{'count':>7}{'total s':>10}{'mean ms':>10}{'max ms':>10}")
+    for row in summary["stages"]:
+        print(f"   {row['stage']:<18}{row['count']:>7}{row['total_s']:>10.2f}{row['mean_ms']:>10.1f}{row['max_ms']:>10.1f}")
+    docs_per_sec = len(pipeline_result.filenames) / summary["wall_seconds"] if summary["wall_seconds"] else 0.0
+    print(f"   total {summary['wall_seconds']:.2f}s -> {docs_per_sec:.2f} docs/sec")
+    cost = summary["estimated_cost_usd"]
+    print(f"🔢 {summary['llm_calls']} LLM call(s), {summary['prompt_tokens']:,} prompt "
+          f"({summary['cached_tokens']:,} cached) + "
+          f"{summary['completion_tokens']:,} completion tokens" + (f" (~${cost:.4f})" if cost is not None else ""))
+    if pipeline_result.llm_calls_avoided:
+        print(f"💸 Pre-ranking avoided {pipeline_result.llm_calls_avoided} LLM call(s)")
+    if pipeline_result.tokens_saved:
+        print(f"✂️  Compaction saved ~{pipeline_result.tokens_saved} prompt tokens")
+    for filename, error in pipeline_result.errors:
+        print(f"⚠️  {filename}: {error}")
+    if metrics_path:
+        metrics_path.write_text(metrics.to_prometheus(), encoding="utf-8")
+        print(f"📈 Metrics written to {metrics_path}")
+
+
+def screen_jobs(args: argparse.Namespace, jobs: List[Dict[str, str]], fmt: str) -> int:
+    """Multi-job run: profile each CV once, then write one ranking per job"""
+    metrics = RunMetrics(model=OPENAI_MODEL)
+    with use_metrics(metrics):
+        uploads = UploadBatch(collect_local_files(args.cvs))
+        total_docs = count_uploaded_documents(uploads)
+        docs = iter_files_from_uploader(uploads, max_workers=args.extract_workers)
+
+        def on_progress(done, total, filename):
+            print(f"   [{done}/{total}] {filename}")
+
+        with span("pipeline"):
+            pipeline_result, rankings = screen_multiple_jobs(docs, jobs, max_workers=args.workers,
+                                                             progress_callback=on_progress, total=total_docs)
+        if not pipeline_result.filenames:
+            print("❌ No CVs found", file=sys.stderr)
+            return 1
+        with span("write"):
+            for job in jobs:
+                output = job_output_path(args.output, job["job_title"])
+                write_results(result_records(rankings[job["job_title"]]), output, fmt)
+                print(f"📄 Wrote {len(rankings[job['job_title']])} ranked candidate(s) for {job['job_title']} to {output}")
+        with span("index"):
+            index_candidates(pipeline_result.content_hashes, pipeline_result.analyses)
+
+    print(f"\n🧩 {len(pipeline_result.completed)} CV(s) profiled once and matched to {len(jobs)} job(s)")
+    print_run_report(metrics, pipeline_result, args.metrics)
+    return 0
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.rank_pool:
+        print_pool_ranking(args.job_title.strip(), args.job_description.read_text(encoding="utf-8").strip(), args.rank_pool)
+        return 0
+    if args.batch and (args.prerank_top_n or args.prerank_min_score):
+        print("❌ Pre-ranking is not supported with --batch", file=sys.stderr)
+        return 2
+    if args.jobs is not None and (args.batch or args.single_pass or args.prerank_top_n or args.prerank_min_score):
+        print("❌ --jobs does not combine with --batch, --single-pass or pre-ranking", file=sys.stderr)
+        return 2
+    fmt = args.format or args.output.suffix.lower().lstrip(".")
+    if fmt not in OUTPUT_FORMATS:
+        print(f"❌ Unknown output format '{fmt}', use --format {{{','.join(OUTPUT_FORMATS)}}}", file=sys.stderr)
+        return 2
+    if not args.cvs.exists():
+        print(f"❌ CV path not found: {args.cvs}", file=sys.stderr)
+        return 2
+
+    if args.jobs is not None:
+        try:
+            jobs = load_jobs(args.jobs)
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 2
+        return screen_jobs(args, jobs, fmt)
+
+    job_title = args.job_title.strip()
+    job_description = args.job_description.read_text(encoding="utf-8").strip()
+    job_context = {
+        "job_title": job_title,
+        "job_description": job_description,
+        "analysis_instructions": "Analyze each CV against this job and provide detailed insights",
+    }
+
+    metrics = RunMetrics(model=OPENAI_MODEL)
+    with use_metrics(metrics):
+        uploads = UploadBatch(collect_local_files(args.cvs))
+        total_docs = count_uploaded_documents(uploads)
+        docs = iter_files_from_uploader(uploads, max_workers=args.extract_workers)
+
+        with span("pipeline"):
+            if args.batch:
+                from batch_mode import run_batch_screening
+                # Batch mode needs every prompt up front, so extraction completes first
+                pipeline_result = run_batch_screening(list(docs), job_context, single_pass=args.single_pass,
+                                                      timeout=args.batch_timeout)
+            else:
+                def on_progress(done, total, filename):
+                    print(f"   [{done}/{total}] {filename}")
+
+                # Scoring starts as each analysis finishes
+                pipeline_result = analyze_documents_concurrently(
+                    docs, job_context, max_workers=args.workers, progress_callback=on_progress,
+                    single_pass=args.single_pass, total=total_docs,
+                    prerank_top_n=args.prerank_top_n, prerank_min_score=args.prerank_min_score,
+                    score_job=(job_title, job_description), scoring_workers=args.scoring_workers,
+                )
+        if not pipeline_result.filenames:
+            print("❌ No CVs found", file=sys.stderr)
+            return 1
+
+        with span("scoring"):
+            scored = score_candidates(pipeline_result, job_title, job_description, max_workers=args.workers)
+        with span("write"):
+            write_results(result_records(scored), args.output, fmt)
+        with span("index"):
+            index_candidates(pipeline_result.content_hashes, pipeline_result.analyses)
+
+    print(f"\n📄 Wrote {len(scored)} ranked candidate(s) to {args.output}")
+    print_run_report(metrics, pipeline_result, args.metrics)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
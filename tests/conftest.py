@@ -0,0 +1,95 @@
+"""
+Shared fixtures: a local OpenAI stub (utils.openai_stub) for the whole session and,
+per test, an environment pointing the client at it with caching, retries and rate
+limiting out of the way.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openai_client  # noqa: E402
+import cv_analyzer  # noqa: E402
+from utils.analysis_cache import AnalysisCache  # noqa: E402
+from utils.metrics import RunMetrics, use_metrics  # noqa: E402
+from utils.openai_stub import start_stub_server  # noqa: E402
+
+SAMPLE_CV = """Jane Example
+Senior Data Scientist
+jane@example.com
+
+EXPERIENCE
+Senior Data Scientist, Lender Ltd
+Jan 2019 - Present
+Built credit risk scorecards in Python and SQL with scikit-learn and XGBoost.
+
+Data Analyst, Shop plc
+Mar 2015 - Dec 2018
+Reporting in Excel and Tableau.
+
+EDUCATION
+MSc Statistics, University of Somewhere
+2013 - 2014
+"""
+
+
+@pytest.fixture(scope="session")
+def stub_server():
+    server, base_url = start_stub_server(latency=0.0, seed=1)
+    server.base_url = base_url
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def openai_stub(stub_server, monkeypatch):
+    """The stub server, with the client configured to use it for this test"""
+    monkeypatch.setenv("OPENAI_BASE_URL", stub_server.base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    monkeypatch.setenv("OPENAI_MAX_RETRIES", "0")
+    monkeypatch.setenv("OPENAI_RPM_LIMIT", "0")
+    monkeypatch.setenv("OPENAI_TPM_LIMIT", "0")
+    monkeypatch.setenv("CV_CACHE_DISABLED", "1")
+    monkeypatch.setattr(openai_client, "_limiter", None)
+    stub_server.malformed_rate = 0.0
+    stub_server.failure_rate = 0.0
+    yield stub_server
+    stub_server.malformed_rate = 0.0
+    stub_server.failure_rate = 0.0
+
+
+@pytest.fixture
+def no_api_key(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("CV_CACHE_DISABLED", "1")
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """A fresh on-disk analysis cache used by cv_analyzer for this test"""
+    analysis_cache = AnalysisCache(path=str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(cv_analyzer, "get_cache", lambda: analysis_cache)
+    return analysis_cache
+
+
+@pytest.fixture
+def metrics():
+    run_metrics = RunMetrics(model="test")
+    with use_metrics(run_metrics):
+        yield run_metrics
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    """Records the stage of every chat completion cv_analyzer makes"""
+    stages = []
+    real_chat_completion = cv_analyzer.chat_completion
+
+    def recording_chat_completion(*args, stage="llm", **kwargs):
+        stages.append(stage)
+        return real_chat_completion(*args, stage=stage, **kwargs)
+
+    monkeypatch.setattr(cv_analyzer, "chat_completion", recording_chat_completion)
+    return stages
@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from salary import adzuna  # noqa: E402
+from salary.adzuna import MarketRateCache  # noqa: E402
+
+RATE = {"min": 40000.0, "max": 60000.0, "average": 50000.0, "count": 12}
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    """Queue of (result, error, transient) answers for the fake Adzuna fetch; records each call"""
+    calls, answers = [], []
+
+    def fake_fetch(job_title, location):
+        calls.append((job_title, location))
+        time.sleep(0.05)
+        return answers.pop(0) if answers else (RATE, None, False)
+
+    monkeypatch.setattr(adzuna, "_fetch_market_rate", fake_fetch)
+    return calls, answers
+
+
+def test_empty_results_are_cached_for_the_empty_ttl(fetches):
+    calls, answers = fetches
+    answers.append((None, "No salary data found", False))
+    cache = MarketRateCache(path=None, empty_ttl_hours=0.2 / 3600)
+
+    assert cache.get("Data Scientist", "London") == (None, "No salary data found")
+    assert cache.get("data scientist", "london, UK") == (None, "No salary data found")
+    assert len(calls) == 1
+
+    time.sleep(0.25)
+    assert cache.get("Data Scientist", "London") == (RATE, None)
+    assert len(calls) == 2
+
+
+def test_errors_are_cached_briefly_and_not_saved(fetches, tmp_path):
+    calls, answers = fetches
+    answers.append((None, "API request failed: timeout", True))
+    path = tmp_path / "rates.json"
+    cache = MarketRateCache(path=str(path), error_ttl_seconds=0.2)
+
+    assert cache.get("Data Scientist", "London") == (None, "API request failed: timeout")
+    assert cache.get("Data Scientist", "London")[0] is None
+    assert len(calls) == 1
+    assert MarketRateCache(path=str(path))._entries == {}
+
+    time.sleep(0.25)
+    assert cache.get("Data Scientist", "London") == (RATE, None)
+    assert len(calls) == 2
+
+
+def test_concurrent_misses_share_one_fetch(fetches):
+    calls, _ = fetches
+    cache = MarketRateCache(path=None)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("Data Scientist", "London")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [(RATE, None)] * 8
+    assert len(calls) == 1
@@ -0,0 +1,130 @@
+import json
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+import cv_analyzer
+from cv_analyzer import (
+    CVAnalysis, analyze_cv_with_openai, analysis_request, complete_structured, score_candidate_with_ai,
+    _profile_for_job,
+)
+
+from conftest import SAMPLE_CV
+
+JOB = {"job_title": "Data Scientist", "job_description": "Python, SQL and credit risk modelling"}
+
+
+def _reply(data):
+    content = data if isinstance(data, str) else json.dumps(data)
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+def _candidate(**overrides):
+    values = dict(source_file="cv.txt", candidate_name="Jane", current_title="Data Scientist", total_years=6.0,
+                  relevant_years=4.0, summary="", must_have_skills=["Python"], nice_to_have_skills=[],
+                  experience_highlights=[], strengths=[], confidence_notes="", company_fit_score=50,
+                  company_fit_analysis="", ai_reasoning="")
+    values.update(overrides)
+    return CVAnalysis(**values)
+
+
+def test_cache_miss_then_hit(openai_stub, cache, llm_calls, metrics):
+    first = analyze_cv_with_openai(SAMPLE_CV, "cv.txt", JOB)
+    second = analyze_cv_with_openai(SAMPLE_CV, "cv.txt", JOB)
+
+    assert llm_calls == ["analyze"]
+    assert second == first
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+    assert metrics.events() == {"cache_hit": 1, "cache_miss": 1}
+
+
+def test_cache_key_covers_the_job(openai_stub, cache, llm_calls):
+    analyze_cv_with_openai(SAMPLE_CV, "cv.txt", JOB)
+    analyze_cv_with_openai(SAMPLE_CV, "cv.txt", dict(JOB, job_description="Spark and Airflow"))
+
+    assert llm_calls == ["analyze", "analyze"]
+
+
+def test_cached_score_is_reused(openai_stub, cache, llm_calls):
+    candidate = _candidate()
+    first = score_candidate_with_ai(candidate, "Data Scientist", "Python")
+    assert score_candidate_with_ai(candidate, "Data Scientist", "Python") == first
+    assert llm_calls == ["score"]
+
+
+def test_cache_errors_do_not_discard_replies(openai_stub, cache, monkeypatch, llm_calls):
+    def locked(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(cache, "set", locked)
+    result = analyze_cv_with_openai(SAMPLE_CV, "cv.txt", JOB)
+    assert result.summary.startswith("Stub analysis")
+
+    monkeypatch.setattr(cache, "get", locked)
+    result = analyze_cv_with_openai(SAMPLE_CV, "cv.txt", JOB)
+    assert result.summary.startswith("Stub analysis")
+    assert llm_calls == ["analyze", "analyze"]
+
+
+def test_malformed_reply_is_repaired(openai_stub, metrics, llm_calls):
+    openai_stub.malformed_rate = 1.0
+    data = complete_structured(analysis_request(SAMPLE_CV, JOB), "analysis", stage="analyze")
+
+    assert llm_calls == ["analyze", "analyze_repair"]
+    assert data["candidate_name"].startswith("Stub Candidate")
+    assert isinstance(data["total_years"], float)
+    assert metrics.events() == {"analysis_invalid": 1, "analysis_repaired": 1}
+
+
+def test_only_broken_fields_are_requested_again(monkeypatch):
+    requests = []
+    replies = iter([
+        _reply({"score": "high", "reasoning": "Good", "brief_summary": "DS", "experience_match": 80,
+                "skills_coverage": 70, "nice_to_have": 60, "education": 50, "overall_fit": 75}),
+        _reply({"score": 82}),
+    ])
+
+    def fake_chat_completion(stage, **request):
+        requests.append(request)
+        return next(replies)
+
+    monkeypatch.setattr(cv_analyzer, "chat_completion", fake_chat_completion)
+    request = cv_analyzer.scoring_request(_candidate(), "Data Scientist", "Python")
+    data = complete_structured(request, "score", stage="score")
+
+    assert data["score"] == 82 and data["reasoning"] == "Good"
+    repair_schema = requests[1]["response_format"]["json_schema"]["schema"]
+    assert list(repair_schema["properties"]) == ["score"]
+
+
+def test_unrepairable_score_raises(monkeypatch):
+    monkeypatch.setattr(cv_analyzer, "chat_completion", lambda stage, **request: _reply("not json"))
+    request = cv_analyzer.scoring_request(_candidate(), "Data Scientist", "Python")
+    with pytest.raises(ValueError):
+        complete_structured(request, "score", stage="score")
+
+
+def test_partial_reply_is_used_but_not_cached(openai_stub, cache, monkeypatch, metrics):
+    data = {
+        "candidate_name": "Jane Example", "current_title": "Data Scientist", "total_years": 9.0,
+        "relevant_years": 5.0, "must_have_skills": ["Python"], "nice_to_have_skills": [],
+        "experience_highlights": [], "strengths": [], "confidence_notes": "", "company_fit_score": 70,
+        "company_fit_analysis": "", "ai_reasoning": "",
+    }
+    # "summary" is missing from the reply and from the repair
+    monkeypatch.setattr(cv_analyzer, "chat_completion", lambda stage, **request: _reply(data if stage == "analyze" else {}))
+    result = analyze_cv_with_openai(SAMPLE_CV, "cv.txt", JOB)
+
+    assert result.candidate_name == "Jane Example"
+    assert result.summary == "No summary available"
+    assert cache.stats()["entries"] == 0
+    assert metrics.events()["analysis_not_cached"] == 1
+
+
+def test_offline_job_split_uses_the_taxonomy(no_api_key):
+    profile = _candidate(must_have_skills=["R", "Go", "Java", "python"], nice_to_have_skills=["C"])
+    candidate = _profile_for_job(profile, "JavaScript developer who can go to the office; Python a plus.")
+
+    assert candidate.must_have_skills == ["Python"]
+    assert candidate.nice_to_have_skills == ["R", "Go", "Java", "C"]
@@ -0,0 +1,49 @@
+import io
+import zipfile
+
+from parsing.extractor import LocalFile, UploadBatch, count_uploaded_documents, iter_files_from_uploader, read_text
+
+
+class Upload(io.BytesIO):
+    """Minimal stand-in for Streamlit's UploadedFile"""
+
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as z:
+        for name, text in members.items():
+            z.writestr(name, text)
+    return buffer.getvalue()
+
+
+def test_unreadable_zip_is_reported_and_the_batch_continues(capsys):
+    uploads = UploadBatch([
+        Upload("broken.zip", b"PK\x03\x04 not really a zip"),
+        Upload("cvs.zip", _zip({"a.txt": "Alice", "b.txt": "Bob", "notes.csv": "x"})),
+        Upload("c.txt", b"Carol"),
+    ])
+
+    assert count_uploaded_documents(uploads) == 4
+    assert list(iter_files_from_uploader(uploads, max_workers=1)) == [("a.txt", "Alice"), ("b.txt", "Bob"),
+                                                                       ("c.txt", "Carol")]
+    assert "Extraction failed: broken.zip -> BadZipFile" in capsys.readouterr().out
+
+
+def test_damaged_zip_member_is_skipped(tmp_path):
+    data = bytearray(_zip({"a.txt": "Alice " * 50, "b.txt": "Bob"}))
+    # Corrupt a.txt's stored bytes so its CRC check fails
+    start = data.index(b"Alice")
+    data[start:start + 5] = b"Ecila"
+    path = tmp_path / "cvs.zip"
+    path.write_bytes(bytes(data))
+
+    assert list(iter_files_from_uploader([LocalFile(path)], max_workers=1)) == [("b.txt", "Bob")]
+
+
+def test_text_falls_back_to_latin1_only_when_not_utf8():
+    assert read_text("José Müller".encode("utf-8"), "cv.txt") == "José Müller"
+    assert read_text("José Müller".encode("latin-1"), "cv.txt") == "José Müller"
@@ -0,0 +1,47 @@
+import httpx
+import pytest
+from openai import OpenAI, RateLimitError
+
+import openai_client
+
+
+def _client_answering(status, error):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(status, json={"error": error})
+
+    client = OpenAI(api_key="test", base_url="http://openai.test/v1", max_retries=0,
+                    http_client=httpx.Client(transport=httpx.MockTransport(handler)))
+    return client, requests
+
+
+@pytest.fixture
+def retrying(openai_stub, monkeypatch):
+    monkeypatch.setenv("OPENAI_MAX_RETRIES", "3")
+    monkeypatch.setattr(openai_client.time, "sleep", lambda seconds: None)
+
+
+def _call():
+    return openai_client.chat_completion([{"role": "user", "content": "hi"}], "gpt-4o-mini", 10)
+
+
+def test_exhausted_quota_is_not_retried(retrying, monkeypatch):
+    client, requests = _client_answering(429, {"message": "You exceeded your current quota",
+                                               "type": "insufficient_quota", "code": "insufficient_quota"})
+    monkeypatch.setattr(openai_client, "get_client", lambda: client)
+
+    with pytest.raises(RateLimitError):
+        _call()
+    assert len(requests) == 1
+
+
+def test_rate_limits_are_retried(retrying, monkeypatch):
+    client, requests = _client_answering(429, {"message": "Rate limit reached", "type": "requests",
+                                               "code": "rate_limit_exceeded"})
+    monkeypatch.setattr(openai_client, "get_client", lambda: client)
+
+    with pytest.raises(RateLimitError):
+        _call()
+    assert len(requests) == 4
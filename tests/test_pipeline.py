@@ -0,0 +1,122 @@
+import threading
+import time
+
+import cv_analyzer
+import cv_pipeline
+from cv_pipeline import analyze_documents_concurrently, filter_new_documents, content_hash
+
+from conftest import SAMPLE_CV
+
+JOB = {"job_title": "Data Scientist", "job_description": "Python, SQL and credit risk modelling"}
+
+
+def _docs(n):
+    return [(f"cv_{i}.txt", SAMPLE_CV.replace("Jane Example", f"Candidate Number{i}")) for i in range(n)]
+
+
+def test_results_stay_in_input_order(openai_stub, monkeypatch):
+    real_chat_completion = cv_analyzer.chat_completion
+
+    def slow_for_early_docs(messages, *args, **kwargs):
+        # Earlier documents finish last, so completion order is the reverse of input order
+        for i in range(6):
+            if f"Candidate Number{i}" in messages[-1]["content"]:
+                time.sleep((6 - i) * 0.03)
+        return real_chat_completion(messages, *args, **kwargs)
+
+    monkeypatch.setattr(cv_analyzer, "chat_completion", slow_for_early_docs)
+    docs = _docs(6)
+    progress = []
+    result = analyze_documents_concurrently(docs, JOB, max_workers=6, progress_callback=lambda *a: progress.append(a),
+                                            score_job=(JOB["job_title"], JOB["job_description"]))
+
+    assert result.filenames == [name for name, _ in docs]
+    assert [a.source_file for a in result.analyses] == result.filenames
+    assert result.content_hashes == [content_hash(text) for _, text in docs]
+    assert all(score is not None for score in result.scores)
+    assert not result.errors
+    # One step per analysis and one per score, reported on the calling thread
+    assert len(progress) == 12 and progress[-1][:2] == (12, 12)
+
+
+def test_failed_analysis_falls_back(openai_stub, monkeypatch, metrics):
+    real_chat_completion = cv_analyzer.chat_completion
+
+    def failing_for_one_doc(messages, *args, **kwargs):
+        if "Candidate Number1" in messages[-1]["content"]:
+            raise RuntimeError("boom")
+        return real_chat_completion(messages, *args, **kwargs)
+
+    monkeypatch.setattr(cv_analyzer, "chat_completion", failing_for_one_doc)
+    result = analyze_documents_concurrently(_docs(3), JOB, max_workers=2)
+
+    assert [a.source_file for a in result.analyses] == ["cv_0.txt", "cv_1.txt", "cv_2.txt"]
+    assert result.analyses[1].ai_reasoning.startswith("Basic fallback analysis")
+    assert result.analyses[0].summary.startswith("Stub analysis")
+    assert "Python" in result.analyses[1].must_have_skills
+    assert metrics.events()["analysis_fallback"] == 1
+    assert not result.errors
+
+
+def test_pipeline_error_leaves_a_gap(openai_stub, monkeypatch):
+    real_analyze_one = cv_pipeline._analyze_one
+
+    def analyze_one(filename, *args, **kwargs):
+        if filename == "cv_2.txt":
+            raise ValueError("unreadable")
+        return real_analyze_one(filename, *args, **kwargs)
+
+    monkeypatch.setattr(cv_pipeline, "_analyze_one", analyze_one)
+    result = analyze_documents_concurrently(_docs(4), JOB, max_workers=2,
+                                            score_job=(JOB["job_title"], JOB["job_description"]))
+
+    assert result.analyses[2] is None and result.scores[2] is None
+    assert result.errors == [("cv_2.txt", "unreadable")]
+    assert [a.source_file for a in result.completed] == ["cv_0.txt", "cv_1.txt", "cv_3.txt"]
+
+
+def test_extraction_is_paused_by_backpressure(openai_stub, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    real_analyze_one = cv_pipeline._analyze_one
+
+    def blocking_analyze_one(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return real_analyze_one(*args, **kwargs)
+
+    monkeypatch.setattr(cv_pipeline, "_analyze_one", blocking_analyze_one)
+    pulled = []
+
+    def docs():
+        for name, text in _docs(10):
+            pulled.append(name)
+            yield name, text
+
+    thread = threading.Thread(target=analyze_documents_concurrently, args=(docs(), JOB), kwargs={"max_workers": 1})
+    thread.start()
+    started.wait(5)
+    time.sleep(0.1)
+    # At most 2 * max_workers analyses are queued before extraction waits
+    assert len(pulled) == 2
+    release.set()
+    thread.join(10)
+    assert len(pulled) == 10
+
+
+def test_offline_analysis_without_api_key(no_api_key):
+    result = analyze_documents_concurrently(_docs(3), JOB)
+
+    assert [a.source_file for a in result.analyses] == ["cv_0.txt", "cv_1.txt", "cv_2.txt"]
+    assert result.scores == [None, None, None]
+    assert result.analyses[0].total_years > 0
+
+
+def test_filter_new_documents_skips_known_and_repeated_content():
+    docs = [("a.txt", "one"), ("b.txt", "two"), ("c.txt", "one"), ("d.txt", "three")]
+    seen, skipped = set(), []
+    kept = list(filter_new_documents(docs, {content_hash("two")}, seen, skipped))
+
+    assert kept == [("a.txt", "one"), ("d.txt", "three")]
+    assert skipped == ["b.txt", "c.txt"]
+    assert seen == {content_hash(text) for text in ("one", "two", "three")}
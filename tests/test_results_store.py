@@ -0,0 +1,22 @@
+from cv_analyzer import CVAnalysis
+from utils.results_store import CandidateStore
+
+
+def _candidate(name, **overrides):
+    values = dict(source_file=f"{name}.pdf", candidate_name=name, current_title="Data Scientist", total_years=6.5,
+                  relevant_years=4.0, summary="Summary", must_have_skills=["Python", "SQL"],
+                  nice_to_have_skills=["Docker"], experience_highlights=["Built models"], strengths=["ML"],
+                  confidence_notes="Notes", company_fit_score=70, company_fit_analysis="Fit",
+                  ai_reasoning="Reasoning")
+    values.update(overrides)
+    return CVAnalysis(**values)
+
+
+def test_scores_and_years_keep_their_exact_values():
+    store = CandidateStore.from_scored([(72.3, _candidate("Ann", total_years=3.3, relevant_years=2.2,
+                                                         score_breakdown={"experience_match": 81.7}))])
+    score, candidate = store.candidate(0)
+
+    assert (score, candidate.total_years, candidate.relevant_years) == (72.3, 3.3, 2.2)
+    assert candidate.score_breakdown == {"experience_match": 81.7}
+    assert store.ranked_view()["score"].tolist() == [72.3]
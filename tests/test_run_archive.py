@@ -0,0 +1,67 @@
+import gzip
+import json
+from dataclasses import asdict
+
+import pytest
+
+from cv_analyzer import CVAnalysis
+from utils.results_store import CandidateStore
+from utils.run_archive import ARCHIVE_FORMAT, export_run, load_run
+
+
+def _candidate(name, **overrides):
+    values = dict(source_file=f"{name}.pdf", candidate_name=name, current_title="Data Scientist", total_years=6.5,
+                  relevant_years=4.0, summary="Summary", must_have_skills=["Python", "SQL"],
+                  nice_to_have_skills=["Docker"], experience_highlights=["Built models"], strengths=["ML"],
+                  confidence_notes="Notes", company_fit_score=70, company_fit_analysis="Fit",
+                  ai_reasoning="Reasoning", brief_summary=f"{name} summary", content_hash=f"hash-{name}")
+    values.update(overrides)
+    return CVAnalysis(**values)
+
+
+def _archive(**fields):
+    return gzip.compress(json.dumps(dict({"format": ARCHIVE_FORMAT, "version": 1, "job_title": "DS"}, **fields)).encode())
+
+
+def test_round_trip():
+    scored = [(72.5, _candidate("Ann", score_breakdown={"experience_match": 80.0})), (88.0, _candidate("Bob"))]
+    results = {"candidates": CandidateStore.from_scored(scored), "job_title": "Data Scientist",
+               "job_context": {"job_description": "Python"}, "tokens_saved": 12, "llm_calls_avoided": 3}
+
+    loaded = load_run(export_run(results))
+
+    assert loaded["job_title"] == "Data Scientist"
+    assert loaded["job_context"] == {"job_description": "Python"}
+    assert (loaded["tokens_saved"], loaded["llm_calls_avoided"]) == (12, 3)
+    assert [(score, c.candidate_name) for score, c in loaded["candidates"].scored()] == [(88.0, "Bob"), (72.5, "Ann")]
+    assert list(loaded["candidates"].scored()) == list(results["candidates"].scored())
+
+
+def test_exported_numbers_are_not_widened_from_float32():
+    store = CandidateStore.from_scored([(72.3, _candidate("Ann", total_years=3.3, relevant_years=2.2,
+                                                         score_breakdown={"experience_match": 81.7}))])
+    archive = json.loads(gzip.decompress(export_run({"candidates": store, "job_title": "DS"})))
+    record = archive["candidates"][0]
+
+    assert (record["score"], record["total_years"], record["relevant_years"]) == (72.3, 3.3, 2.2)
+    assert record["score_breakdown"] == {"experience_match": 81.7}
+
+
+@pytest.mark.parametrize("data", [
+    b"not gzip at all",
+    gzip.compress(b"{broken json"),
+    gzip.compress(json.dumps({"format": "something-else"}).encode()),
+    gzip.compress(json.dumps([1, 2, 3]).encode()),
+    _archive(candidates={"not": "a list"}),
+    _archive(candidates=["not an object"]),
+    _archive(candidates=[{"source_file": "a.pdf", "score": 50}]),
+    _archive(candidates=[dict(asdict(_candidate("Ann")), score="high")]),
+])
+def test_malformed_archives_raise_value_error(data):
+    with pytest.raises(ValueError, match="saved screening run"):
+        load_run(data)
+
+
+def test_newer_archive_version_is_refused():
+    with pytest.raises(ValueError, match="newer"):
+        load_run(_archive(version=99, candidates=[]))
@@ -0,0 +1,82 @@
+import pytest
+
+from utils.skills import SkillIndex, SkillMatcher, load_skill_taxonomy
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return SkillMatcher(load_skill_taxonomy(""))
+
+
+@pytest.mark.parametrize("name, canonical", [
+    ("sklearn", "scikit-learn"),
+    ("Scikit Learn", "scikit-learn"),
+    ("PYSPARK", "Spark"),
+    ("golang", "Go"),
+    ("r", "R"),
+    ("c++", "C++"),
+    ("C#", "C#"),
+    ("k8s", "Kubernetes"),
+    ("Underwater basket weaving", None),
+])
+def test_canonical_names(matcher, name, canonical):
+    assert matcher.canonical(name) == canonical
+
+
+def test_short_and_ambiguous_aliases_are_not_matched_in_text(matcher):
+    text = "R&D lead who likes to go running; wrote JavaScript and TypeScript. REST of the team in Node."
+    found = matcher.find(text)
+
+    assert "R" not in found and "Go" not in found and "Java" not in found
+    assert "JavaScript" in found and "TypeScript" in found
+    assert "REST APIs" not in found and "Node.js" not in found
+
+
+def test_symbol_skills_and_longest_match(matcher):
+    counts = matcher.count("C++ and C# services; Apache Spark jobs on PySpark; machine learning (ML) models")
+
+    assert counts["C++"] == 1 and counts["C#"] == 1
+    # "apache spark" is one mention, not "apache" + "spark"
+    assert counts["Spark"] == 2
+    assert counts["Machine Learning"] == 2
+
+
+def test_normalize_merges_aliases_and_keeps_unknown_skills(matcher):
+    names = ["sklearn", "Scikit Learn", "Python (pandas, NumPy)", "Underwater basket weaving", "python3"]
+    assert matcher.normalize(names) == ["scikit-learn", "Python", "pandas", "NumPy", "Underwater basket weaving"]
+
+
+def test_custom_taxonomy_file(tmp_path):
+    path = tmp_path / "skills.json"
+    path.write_text('{"Polars": ["polars df"], "Python": ["cpython"]}')
+    custom = SkillMatcher(load_skill_taxonomy(str(path)))
+
+    assert custom.canonical("polars df") == "Polars"
+    assert custom.canonical("cpython") == "Python"
+    assert custom.canonical("python3") is None
+
+
+def test_skill_index_queries(matcher):
+    index = SkillIndex([["Python", "sklearn"], ["python3", "SQL"], ["Go"]], matcher)
+
+    assert index.positions("PYTHON").tolist() == [0, 1]
+    assert index.matching(["python", "scikit learn"]).tolist() == [0]
+    assert index.matching(["SQL", "golang"], match_all=False).tolist() == [1, 2]
+    assert index.matching([]).tolist() == []
+    assert index.skills()[0] == ("Python", 2)
+
+
+def test_tools_are_not_folded_into_their_category(matcher):
+    names = ["Jenkins", "pytest", "GitHub", "Matplotlib", "continuous integration"]
+    assert matcher.normalize(names) == ["Jenkins", "pytest", "GitHub", "Matplotlib", "CI/CD"]
+
+
+def test_category_queries_cover_their_skills(matcher):
+    index = SkillIndex([["Jenkins", "pytest"], ["CI/CD"], ["GitHub Actions"], ["Amazon EKS"], ["Docker"]], matcher)
+
+    assert index.positions("jenkins").tolist() == [0]
+    assert index.positions("CI/CD").tolist() == [0, 1, 2]
+    assert index.positions("Unit Testing").tolist() == [0]
+    assert index.positions("Containers").tolist() == [3, 4]
+    assert ("CI/CD", 3) in index.categories()
+    assert ("CI/CD", 1) in index.skills()
@@ -0,0 +1,22 @@
+from utils.text import PAGE_SEPARATOR, clean_text, compact_cv_text
+
+from conftest import SAMPLE_CV
+
+
+def test_page_breaks_keep_lines_apart_and_repeated_headers_go():
+    pages = ["Jane Example | CV\nEXPERIENCE\nData Scientist, Lender Ltd",
+             "Jane Example | CV\nBuilt scorecards in Python\nPage 2"]
+    text = clean_text(PAGE_SEPARATOR.join(pages))
+    result = compact_cv_text(text)
+
+    assert "Lender Ltd\n" in text
+    assert result.text.count("Jane Example | CV") == 1
+    assert "Data Scientist, Lender Ltd\n\nBuilt scorecards in Python" in result.text
+
+
+def test_long_cvs_are_not_truncated_unless_a_budget_is_set(monkeypatch):
+    monkeypatch.delenv("CV_TOKEN_BUDGET", raising=False)
+    long_cv = SAMPLE_CV + "\nPROJECTS\n" + "Shipped another model to production.\n" * 2000
+
+    assert "truncated" not in " ".join(compact_cv_text(long_cv).removed)
+    assert compact_cv_text(long_cv, token_budget=500).compacted_tokens <= 600
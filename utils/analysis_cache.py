@@ -0,0 +1,140 @@
+"""
+Content-addressed on-disk cache for paid OpenAI results.
+Entries are keyed by a hash of everything that determines the model output
+(cleaned CV text, job context, prompt version, model name), stored in SQLite
+and evicted by age and by least-recent use once the entry limit is reached.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from utils.metrics import count
+
+DEFAULT_CACHE_PATH = ".cache/cv_analysis.sqlite3"
+DEFAULT_MAX_ENTRIES = 20000
+DEFAULT_MAX_AGE_DAYS = 30
+EVICT_EVERY_N_WRITES = 100
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Stable SHA-256 over the given parts (strings, numbers or JSON-able values)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, str) else json.dumps(part, sort_keys=True, default=str)
+        digest.update(data.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """Thread-safe SQLite key/value store for JSON results with hit/miss counters"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, kind TEXT, value TEXT,"
+            " created_at REAL, accessed_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_accessed ON results(accessed_at)")
+        self._conn.commit()
+        self.evict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached value for key, or None on miss/expiry; the lookup is also
+        counted as cache_hit/cache_miss on the current run's metrics
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.max_age_seconds:
+                self.misses += 1
+                count("cache_miss")
+                return None
+            self._conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        count("cache_hit")
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any], kind: str = ""):
+        """Store a JSON-serialisable value under key"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, kind, value, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(value), now, now),
+            )
+            self._conn.commit()
+            self._writes += 1
+            due = self._writes % EVICT_EVERY_N_WRITES == 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used beyond max_entries"""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM results WHERE created_at < ?", (time.time() - self.max_age_seconds,))
+            removed = cur.rowcount
+            cur = self._conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                " SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            removed += cur.rowcount
+            self._conn.commit()
+        if removed:
+            print(f"🧹 Analysis cache evicted {removed} entr{'y' if removed == 1 else 'ies'}")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for this process plus the current entry count"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+
+
+_cache: Optional[AnalysisCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[AnalysisCache]:
+    """Shared cache configured from CV_CACHE_* env vars; None when disabled"""
+    global _cache
+    if os.getenv("CV_CACHE_DISABLED", "").strip().lower() in {"1", "true", "yes"}:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = AnalysisCache(
+                    path=os.getenv("CV_CACHE_PATH", DEFAULT_CACHE_PATH),
+                    max_entries=int(os.getenv("CV_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                    max_age_days=float(os.getenv("CV_CACHE_MAX_AGE_DAYS", DEFAULT_MAX_AGE_DAYS)),
+                )
+            except (sqlite3.Error, OSError, ValueError) as e:
+                logging.error(f"Analysis cache unavailable: {e}")
+                return None
+    return _cache
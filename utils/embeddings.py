@@ -0,0 +1,225 @@
+"""
+Candidate embeddings and a persistent vector index
+Each analysed candidate's similarity summary (utils.text.summarize_for_similarity)
+is embedded and stored in a float32 NumPy memmap keyed by the CV's content hash,
+so an existing pool can be re-ranked against a new job by cosine similarity
+without any LLM calls. Embedders are pluggable: a deterministic feature-hashing
+embedder works offline, the OpenAI embedder uses the shared client.
+"""
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.text import summarize_for_similarity
+from utils.prerank import STOPWORDS, tokenize
+
+DEFAULT_INDEX_DIR = ".cache/embeddings"
+DEFAULT_HASHING_DIM = 512
+DEFAULT_OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
+INITIAL_CAPACITY = 1024
+EMBED_BATCH_SIZE = 256
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words/bigram feature hashing; no network, stable across runs"""
+
+    def __init__(self, dim: int = DEFAULT_HASHING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        words = [t for t in tokenize(text) if t not in STOPWORDS]
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                vectors[row, bucket] += 1.0 if digest[4] & 1 else -1.0
+        return _normalize(vectors)
+
+
+class OpenAIEmbedder:
+    """OpenAI embeddings through the shared client (OPENAI_BASE_URL/OPENAI_API_KEY)"""
+
+    def __init__(self, model: str = DEFAULT_OPENAI_EMBEDDING_MODEL, dim: int = DEFAULT_HASHING_DIM):
+        self.model = model
+        self.dim = dim
+        self.name = f"{model}-{dim}"
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        from openai_client import get_client
+        client = get_client()
+        vectors = []
+        for start in range(0, len(texts), EMBED_BATCH_SIZE):
+            response = client.embeddings.create(model=self.model, input=list(texts[start:start + EMBED_BATCH_SIZE]),
+                                                dimensions=self.dim)
+            vectors.extend(item.embedding for item in sorted(response.data, key=lambda d: d.index))
+        return _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim))
+
+
+Embedder = Callable[[Sequence[str]], np.ndarray]
+
+
+def get_embedder() -> Embedder:
+    """Embedder selected by CV_EMBEDDER ("hashing", the default, or "openai")"""
+    if os.getenv("CV_EMBEDDER", "hashing").strip().lower() == "openai":
+        return OpenAIEmbedder(os.getenv("CV_EMBEDDING_MODEL", DEFAULT_OPENAI_EMBEDDING_MODEL))
+    return HashingEmbedder()
+
+
+def candidate_similarity_text(candidate: Any) -> str:
+    """Similarity summary of an analysed candidate (CVAnalysis or its dict form)"""
+    get = candidate.get if isinstance(candidate, dict) else lambda key, default=None: getattr(candidate, key, default)
+    text = summarize_for_similarity(get("current_title", "") or "", list(get("must_have_skills", []) or []),
+                                    list(get("nice_to_have_skills", []) or []), [])
+    highlights = " | ".join((get("experience_highlights", []) or [])[:3])
+    return f"{text}\nhighlights: {highlights}\nsummary: {get('summary', '') or ''}"
+
+
+def job_similarity_text(job_title: str, job_description: str) -> str:
+    return f"title: {job_title}\n{job_description}"
+
+
+class VectorIndex:
+    """
+    Append-only on-disk index: vectors.f32 (memmap, grown by doubling) plus keys.json
+    holding each CV hash and its candidate metadata. Re-adding a key overwrites its row.
+    """
+
+    def __init__(self, directory: str, dim: int):
+        self.directory = Path(directory)
+        self.dim = dim
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self.directory/"vectors.f32"
+        self._keys_path = self.directory/"keys.json"
+        self.keys: List[str] = []
+        self.metadata: Dict[str, Dict[str, Any]] = {}
+        if self._keys_path.exists():
+            stored = json.loads(self._keys_path.read_text(encoding="utf-8"))
+            if stored.get("dim") != dim:
+                raise ValueError(f"Index at {self.directory} has dim {stored.get('dim')}, expected {dim}")
+            self.keys = stored["keys"]
+            self.metadata = stored["metadata"]
+        self._rows = {key: i for i, key in enumerate(self.keys)}
+        self._open(max(INITIAL_CAPACITY, len(self.keys)))
+
+    def _open(self, capacity: int):
+        size = capacity * self.dim * 4
+        with open(self._vectors_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self.capacity = os.path.getsize(self._vectors_path) // (self.dim * 4)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+
+    def _save_keys(self):
+        tmp = self._keys_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"dim": self.dim, "keys": self.keys, "metadata": self.metadata}), encoding="utf-8")
+        os.replace(tmp, self._keys_path)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def add(self, keys: Sequence[str], vectors: np.ndarray, metadata: Optional[Sequence[Dict[str, Any]]] = None):
+        """Insert or overwrite rows for keys (vectors must be L2-normalised, shape (len(keys), dim))"""
+        with self._lock:
+            for i, key in enumerate(keys):
+                row = self._rows.get(key)
+                if row is None:
+                    if len(self.keys) >= self.capacity:
+                        self._vectors.flush()
+                        del self._vectors
+                        self._open(self.capacity * 2)
+                    row = len(self.keys)
+                    self.keys.append(key)
+                    self._rows[key] = row
+                self._vectors[row] = vectors[i]
+                if metadata is not None:
+                    self.metadata[key] = metadata[i]
+            self._vectors.flush()
+            self._save_keys()
+
+    def search(self, query: np.ndarray, k: int = 20, keys: Optional[Sequence[str]] = None) -> List[Tuple[str, float]]:
+        """Top-k (key, cosine similarity), optionally restricted to keys"""
+        with self._lock:
+            if not self.keys:
+                return []
+            query = query.astype(np.float32).reshape(-1)
+            if keys is None:
+                rows = np.arange(len(self.keys))
+                # Contiguous slice of the memmap: no copy of the pool
+                similarities = self._vectors[:len(self.keys)] @ query
+            else:
+                rows = np.array([self._rows[key] for key in keys if key in self._rows], dtype=np.int64)
+                if not len(rows):
+                    return []
+                similarities = self._vectors[rows] @ query
+        k = min(k, len(rows))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [(self.keys[rows[i]], float(similarities[i])) for i in top]
+
+
+_indexes: Dict[str, VectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(embedder: Optional[Embedder] = None) -> VectorIndex:
+    """Shared index for the embedder (one directory per embedder under CV_EMBEDDINGS_DIR)"""
+    embedder = embedder or get_embedder()
+    name = getattr(embedder, "name", type(embedder).__name__)
+    with _indexes_lock:
+        if name not in _indexes:
+            base = os.getenv("CV_EMBEDDINGS_DIR", DEFAULT_INDEX_DIR)
+            _indexes[name] = VectorIndex(os.path.join(base, name), getattr(embedder, "dim"))
+    return _indexes[name]
+
+
+def index_candidates(cv_hashes: Sequence[str], candidates: Sequence[Any],
+                     embedder: Optional[Embedder] = None, index: Optional[VectorIndex] = None) -> int:
+    """Embed and store candidates under their CV hashes; returns the number added/updated"""
+    embedder = embedder or get_embedder()
+    index = get_index(embedder) if index is None else index
+    pairs = [(h, c) for h, c in zip(cv_hashes, candidates) if h and c is not None]
+    if not pairs:
+        return 0
+    vectors = embedder([candidate_similarity_text(c) for _, c in pairs])
+    metadata = []
+    for _, candidate in pairs:
+        get = candidate.get if isinstance(candidate, dict) else lambda key, default=None: getattr(candidate, key, default)
+        metadata.append({
+            "source_file": get("source_file", ""),
+            "candidate_name": get("candidate_name", ""),
+            "current_title": get("current_title", ""),
+            "relevant_years": get("relevant_years", 0),
+            "summary": get("summary", ""),
+        })
+    index.add([h for h, _ in pairs], vectors, metadata)
+    print(f"🧭 Indexed {len(pairs)} candidate embedding(s) ({len(index)} in pool)")
+    return len(pairs)
+
+
+def rank_pool(job_title: str, job_description: str, k: int = 20,
+              embedder: Optional[Embedder] = None, index: Optional[VectorIndex] = None) -> List[Dict[str, Any]]:
+    """Top-k indexed candidates for a job: metadata plus cv_hash and similarity, best first"""
+    embedder = embedder or get_embedder()
+    index = get_index(embedder) if index is None else index
+    query = embedder([job_similarity_text(job_title, job_description)])[0]
+    return [dict(index.metadata.get(key, {}), cv_hash=key, similarity=round(score, 4))
+            for key, score in index.search(query, k)]
@@ -0,0 +1,226 @@
+"""
+Per-run timing and token instrumentation
+A RunMetrics object collects stage timings (extract, clean, each LLM call, scoring),
+prompt/completion token usage and event counts (invalid outputs, repairs, fallbacks)
+for one screening run. It is made current with
+use_metrics() and picked up by the pipeline through a context variable, so worker
+threads started with contextvars.copy_context() report into the same run.
+"""
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+# USD per million (input, output) tokens, used for the spend estimate
+MODEL_PRICES_PER_MTOK = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+# Prompt tokens served from the provider's prefix cache are billed at this fraction
+CACHED_INPUT_PRICE_RATIO = 0.5
+
+
+@dataclass
+class StageStats:
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+@dataclass
+class TokenStats:
+    calls: int = 0
+    retries: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+
+class RunMetrics:
+    """Thread-safe stage timers and LLM token counters for one run"""
+
+    def __init__(self, model: str = ""):
+        self.model = model
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.wall_seconds = 0.0
+        self._stages: Dict[str, StageStats] = {}
+        self._tokens: Dict[str, TokenStats] = {}
+        self._events: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        """Add one timed occurrence of stage"""
+        with self._lock:
+            stats = self._stages.setdefault(stage, StageStats())
+            stats.count += 1
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def record_llm_call(self, stage: str, seconds: Optional[float], usage: Any = None, retries: int = 0):
+        """
+        Time one LLM call under llm_<stage> and add its `usage` (object or dict) to the
+        token counters; seconds is None when the latency is unknown (Batch API results).
+        """
+        if seconds is not None:
+            self.observe(f"llm_{stage}", seconds)
+        prompt_tokens = completion_tokens = cached_tokens = 0
+        if usage is not None:
+            get = usage.get if isinstance(usage, dict) else lambda key, default=None: getattr(usage, key, default)
+            prompt_tokens = get("prompt_tokens", 0) or 0
+            completion_tokens = get("completion_tokens", 0) or 0
+            details = get("prompt_tokens_details", None)
+            if details is not None:
+                cached = details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", 0)
+                cached_tokens = cached or 0
+        with self._lock:
+            stats = self._tokens.setdefault(stage, TokenStats())
+            stats.calls += 1
+            stats.retries += retries
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.cached_tokens += cached_tokens
+
+    def count(self, event: str, n: int = 1):
+        """Add n occurrences of a named event"""
+        with self._lock:
+            self._events[event] = self._events.get(event, 0) + n
+
+    def events(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(sorted(self._events.items()))
+
+    def finish(self):
+        """Freeze the run's wall-clock time"""
+        self.wall_seconds = time.perf_counter() - self._start
+
+    def estimated_cost(self) -> Optional[float]:
+        """USD spend estimate from token counts, None for unknown models"""
+        prices = MODEL_PRICES_PER_MTOK.get(self.model)
+        if not prices:
+            return None
+        with self._lock:
+            prompt = sum(t.prompt_tokens for t in self._tokens.values())
+            cached = sum(t.cached_tokens for t in self._tokens.values())
+            completion = sum(t.completion_tokens for t in self._tokens.values())
+        input_cost = (prompt - cached + cached * CACHED_INPUT_PRICE_RATIO) * prices[0]
+        return (input_cost + completion * prices[1]) / 1_000_000
+
+    def stage_rows(self) -> List[Dict[str, Any]]:
+        """One row per stage: occurrences, total/mean/max seconds"""
+        with self._lock:
+            return [
+                {
+                    "stage": stage,
+                    "count": s.count,
+                    "total_s": round(s.total_seconds, 3),
+                    "mean_ms": round(s.total_seconds / s.count * 1000, 1) if s.count else 0.0,
+                    "max_ms": round(s.max_seconds * 1000, 1),
+                }
+                for stage, s in sorted(self._stages.items())
+            ]
+
+    def token_rows(self) -> List[Dict[str, Any]]:
+        """One row per LLM stage: calls, retries and token counts"""
+        with self._lock:
+            return [dict(stage=stage, **vars(t)) for stage, t in sorted(self._tokens.items())]
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-able snapshot of the run"""
+        tokens = self.token_rows()
+        return {
+            "model": self.model,
+            "started_at": self.started_at,
+            "wall_seconds": round(self.wall_seconds or time.perf_counter() - self._start, 3),
+            "stages": self.stage_rows(),
+            "tokens": tokens,
+            "prompt_tokens": sum(t["prompt_tokens"] for t in tokens),
+            "completion_tokens": sum(t["completion_tokens"] for t in tokens),
+            "cached_tokens": sum(t["cached_tokens"] for t in tokens),
+            "llm_calls": sum(t["calls"] for t in tokens),
+            "events": self.events(),
+            "estimated_cost_usd": self.estimated_cost(),
+        }
+
+    def to_prometheus(self, prefix: str = "cv_screener") -> str:
+        """Prometheus text exposition format of the run's counters"""
+        lines = [
+            f"# HELP {prefix}_stage_seconds_total Time spent per pipeline stage",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        rows = self.stage_rows()
+        lines += [f'{prefix}_stage_seconds_total{{stage="{r["stage"]}"}} {r["total_s"]}' for r in rows]
+        lines += [f"# HELP {prefix}_stage_count_total Timed occurrences per pipeline stage",
+                  f"# TYPE {prefix}_stage_count_total counter"]
+        lines += [f'{prefix}_stage_count_total{{stage="{r["stage"]}"}} {r["count"]}' for r in rows]
+        for field, help_text in (("calls", "LLM calls"), ("retries", "LLM call retries"),
+                                 ("prompt_tokens", "Prompt tokens"), ("completion_tokens", "Completion tokens"),
+                                 ("cached_tokens", "Prompt tokens served from the provider cache")):
+            lines += [f"# HELP {prefix}_llm_{field}_total {help_text}", f"# TYPE {prefix}_llm_{field}_total counter"]
+            lines += [f'{prefix}_llm_{field}_total{{stage="{t["stage"]}",model="{self.model}"}} {t[field]}'
+                      for t in self.token_rows()]
+        lines += [f"# HELP {prefix}_events_total Pipeline events (invalid outputs, repairs, fallbacks)",
+                  f"# TYPE {prefix}_events_total counter"]
+        lines += [f'{prefix}_events_total{{event="{event}"}} {n}' for event, n in self.events().items()]
+        lines += [f"# HELP {prefix}_run_wall_seconds Wall-clock duration of the run",
+                  f"# TYPE {prefix}_run_wall_seconds gauge",
+                  f"{prefix}_run_wall_seconds {round(self.wall_seconds, 3)}"]
+        return "\n".join(lines) + "\n"
+
+
+_current: contextvars.ContextVar[Optional[RunMetrics]] = contextvars.ContextVar("cv_run_metrics", default=None)
+
+
+def current_metrics() -> Optional[RunMetrics]:
+    """Metrics of the run active in this context, if any"""
+    return _current.get()
+
+
+@contextmanager
+def use_metrics(metrics: RunMetrics) -> Iterator[RunMetrics]:
+    """Make metrics current for the block; call finish() when it exits"""
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+        metrics.finish()
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time the block into the current run (no-op when none is active)"""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    with metrics.span(stage):
+        yield
+
+
+def observe(stage: str, seconds: float):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.observe(stage, seconds)
+
+
+def record_llm_call(stage: str, seconds: Optional[float], usage: Any = None, retries: int = 0):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.record_llm_call(stage, seconds, usage, retries)
+
+
+def count(event: str, n: int = 1):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.count(event, n)
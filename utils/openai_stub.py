@@ -0,0 +1,335 @@
+"""
+Local stand-in for the OpenAI chat completions, files and batches endpoints.
+Returns canned analysis/scoring JSON after a configurable delay (and, optionally,
+random 429/500 failures) so the pipeline and batch mode can be exercised and
+timed without network access or an API key. Chat completions also report
+cached prompt tokens the way provider-side prefix caching does, honour a
+json_schema response_format by returning exactly its fields, and can return a
+fraction of malformed replies to exercise validation and repair.
+
+Usage:
+    python -m utils.openai_stub --port 8765 --latency 0.5 --failure-rate 0.05 --malformed-rate 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub streamlit run app.py
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+
+def _analysis_payload(seed: int) -> Dict[str, Any]:
+    return {
+        "candidate_name": f"Stub Candidate {seed % 1000}",
+        "current_title": "Data Scientist",
+        "total_years": float(2 + seed % 12),
+        "relevant_years": float(1 + seed % 8),
+        "summary": "Stub analysis generated by the local OpenAI stand-in.",
+        "must_have_skills": ["Python", "SQL", "scikit-learn"],
+        "nice_to_have_skills": ["Docker", "Airflow"],
+        "experience_highlights": ["Built credit risk models"],
+        "strengths": ["Production ML"],
+        "confidence_notes": "Stub response",
+        "company_fit_score": 40 + seed % 60,
+        "company_fit_analysis": "Stub company fit analysis",
+        "ai_reasoning": "Stub reasoning",
+    }
+
+
+def _scoring_payload(seed: int) -> Dict[str, Any]:
+    return {
+        "score": 40 + seed % 60,
+        "reasoning": "Stub scoring reasoning",
+        "brief_summary": "Stub candidate summary",
+        "experience_match": 40 + seed % 60,
+        "skills_coverage": 40 + seed % 50,
+        "nice_to_have": 30 + seed % 70,
+        "education": 50 + seed % 50,
+        "overall_fit": 40 + seed % 60,
+    }
+
+
+# Prefix caching model: prompts of at least 1024 tokens, cached in 128-token steps
+# (approximated as 4 characters per token)
+CACHE_MIN_CHARS = 1024 * 4
+CACHE_STEP_CHARS = 128 * 4
+
+
+class PrefixCache:
+    """Remembers prompt prefixes at cache-step boundaries across requests"""
+
+    def __init__(self):
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def cached_tokens(self, prompt: str) -> int:
+        """Tokens of the longest previously seen prefix of prompt; records prompt's prefixes"""
+        boundaries = range(CACHE_MIN_CHARS, len(prompt) + 1, CACHE_STEP_CHARS)
+        digests = [hashlib.sha256(prompt[:end].encode("utf-8")).digest() for end in boundaries]
+        with self._lock:
+            cached = 0
+            for end, digest in zip(boundaries, digests):
+                if digest not in self._seen:
+                    break
+                cached = end // 4
+            self._seen.update(digests)
+        return cached
+
+
+MALFORMED_KINDS = ("truncated", "wrong_type", "missing_field")
+
+
+def _schema_payload(seed: int, properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Canned values for exactly the properties a json_schema response_format asks for"""
+    payload = dict(_analysis_payload(seed), **_scoring_payload(seed), score_reasoning="Stub scoring reasoning")
+    payload["skills"] = payload["must_have_skills"] + payload["nice_to_have_skills"]
+    return {name: payload.get(name, "Stub value") for name in properties}
+
+
+def _malformed(payload: Dict[str, Any], kind: str) -> str:
+    """Reply content broken the way models occasionally break JSON"""
+    if kind == "truncated":
+        content = json.dumps(payload)
+        return content[:len(content) // 2]
+    name = sorted(payload)[len(payload) // 2]
+    if kind == "wrong_type":
+        payload = dict(payload, **{name: "n/a" if not isinstance(payload[name], str) else 0})
+    else:
+        payload = {key: value for key, value in payload.items() if key != name}
+    return "```json\n" + json.dumps(payload) + "\n```"
+
+
+def build_completion(body: Dict[str, Any], prefix_cache: Optional[PrefixCache] = None,
+                     malformed: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build a deterministic chat.completion response for a request body; malformed (one of
+    MALFORMED_KINDS) breaks the reply content on purpose
+    """
+    prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+    seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+    schema = (body.get("response_format") or {}).get("json_schema", {}).get("schema")
+    if schema:
+        payload = _schema_payload(seed, schema.get("properties", {}))
+    elif '"company_fit_score"' in prompt:
+        payload = _analysis_payload(seed)
+        if '"score_reasoning"' in prompt:
+            payload.update(_scoring_payload(seed), score_reasoning="Stub scoring reasoning")
+        if '"skills"' in prompt:
+            payload["skills"] = payload["must_have_skills"] + payload["nice_to_have_skills"]
+    else:
+        payload = _scoring_payload(seed)
+        if '"must_have_skills"' in prompt:
+            # Multi-job match: job-specific fields alongside the score
+            payload.update(relevant_years=float(1 + seed % 8), must_have_skills=["Python", "SQL"],
+                           nice_to_have_skills=["Docker"])
+    content = _malformed(payload, malformed) if malformed else json.dumps(payload)
+    prompt_tokens = len(prompt) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": f"chatcmpl-stub-{seed:x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": prefix_cache.cached_tokens(prompt) if prefix_cache else 0},
+        },
+    }
+
+
+_ids = itertools.count(1)
+
+
+def _multipart_file(content_type: str, body: bytes) -> Tuple[str, bytes]:
+    """(filename, contents) of the "file" field in a multipart/form-data upload"""
+    message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+    for part in message.iter_parts():
+        if part.get_param("name", header="content-disposition") == "file":
+            return part.get_filename() or "upload.jsonl", part.get_payload(decode=True)
+    raise ValueError("multipart body has no 'file' field")
+
+
+def _run_batch(server: ThreadingHTTPServer, batch: Dict[str, Any]):
+    """Answer every request line of a batch, then publish its output file"""
+    time.sleep(server.latency)
+    batch.update(status="in_progress", in_progress_at=int(time.time()))
+    output_lines = []
+    for line in server.files[batch["input_file_id"]]["content"].decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        output_lines.append(json.dumps({
+            "id": f"batch_req_stub_{next(_ids)}",
+            "custom_id": request["custom_id"],
+            "response": {"status_code": 200, "request_id": f"req_stub_{next(_ids)}", "body": build_completion(request["body"])},
+            "error": None,
+        }))
+        batch["request_counts"]["completed"] += 1
+    time.sleep(server.latency)
+    output = _store_file(server, "batch_output.jsonl", "\n".join(output_lines).encode("utf-8"), "batch_output")
+    batch.update(status="completed", output_file_id=output["id"], completed_at=int(time.time()))
+
+
+def _store_file(server: ThreadingHTTPServer, filename: str, content: bytes, purpose: str) -> Dict[str, Any]:
+    file_object = {
+        "id": f"file-stub-{next(_ids)}",
+        "object": "file",
+        "bytes": len(content),
+        "created_at": int(time.time()),
+        "filename": filename,
+        "purpose": purpose,
+        "status": "processed",
+    }
+    server.files[file_object["id"]] = dict(file_object, content=content)
+    return file_object
+
+
+def _create_batch(server: ThreadingHTTPServer, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    input_file = server.files.get(body.get("input_file_id", ""))
+    if input_file is None:
+        return None
+    total = sum(1 for line in input_file["content"].splitlines() if line.strip())
+    batch = {
+        "id": f"batch_stub_{next(_ids)}",
+        "object": "batch",
+        "endpoint": body.get("endpoint", "/v1/chat/completions"),
+        "input_file_id": input_file["id"],
+        "completion_window": body.get("completion_window", "24h"),
+        "status": "validating",
+        "created_at": int(time.time()),
+        "request_counts": {"total": total, "completed": 0, "failed": 0},
+        "metadata": body.get("metadata"),
+    }
+    server.batches[batch["id"]] = batch
+    threading.Thread(target=_run_batch, args=(server, batch), daemon=True).start()
+    return batch
+
+
+class StubOpenAIHandler(BaseHTTPRequestHandler):
+    """Request handler; behaviour is configured through attributes on the server"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, data: Dict[str, Any]):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_found(self):
+        self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _read_json(self) -> Dict[str, Any]:
+        return json.loads(self._read_body() or b"{}")
+
+    def do_POST(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if path.endswith("/chat/completions"):
+            body = self._read_json()
+            time.sleep(self.server.latency)
+            schema_name = (body.get("response_format") or {}).get("json_schema", {}).get("name", "")
+            with self.server.rng_lock:
+                fail = self.server.rng.random() < self.server.failure_rate
+                status = self.server.rng.choice((429, 500))
+                # Repair requests always succeed so a repair rate can be measured
+                malformed = (self.server.rng.choice(MALFORMED_KINDS)
+                             if self.server.rng.random() < self.server.malformed_rate
+                             and not schema_name.endswith("_repair") else None)
+            if fail:
+                self._send_json(status, {"error": {"message": f"Stub injected failure ({status})", "type": "stub_error"}})
+            else:
+                self._send_json(200, build_completion(body, self.server.prefix_cache, malformed))
+        elif path.endswith("/files"):
+            filename, content = _multipart_file(self.headers.get("Content-Type", ""), self._read_body())
+            self._send_json(200, _store_file(self.server, filename, content, "batch"))
+        elif path.endswith("/batches"):
+            batch = _create_batch(self.server, self._read_json())
+            if batch is None:
+                self._send_json(400, {"error": {"message": "Unknown input_file_id"}})
+            else:
+                self._send_json(200, batch)
+        else:
+            self._not_found()
+
+    def do_GET(self):
+        path = self.path.split("?")[0].rstrip("/")
+        batch_match = re.search(r"/batches/([^/]+)$", path)
+        content_match = re.search(r"/files/([^/]+)/content$", path)
+        if batch_match and batch_match.group(1) in self.server.batches:
+            self._send_json(200, self.server.batches[batch_match.group(1)])
+        elif content_match and content_match.group(1) in self.server.files:
+            content = self.server.files[content_match.group(1)]["content"]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        else:
+            self._not_found()
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                      failure_rate: float = 0.0, seed: int = 0,
+                      malformed_rate: float = 0.0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start the stub server on a background thread; returns (server, base_url).
+    failure_rate is the fraction of chat completions answered with a 429 or 500 and
+    malformed_rate the fraction (of non-repair completions) whose JSON is truncated,
+    mistyped or missing a field; both are drawn from a generator seeded with seed,
+    so runs are repeatable.
+    """
+    server = ThreadingHTTPServer((host, port), StubOpenAIHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.failure_rate = failure_rate
+    server.malformed_rate = malformed_rate
+    server.rng = random.Random(seed)
+    server.rng_lock = threading.Lock()
+    server.files = {}
+    server.batches = {}
+    server.prefix_cache = PrefixCache()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://{host}:{server.server_address[1]}/v1"
+    print(f"🧪 OpenAI stub listening on {base_url} (latency {latency:.2f}s, failure rate {failure_rate:.0%}, "
+          f"malformed rate {malformed_rate:.0%})")
+    return server, base_url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI stand-in for CV screener testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds to wait before each response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of completions answered with 429/500")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="Fraction of completions answered with broken JSON")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    server, _ = start_stub_server(args.host, args.port, args.latency, args.failure_rate, args.seed,
+                                  args.malformed_rate)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
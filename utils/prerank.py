@@ -0,0 +1,113 @@
+"""
+Local keyword pre-ranking
+Scores every CV in a batch against the job description with BM25, vectorised
+with NumPy, so only the most relevant CVs are sent for (paid) AI analysis.
+"""
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Job title words count this many times more than description words
+TITLE_WEIGHT = 3.0
+
+# Keeps tech tokens such as c++, c#, .net and node.js intact; trailing dots are not part of a token
+_TOKEN = re.compile(r"[a-z0-9](?:[a-z0-9+#.]*[a-z0-9+#])?")
+STOPWORDS = {
+    "a", "about", "across", "an", "and", "are", "as", "at", "be", "by", "can", "for", "from", "have", "in",
+    "including", "is", "it", "of", "on", "or", "our", "the", "their", "this", "to", "we", "will", "with",
+    "you", "your", "role", "team", "work", "working", "experience", "strong", "ability", "skills", "plus",
+    "years", "looking", "join", "within", "using", "etc", "e.g", "i.e",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens with trailing punctuation dots removed"""
+    return _TOKEN.findall(text.lower())
+
+
+def query_weights(job_title: str, job_description: str) -> Dict[str, float]:
+    """Query terms weighted by how often the job description uses them, with title terms boosted"""
+    weights = Counter(t for t in tokenize(job_description) if t not in STOPWORDS)
+    for term in tokenize(job_title):
+        if term not in STOPWORDS:
+            weights[term] += TITLE_WEIGHT
+    return dict(weights)
+
+
+def bm25_scores(documents: Sequence[str], weights: Dict[str, float], k1: float = BM25_K1, b: float = BM25_B) -> np.ndarray:
+    """Weighted BM25 score of each document for the query terms in weights"""
+    n = len(documents)
+    if not n or not weights:
+        return np.zeros(n)
+    terms = list(weights)
+    column = {term: i for i, term in enumerate(terms)}
+    tf = np.zeros((n, len(terms)), dtype=np.float32)
+    lengths = np.empty(n, dtype=np.float32)
+    for row, text in enumerate(documents):
+        tokens = tokenize(text)
+        lengths[row] = len(tokens)
+        for term, count in Counter(tokens).items():
+            i = column.get(term)
+            if i is not None:
+                tf[row, i] = count
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((n - df + 0.5) / (df + 0.5))
+    avg_length = max(float(lengths.mean()), 1.0)
+    norm = k1 * (1 - b + b * lengths / avg_length)
+    term_scores = tf * (k1 + 1) / (tf + norm[:, None])
+    return term_scores @ (idf * np.array([weights[t] for t in terms], dtype=np.float32))
+
+
+@dataclass
+class PrerankResult:
+    """Per-document relevance (0-1, relative to the best CV), rank and selection"""
+    relevance: np.ndarray
+    ranks: np.ndarray
+    selected: np.ndarray
+
+    @property
+    def skipped(self) -> int:
+        return int((~self.selected).sum())
+
+
+def get_prerank_settings() -> tuple[int, float]:
+    """(top N, minimum relative relevance) from CV_PRERANK_TOP_N / CV_PRERANK_MIN_SCORE; 0 disables each"""
+    try:
+        top_n = max(0, int(os.getenv("CV_PRERANK_TOP_N", 0)))
+    except ValueError:
+        top_n = 0
+    try:
+        min_score = min(1.0, max(0.0, float(os.getenv("CV_PRERANK_MIN_SCORE", 0))))
+    except ValueError:
+        min_score = 0.0
+    return top_n, min_score
+
+
+def prerank(documents: Sequence[str], job_title: str, job_description: str,
+            top_n: Optional[int] = None, min_score: Optional[float] = None) -> PrerankResult:
+    """
+    Rank documents by BM25 relevance to the job and select the top_n (0 = all) whose
+    relevance relative to the best document is at least min_score (0-1).
+    """
+    default_top_n, default_min_score = get_prerank_settings()
+    top_n = default_top_n if top_n is None else top_n
+    min_score = default_min_score if min_score is None else min_score
+
+    scores = bm25_scores(documents, query_weights(job_title, job_description))
+    best = float(scores.max()) if len(scores) else 0.0
+    relevance = scores / best if best > 0 else np.ones(len(scores))
+    order = np.argsort(-scores, kind="stable")
+    ranks = np.empty(len(scores), dtype=np.int64)
+    ranks[order] = np.arange(1, len(scores) + 1)
+
+    selected = relevance >= min_score
+    if top_n:
+        selected &= ranks <= top_n
+    return PrerankResult(relevance=relevance, ranks=ranks, selected=selected)
@@ -0,0 +1,146 @@
+"""
+Columnar store for ranked candidates
+Holds a run's scored candidates as one pandas DataFrame (one row per candidate, best
+first) instead of a list of (score, CVAnalysis) objects: the fit score is an int16,
+repeated strings are categoricals and skill lists stay list columns, so large
+batches take far less session memory. Sorting and filtering are vectorised, and the
+store round-trips through Parquet (needs pyarrow) for reloading a run. Skill filters
+go through an inverted index (utils.skills.SkillIndex) built on first use.
+"""
+from dataclasses import fields
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cv_analyzer import SCORE_BREAKDOWN_KEYS, CVAnalysis
+from utils.skills import SkillIndex
+
+LIST_COLUMNS = ("must_have_skills", "nice_to_have_skills", "experience_highlights", "strengths")
+# Few distinct values across a batch, so dictionary-encode them
+CATEGORY_COLUMNS = ("current_title",)
+# Scores and years stay float64: float32 would export 3.3 as 3.299999952316284 and the
+# saving is a few bytes per candidate
+NUMERIC_DTYPES = {
+    "score": np.float64,
+    "total_years": np.float64,
+    "relevant_years": np.float64,
+    "company_fit_score": np.int16,
+}
+ANALYSIS_FIELDS = tuple(f.name for f in fields(CVAnalysis) if f.name not in {"ai_score", "score_breakdown"})
+BREAKDOWN_COLUMNS = tuple(f"score_{key}" for key in SCORE_BREAKDOWN_KEYS)
+
+
+class CandidateStore:
+    """Ranked candidates of one run, backed by a DataFrame sorted best first"""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame.reset_index(drop=True)
+        self._skill_index: Optional[SkillIndex] = None
+
+    @classmethod
+    def from_scored(cls, scored: Iterable[Tuple[float, CVAnalysis]]) -> "CandidateStore":
+        """Build from (score, candidate) pairs; they are re-sorted by score, best first"""
+        columns: Dict[str, List[Any]] = {name: [] for name in ("score",) + ANALYSIS_FIELDS + BREAKDOWN_COLUMNS}
+        for score, candidate in scored:
+            columns["score"].append(score)
+            for name in ANALYSIS_FIELDS:
+                columns[name].append(getattr(candidate, name))
+            breakdown = candidate.score_breakdown or {}
+            for key, column in zip(SCORE_BREAKDOWN_KEYS, BREAKDOWN_COLUMNS):
+                columns[column].append(breakdown.get(key, np.nan))
+        frame = pd.DataFrame(columns)
+        for column, dtype in NUMERIC_DTYPES.items():
+            frame[column] = frame[column].astype(dtype)
+        for column in BREAKDOWN_COLUMNS:
+            frame[column] = frame[column].astype(np.float64)
+        for column in CATEGORY_COLUMNS:
+            frame[column] = frame[column].astype("category")
+        return cls(frame.sort_values("score", ascending=False, kind="stable"))
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def content_hashes(self) -> Set[str]:
+        return set(self.frame["content_hash"])
+
+    @property
+    def skill_index(self) -> SkillIndex:
+        """Inverted index from canonical skill (must-have or nice-to-have) to row positions"""
+        if self._skill_index is None:
+            self._skill_index = SkillIndex(must + nice for must, nice in
+                                           zip(self.frame["must_have_skills"], self.frame["nice_to_have_skills"]))
+        return self._skill_index
+
+    def candidate(self, position: int) -> Tuple[float, CVAnalysis]:
+        """(score, CVAnalysis) rebuilt from the row at position (0 = best)"""
+        row = self.frame.iloc[position]
+        values = {name: row[name] for name in ANALYSIS_FIELDS}
+        for name in LIST_COLUMNS:
+            values[name] = list(values[name])
+        for name in ("total_years", "relevant_years"):
+            values[name] = float(values[name])
+        values["company_fit_score"] = int(values["company_fit_score"])
+        values["current_title"] = str(values["current_title"])
+        score = float(row["score"])
+        breakdown = {key: float(row[column]) for key, column in zip(SCORE_BREAKDOWN_KEYS, BREAKDOWN_COLUMNS)
+                     if not pd.isna(row[column])}
+        return score, CVAnalysis(**values, ai_score=score, score_breakdown=breakdown)
+
+    def scored(self) -> Iterator[Tuple[float, CVAnalysis]]:
+        """All candidates as (score, CVAnalysis), best first"""
+        for position in range(len(self.frame)):
+            yield self.candidate(position)
+
+    def ranked_view(self, min_score: float = 0, min_company_fit: int = 0, min_years: float = 0,
+                    query: str = "", sort_by: str = "score", ascending: bool = False,
+                    skills: Sequence[str] = (), match_all_skills: bool = True) -> pd.DataFrame:
+        """
+        Filtered, sorted view with a 1-based "rank" column (overall position by score).
+        query matches candidate name, current title or brief summary, case-insensitively;
+        skills keeps candidates listing all (or any) of them, under any alias.
+        """
+        frame = self.frame.assign(rank=np.arange(1, len(self.frame) + 1))
+        mask = ((frame["score"] >= min_score) & (frame["company_fit_score"] >= min_company_fit)
+                & (frame["relevant_years"] >= min_years))
+        if query:
+            mask &= (frame["candidate_name"].str.contains(query, case=False, regex=False)
+                     | frame["current_title"].astype(str).str.contains(query, case=False, regex=False)
+                     | frame["brief_summary"].str.contains(query, case=False, regex=False))
+        if skills:
+            has_skills = np.zeros(len(frame), dtype=bool)
+            has_skills[self.skill_index.matching(skills, match_all=match_all_skills)] = True
+            mask &= has_skills
+        frame = frame[mask]
+        if sort_by not in {"score", "rank"}:
+            frame = frame.sort_values([sort_by, "rank"], ascending=[ascending, True], kind="stable")
+        return frame
+
+    def subset(self, content_hashes: Set[str]) -> "CandidateStore":
+        """Candidates whose CV hash is in content_hashes, order kept"""
+        return CandidateStore(self.frame[self.frame["content_hash"].isin(content_hashes)])
+
+    def merge(self, other: "CandidateStore") -> "CandidateStore":
+        """Both stores' candidates in one store, best first (ties keep self's rows first)"""
+        if not len(other):
+            return self
+        if not len(self):
+            return other
+        frame = pd.concat([self.frame, other.frame], ignore_index=True)
+        for column in CATEGORY_COLUMNS:
+            frame[column] = frame[column].astype("category")
+        return CandidateStore(frame.sort_values("score", ascending=False, kind="stable"))
+
+    def memory_bytes(self) -> int:
+        return int(self.frame.memory_usage(deep=True).sum())
+
+    def to_parquet(self, path_or_buffer: Any):
+        self.frame.to_parquet(path_or_buffer, index=False)
+
+    @classmethod
+    def from_parquet(cls, path_or_buffer: Any) -> "CandidateStore":
+        frame = pd.read_parquet(path_or_buffer)
+        for column in LIST_COLUMNS:
+            frame[column] = frame[column].map(list)
+        return cls(frame)
@@ -0,0 +1,83 @@
+"""
+Saved screening runs
+A run (job context, every analysed candidate with its score and reasoning, the prompt
+version and model, and the run's timing/token stats) is written as gzip-compressed
+JSON, and loaded back into the same results shape the app renders, so a shortlist can
+be revisited without re-extracting CVs or making any LLM calls.
+"""
+import gzip
+import json
+import time
+from dataclasses import asdict, fields
+from typing import Any, Dict
+
+from cv_analyzer import OPENAI_MODEL, PROMPT_VERSION, CVAnalysis
+from utils.results_store import CandidateStore
+
+ARCHIVE_FORMAT = "cv-screener-run"
+ARCHIVE_VERSION = 1
+ARCHIVE_SUFFIX = ".cvrun.json.gz"
+_CANDIDATE_FIELDS = {f.name for f in fields(CVAnalysis)}
+
+
+def export_run(results: Dict[str, Any]) -> bytes:
+    """Gzip-compressed JSON of an analysis run (the app's results dict)"""
+    store: CandidateStore = results["candidates"]
+    archive = {
+        "format": ARCHIVE_FORMAT,
+        "version": ARCHIVE_VERSION,
+        "exported_at": time.time(),
+        "prompt_version": results.get("prompt_version", PROMPT_VERSION),
+        "model": results.get("model", OPENAI_MODEL),
+        "job_title": results["job_title"],
+        "job_context": results.get("job_context", {}),
+        "candidates": [dict(asdict(candidate), score=score) for score, candidate in store.scored()],
+        "run_stats": results.get("run_stats"),
+        "run_prometheus": results.get("run_prometheus", ""),
+        "tokens_saved": results.get("tokens_saved", 0),
+        "llm_calls_avoided": results.get("llm_calls_avoided", 0),
+    }
+    return gzip.compress(json.dumps(archive, ensure_ascii=False).encode("utf-8"))
+
+
+def load_run(data: bytes) -> Dict[str, Any]:
+    """
+    Results dict rebuilt from export_run() output. Raises ValueError if data is not a
+    readable run archive.
+    """
+    try:
+        archive = json.loads(gzip.decompress(data).decode("utf-8"))
+    except (OSError, EOFError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Not a saved screening run: {e}") from e
+    if not isinstance(archive, dict) or archive.get("format") != ARCHIVE_FORMAT:
+        raise ValueError("Not a saved screening run")
+    if archive.get("version", 0) > ARCHIVE_VERSION:
+        raise ValueError(f"Run archive version {archive['version']} is newer than this app supports")
+
+    scored = []
+    try:
+        candidates = archive.get("candidates", [])
+        if not isinstance(candidates, list):
+            raise TypeError("candidates is not a list")
+        for position, record in enumerate(candidates):
+            if not isinstance(record, dict):
+                raise TypeError(f"candidate {position} is not an object")
+            score = float(record.get("score", record.get("ai_score", 0)))
+            scored.append((score, CVAnalysis(**{k: v for k, v in record.items() if k in _CANDIDATE_FIELDS})))
+        store = CandidateStore.from_scored(scored)
+    except (TypeError, KeyError, AttributeError, ValueError) as e:
+        # Older or hand-edited archives: a missing required field or a malformed record
+        raise ValueError(f"Not a saved screening run: {e}") from e
+    return {
+        "candidates": store,
+        "job_title": archive.get("job_title", ""),
+        "job_context": archive.get("job_context", {}),
+        "total_candidates": len(store),
+        "prompt_version": archive.get("prompt_version"),
+        "model": archive.get("model"),
+        "imported_from": archive.get("exported_at"),
+        "tokens_saved": archive.get("tokens_saved", 0),
+        "llm_calls_avoided": archive.get("llm_calls_avoided", 0),
+        "run_stats": archive.get("run_stats"),
+        "run_prometheus": archive.get("run_prometheus", ""),
+    }
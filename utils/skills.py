@@ -0,0 +1,378 @@
+"""
+Skill taxonomy, matcher and index
+A taxonomy maps each canonical skill name to its aliases. SkillMatcher turns it into
+one hash map from tokenised alias to canonical skill and finds skills in text with a
+single greedy longest-match pass over the tokens, so a whole batch of CVs is scanned
+once regardless of taxonomy size. The same map normalises the free-text skill names
+the model returns ("sklearn", "Scikit Learn" -> "scikit-learn"), and SkillIndex is an
+inverted index from canonical skill to candidates for instant "has X and Y" queries.
+Aliases are only other spellings of a skill; separate tools that belong under an umbrella
+(Jenkins under CI/CD, pytest under Unit Testing) are skills of their own, grouped by
+SKILL_CATEGORIES, which widens index queries and never rewrites stored skills.
+The taxonomy can be extended or overridden with a JSON file ({"Canonical": ["alias",
+...]}) named by CV_SKILL_TAXONOMY.
+"""
+import os
+import re
+import json
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+import numpy as np
+
+from utils.prerank import tokenize
+
+DEFAULT_SKILL_TAXONOMY: Dict[str, List[str]] = {
+    # Languages
+    "Python": ["python3", "py"],
+    "SQL": ["t-sql", "tsql", "pl/sql", "plsql", "ansi sql"],
+    "R": ["r programming", "rstudio", "tidyverse", "r shiny"],
+    "Java": ["java 8", "java 11", "java 17"],
+    "JavaScript": ["js", "ecmascript", "es6"],
+    "TypeScript": ["ts"],
+    "Scala": [],
+    "Go": ["golang"],
+    "C++": ["cpp"],
+    "C#": ["csharp", "c sharp"],
+    ".NET": ["dotnet", "asp.net", "asp.net core", ".net core"],
+    "Julia": [],
+    "SAS": ["sas base", "sas enterprise guide"],
+    "MATLAB": [],
+    "Bash": ["shell scripting", "unix shell"],
+    # Data science and ML
+    "Machine Learning": ["ml", "machine-learning", "statistical learning"],
+    "Deep Learning": ["neural networks", "neural network"],
+    "NLP": ["natural language processing", "text mining"],
+    "Computer Vision": ["image recognition"],
+    "Statistics": ["statistical modelling", "statistical modeling", "statistical analysis"],
+    "Time Series": ["time-series", "time series analysis"],
+    "Forecasting": [],
+    "A/B Testing": ["ab testing", "a/b tests", "experimentation", "split testing"],
+    "Feature Engineering": [],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "pandas": [],
+    "NumPy": [],
+    "SciPy": [],
+    "statsmodels": [],
+    "XGBoost": ["xgb"],
+    "LightGBM": ["lgbm", "light gbm"],
+    "CatBoost": [],
+    "TensorFlow": ["tf2", "tensor flow"],
+    "Keras": [],
+    "PyTorch": ["torch"],
+    "Hugging Face": ["huggingface", "transformers"],
+    "LLMs": ["llm", "large language models", "large language model", "generative ai", "genai"],
+    "SHAP": ["shapley values"],
+    "Jupyter": ["jupyter notebook", "jupyterlab", "ipython"],
+    "MLOps": ["ml ops", "model deployment", "model monitoring"],
+    "MLflow": ["ml flow"],
+    "Kubeflow": [],
+    "SageMaker": ["aws sagemaker", "amazon sagemaker"],
+    "Vertex AI": ["google vertex ai"],
+    # Credit risk and lending
+    "Credit Risk": ["credit risk modelling", "credit risk modeling", "credit scoring", "scorecards", "scorecard"],
+    "PD Modelling": ["probability of default", "pd models", "pd modelling", "pd modeling"],
+    "IFRS 9": ["ifrs9", "expected credit loss", "ecl"],
+    "Basel": ["basel ii", "basel iii", "irb"],
+    "Fraud Detection": ["fraud analytics", "fraud modelling", "anti-fraud"],
+    "Pricing Models": ["pricing optimisation", "pricing optimization", "price optimisation"],
+    "Model Validation": ["back-testing", "backtesting", "model governance", "model risk"],
+    # Data engineering
+    "Spark": ["apache spark", "pyspark", "spark sql"],
+    "Hadoop": ["apache hadoop"],
+    "HDFS": [],
+    "Hive": ["apache hive"],
+    "MapReduce": ["map reduce"],
+    "Kafka": ["apache kafka"],
+    "Airflow": ["apache airflow"],
+    "dbt": ["data build tool"],
+    "ETL": ["elt", "data pipelines", "data pipeline"],
+    "Databricks": [],
+    "Snowflake": [],
+    "BigQuery": ["google bigquery", "big query"],
+    "Redshift": ["amazon redshift"],
+    "PostgreSQL": ["postgres", "postgresql"],
+    "MySQL": [],
+    "SQL Server": ["mssql", "microsoft sql server"],
+    "Oracle": ["oracle database", "oracle db"],
+    "MongoDB": ["mongo"],
+    "Redis": [],
+    "Elasticsearch": ["elastic search", "elk"],
+    # Cloud and DevOps
+    "AWS": ["amazon web services"],
+    "EC2": ["amazon ec2", "aws ec2"],
+    "S3": ["amazon s3", "aws s3"],
+    "AWS Lambda": ["lambda"],
+    "Azure": ["microsoft azure"],
+    "Azure ML": ["azure machine learning"],
+    "GCP": ["google cloud", "google cloud platform"],
+    "Docker": [],
+    "Kubernetes": ["k8s"],
+    "EKS": ["amazon eks"],
+    "AKS": ["azure kubernetes service"],
+    "GKE": ["google kubernetes engine"],
+    "Terraform": [],
+    "CI/CD": ["ci cd", "continuous integration", "continuous delivery"],
+    "Jenkins": [],
+    "GitHub Actions": [],
+    "GitLab CI": [],
+    "Git": [],
+    "GitHub": [],
+    "GitLab": [],
+    "Bitbucket": [],
+    "Linux": ["unix", "ubuntu"],
+    # Web and software engineering
+    "React": ["react.js", "reactjs"],
+    "Angular": ["angularjs"],
+    "Vue": ["vue.js", "vuejs"],
+    "Node.js": ["node", "nodejs"],
+    "Django": [],
+    "Flask": [],
+    "FastAPI": ["fast api"],
+    "Spring": ["spring boot"],
+    "REST APIs": ["rest", "restful", "rest api", "restful apis"],
+    "GraphQL": [],
+    "Microservices": ["micro-services"],
+    "Unit Testing": ["unit tests"],
+    "pytest": [],
+    "unittest": [],
+    "JUnit": [],
+    "TDD": ["test driven development"],
+    # Analytics and BI
+    "Excel": ["microsoft excel", "ms excel"],
+    "VBA": ["excel vba"],
+    "Power BI": ["powerbi"],
+    "Tableau": [],
+    "Looker": ["looker studio"],
+    "Data Visualisation": ["data visualization"],
+    "Matplotlib": [],
+    "Seaborn": [],
+    "Plotly": [],
+    "Data Analysis": ["data analytics", "exploratory data analysis", "eda"],
+    # Ways of working
+    "Agile": [],
+    "Scrum": [],
+    "Kanban": [],
+    "Stakeholder Management": ["stakeholder engagement"],
+    "Project Management": ["programme management", "program management"],
+    "Leadership": ["team leadership", "people management", "line management"],
+    "Mentoring": [],
+    "Coaching": [],
+    "Communication": ["presentation skills", "communication skills"],
+}
+
+# Umbrella names and the skills they cover, used only to widen SkillIndex queries ("who
+# has CI/CD" also finds Jenkins users); a category may name a skill of its own
+SKILL_CATEGORIES: Dict[str, List[str]] = {
+    "AWS": ["EC2", "S3", "AWS Lambda", "EKS", "SageMaker", "Redshift"],
+    "CI/CD": ["Jenkins", "GitHub Actions", "GitLab CI"],
+    "Version Control": ["Git", "GitHub", "GitLab", "Bitbucket"],
+    "Containers": ["Docker", "Kubernetes"],
+    "Kubernetes": ["EKS", "AKS", "GKE"],
+    "Unit Testing": ["pytest", "unittest", "JUnit", "TDD"],
+    "Data Visualisation": ["Matplotlib", "Seaborn", "Plotly"],
+    "Hadoop": ["HDFS", "Hive", "MapReduce"],
+    "Agile": ["Scrum", "Kanban"],
+}
+
+# Aliases that are also everyday words (or too short to be unambiguous) are recognised
+# when normalising a skill name but never matched in running text
+AMBIGUOUS_ALIASES = {"r", "go", "net", "py", "ts", "js", "rest", "node", "lambda", "spring", "hive", "s3", "ecl",
+                     "elt", "eda", "torch", "containers", "forecasting", "coaching"}
+
+_matchers: Dict[Optional[str], "SkillMatcher"] = {}
+_matchers_lock = threading.Lock()
+
+
+def alias_key(alias: str) -> str:
+    """Lookup key of a skill name or alias: its tokens joined by single spaces"""
+    return " ".join(tokenize(alias))
+
+
+class SkillMatcher:
+    """Greedy longest-match finder of taxonomy skills in tokenised text"""
+
+    def __init__(self, taxonomy: Dict[str, Sequence[str]]):
+        self.taxonomy = {canonical: list(aliases) for canonical, aliases in taxonomy.items()}
+        self._canonical: Dict[str, str] = {}
+        for canonical, aliases in self.taxonomy.items():
+            for alias in [canonical, *aliases]:
+                key = alias_key(alias)
+                # First definition wins so an alias can't silently move between skills
+                if key and key not in self._canonical:
+                    self._canonical[key] = canonical
+        self._in_text = {key: skill for key, skill in self._canonical.items() if key not in AMBIGUOUS_ALIASES}
+        self._max_words = max((key.count(" ") + 1 for key in self._in_text), default=1)
+        # First tokens of multi-word aliases; only these need longer lookups
+        self._prefixes = {key.split(" ", 1)[0] for key in self._in_text if " " in key}
+        self._starts = self._prefixes | {key for key in self._in_text if " " not in key}
+
+    def __len__(self) -> int:
+        return len(self.taxonomy)
+
+    def canonical(self, name: str) -> Optional[str]:
+        """Canonical skill for a name or alias, or None if it is not in the taxonomy"""
+        return self._canonical.get(alias_key(name))
+
+    def count_tokens(self, tokens: Sequence[str]) -> Counter:
+        """Mentions of each canonical skill in a token sequence"""
+        found: Counter = Counter()
+        canonical, prefixes = self._in_text, self._prefixes
+        n = len(tokens)
+        covered = 0
+        # Most tokens can't start a skill; only positions that can are examined
+        for i in [i for i, token in enumerate(tokens) if token in self._starts]:
+            if i < covered:
+                continue
+            skill, width = None, 1
+            if tokens[i] in prefixes:
+                for width in range(min(self._max_words, n - i), 1, -1):
+                    skill = canonical.get(" ".join(tokens[i:i + width]))
+                    if skill:
+                        break
+            if not skill:
+                skill, width = canonical.get(tokens[i]), 1
+            if skill:
+                found[skill] += 1
+                covered = i + width
+        return found
+
+    def pattern(self, skills: Iterable[str]) -> Optional[Pattern[str]]:
+        """
+        Case-insensitive regex matching any in-text alias of the given canonical skills
+        (None when there are none), for cheap presence checks on many snippets
+        """
+        wanted = set(skills)
+        keys = sorted((key for key, skill in self._in_text.items() if skill in wanted), key=len, reverse=True)
+        if not keys:
+            return None
+        alternatives = "|".join(r"[^a-z0-9+#]+".join(re.escape(token) for token in key.split(" ")) for key in keys)
+        return re.compile(rf"(?<![a-z0-9+#])(?:{alternatives})(?![a-z0-9+#])", re.IGNORECASE)
+
+    def normalize(self, names: Iterable[str]) -> List[str]:
+        """
+        Canonical names for free-text skills, in order and without duplicates. A name that
+        is not an alias but mentions taxonomy skills ("Python (pandas, NumPy)") becomes
+        those skills; anything else is kept as written.
+        """
+        normalized, seen = [], set()
+        for name in names:
+            name = str(name).strip()
+            canonical = self.canonical(name)
+            for skill in [canonical] if canonical else (self.find(name) or [name]):
+                key = alias_key(skill)
+                if key and key not in seen:
+                    seen.add(key)
+                    normalized.append(skill)
+        return normalized
+
+    def count(self, text: str) -> Counter:
+        return self.count_tokens(tokenize(text))
+
+    def find(self, text: str) -> List[str]:
+        """Canonical skills mentioned in text, most mentioned first"""
+        return [skill for skill, _ in self.count(text).most_common()]
+
+
+def load_skill_taxonomy(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    Default taxonomy, extended by the JSON file at path (default CV_SKILL_TAXONOMY); a
+    skill listed in the file replaces the default aliases of that skill
+    """
+    taxonomy = {canonical: list(aliases) for canonical, aliases in DEFAULT_SKILL_TAXONOMY.items()}
+    path = path if path is not None else os.getenv("CV_SKILL_TAXONOMY", "")
+    if path:
+        try:
+            with open(path, encoding="utf-8") as f:
+                custom = json.load(f)
+            taxonomy.update({str(canonical): [str(a) for a in aliases] for canonical, aliases in custom.items()})
+        except (OSError, ValueError, AttributeError, TypeError) as e:
+            logging.error(f"Could not load skill taxonomy {path}: {e}")
+            print(f"❌ Could not load skill taxonomy {path}, using the built-in one: {str(e)}")
+    return taxonomy
+
+
+def get_skill_matcher() -> SkillMatcher:
+    """Shared matcher for the configured taxonomy (built once per CV_SKILL_TAXONOMY value)"""
+    path = os.getenv("CV_SKILL_TAXONOMY") or None
+    with _matchers_lock:
+        if path not in _matchers:
+            _matchers[path] = SkillMatcher(load_skill_taxonomy(path or ""))
+        return _matchers[path]
+
+
+def normalize_skills(names: Iterable[str]) -> List[str]:
+    """Canonical names for free-text skills using the configured taxonomy"""
+    return get_skill_matcher().normalize(names)
+
+
+class SkillIndex:
+    """
+    Inverted index from canonical skill to the (sorted) positions of the candidates that
+    list it. Skill lists are normalised on the way in and query names are matched through
+    the same taxonomy, case-insensitively; a query naming a category (SKILL_CATEGORIES)
+    also matches the candidates listing any skill in it.
+    """
+
+    def __init__(self, skill_lists: Iterable[Iterable[str]], matcher: Optional[SkillMatcher] = None,
+                 categories: Optional[Dict[str, Sequence[str]]] = None):
+        self.matcher = matcher or get_skill_matcher()
+        categories = SKILL_CATEGORIES if categories is None else categories
+        members = {self._key(category): {self._key(skill) for skill in skills}
+                   for category, skills in categories.items()}
+        # Categories can nest ("Containers" covers Kubernetes, which covers EKS)
+        self._covers: Dict[str, List[str]] = {}
+        for category in members:
+            covered, pending = set(), [category]
+            while pending:
+                for key in members.get(pending.pop(), ()):
+                    if key not in covered and key != category:
+                        covered.add(key)
+                        pending.append(key)
+            self._covers[category] = sorted(covered)
+        self._category_names = {self._key(category): category for category in categories}
+        postings: Dict[str, List[int]] = {}
+        self._names: Dict[str, str] = {}
+        for position, skills in enumerate(skill_lists):
+            for skill in self.matcher.normalize(skills):
+                key = alias_key(skill)
+                self._names.setdefault(key, skill)
+                postings.setdefault(key, []).append(position)
+        self._postings = {key: np.asarray(positions, dtype=np.int64) for key, positions in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self._postings)
+
+    def _key(self, name: str) -> str:
+        return alias_key(self.matcher.canonical(name) or name)
+
+    def skills(self) -> List[Tuple[str, int]]:
+        """(skill, number of candidates) for every indexed skill, most common first"""
+        counts = [(self._names[key], len(positions)) for key, positions in self._postings.items()]
+        return sorted(counts, key=lambda item: (-item[1], item[0].lower()))
+
+    def categories(self) -> List[Tuple[str, int]]:
+        """(category, number of candidates it matches) for every category matching any"""
+        counts = [(name, len(self.positions(name))) for name in self._category_names.values()]
+        return sorted((item for item in counts if item[1]), key=lambda item: (-item[1], item[0].lower()))
+
+    def positions(self, name: str) -> np.ndarray:
+        """Positions of the candidates listing a skill (any alias of it) or any skill in the category it names"""
+        key = self._key(name)
+        empty = np.empty(0, dtype=np.int64)
+        result = self._postings.get(key, empty)
+        for member in self._covers.get(key, ()):
+            result = np.union1d(result, self._postings.get(member, empty))
+        return result
+
+    def matching(self, names: Iterable[str], match_all: bool = True) -> np.ndarray:
+        """Positions of the candidates with all (or, with match_all=False, any) of the skills"""
+        postings = [self.positions(name) for name in names]
+        if not postings:
+            return np.empty(0, dtype=np.int64)
+        result = postings[0]
+        for positions in postings[1:]:
+            result = np.intersect1d(result, positions) if match_all else np.union1d(result, positions)
+        return result
@@ -0,0 +1,61 @@
+"""
+Structured-output parsing
+Parses a model's JSON reply and checks it against the flat JSON schemas used for
+structured outputs (prompts.RESPONSE_SCHEMAS), reporting exactly which fields are
+missing or of the wrong type so only those need to be re-requested.
+"""
+import json
+from typing import Any, Dict, Optional
+
+_TYPE_NAMES = {str: "string", int: "integer", float: "number", bool: "boolean", list: "array", dict: "object"}
+
+
+def parse_json_object(content: str) -> Optional[Dict[str, Any]]:
+    """JSON object from a reply, tolerating code fences and surrounding text; None if there is none"""
+    content = (content or "").strip()
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        start, end = content.find("{"), content.rfind("}")
+        if start == -1 or end <= start:
+            return None
+        try:
+            data = json.loads(content[start:end + 1])
+        except json.JSONDecodeError:
+            return None
+    return data if isinstance(data, dict) else None
+
+
+def _type_problem(value: Any, schema: Dict[str, Any]) -> Optional[str]:
+    expected = schema.get("type")
+    if expected == "string":
+        ok = isinstance(value, str)
+    elif expected == "number":
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+    elif expected == "integer":
+        ok = (isinstance(value, int) and not isinstance(value, bool)) or (isinstance(value, float) and value.is_integer())
+    elif expected == "array":
+        if not isinstance(value, list):
+            ok = False
+        else:
+            item_problems = [_type_problem(item, schema.get("items", {})) for item in value]
+            return next((f"item {i}: {p}" for i, p in enumerate(item_problems) if p), None)
+    else:
+        return None
+    if ok:
+        return None
+    return f"expected {expected}, got {_TYPE_NAMES.get(type(value), type(value).__name__)} {json.dumps(value)[:40]}"
+
+
+def validate(data: Dict[str, Any], schema: Dict[str, Any]) -> Dict[str, str]:
+    """Problems by field name (missing or wrong type) for an object schema; empty when valid"""
+    problems = {}
+    properties = schema.get("properties", {})
+    for name in schema.get("required", properties):
+        if name not in data or data[name] is None:
+            problems[name] = "missing"
+            continue
+        problem = _type_problem(data[name], properties.get(name, {}))
+        if problem:
+            problems[name] = problem
+    return problems
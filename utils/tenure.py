@@ -0,0 +1,129 @@
+"""
+Employment tenure from CV date ranges
+Finds ranges such as "Jan 2018 - Mar 2021", "06/2019 – Present" or "2015 to 2017"
+with one compiled pattern, merges overlapping ranges so concurrent roles are not
+double counted and returns years of experience. Ranges inside education entries are
+ignored. Used by the offline fallback analyzer.
+"""
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterator, List, Optional, Sequence
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+EARLIEST_YEAR = 1960
+# Mid-year stands in for a missing month
+DEFAULT_MONTH = 6
+MAX_TENURE_YEARS = 50.0
+
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+
+
+def _date(prefix: str) -> str:
+    return (rf"(?:(?P<{prefix}name>{_MONTH})\s+|(?P<{prefix}num>0?[1-9]|1[0-2])\s*[/.-]\s*)?"
+            rf"(?P<{prefix}year>(?:19|20)\d{{2}})")
+
+
+# The leading lookahead lets the scan skip positions that can't start a date cheaply
+DATE_RANGE = re.compile(
+    rf"(?=[0-9jfmasond])(?<![\w/.]){_date('s')}\s*(?:-|–|—|to|until|till)\s*"
+    rf"(?:(?P<present>present|current|now|today|date)|{_date('e')})(?![\w/])",
+    re.IGNORECASE,
+)
+_YEAR = re.compile(r"\b(?:19|20)\d{2}\b")
+_EDUCATION = re.compile(
+    r"\b(?:university|college|school|academy|b\.?sc|m\.?sc|b\.?a|m\.?a|ph\.?d|mba|bachelor|master|degree|diploma|"
+    r"a-levels?|gcses?|education)\b", re.IGNORECASE)
+
+
+def _previous_line_start(text: str, position: int) -> int:
+    """Start of the line before the one containing position (0 on the first line)"""
+    line_start = text.rfind("\n", 0, position) + 1
+    return text.rfind("\n", 0, line_start - 1) + 1 if line_start else 0
+
+
+def _matches_on_year_lines(text: str) -> Iterator[re.Match]:
+    """DATE_RANGE matches, scanning only the lines that contain a year (much faster than the whole text)"""
+    scanned_until = -1
+    for year in _YEAR.finditer(text):
+        if year.start() < scanned_until:
+            continue
+        line_start = text.rfind("\n", 0, year.start()) + 1
+        line_end = text.find("\n", year.end())
+        scanned_until = len(text) if line_end == -1 else line_end
+        yield from DATE_RANGE.finditer(text, line_start, scanned_until)
+
+
+@dataclass
+class DateRange:
+    """A role's span in months since year 0 (end inclusive) and where it starts in the text"""
+    start: int
+    end: int
+    position: int
+
+
+def _month_index(name: Optional[str], number: Optional[str], year: str) -> int:
+    if name:
+        month = MONTHS[name[:3].lower()]
+    elif number:
+        month = int(number)
+    else:
+        month = DEFAULT_MONTH
+    return int(year) * 12 + month - 1
+
+
+def extract_date_ranges(text: str, today: Optional[date] = None) -> List[DateRange]:
+    """
+    Plausible employment ranges in text, in order of appearance. A range is dropped when
+    it ends before it starts, lies outside EARLIEST_YEAR..today or sits in an education
+    entry (the line with the range or the one before mentions a degree or institution).
+    """
+    today = today or date.today()
+    now = today.year * 12 + today.month - 1
+    ranges = []
+    for match in _matches_on_year_lines(text):
+        start = _month_index(match["sname"], match["snum"], match["syear"])
+        if match["present"]:
+            end = now
+        else:
+            end = _month_index(match["ename"], match["enum"], match["eyear"])
+        if not EARLIEST_YEAR * 12 <= start <= end <= now:
+            continue
+        line_end = text.find("\n", match.end())
+        if _EDUCATION.search(text, _previous_line_start(text, match.start()), len(text) if line_end == -1 else line_end):
+            continue
+        ranges.append(DateRange(start, end, match.start()))
+    return ranges
+
+
+def merged_months(ranges: Sequence[DateRange]) -> int:
+    """Months covered by the ranges, counting overlapping months once"""
+    total, covered_until = 0, -1
+    for r in sorted(ranges, key=lambda r: r.start):
+        if r.end <= covered_until:
+            continue
+        total += r.end - max(r.start, covered_until + 1) + 1
+        covered_until = r.end
+    return total
+
+
+def tenure_years(ranges: Sequence[DateRange]) -> float:
+    return round(min(merged_months(ranges) / 12, MAX_TENURE_YEARS), 1)
+
+
+def role_blocks(text: str, ranges: Sequence[DateRange]) -> List[str]:
+    """
+    Text of the role each range belongs to: from the line before the range (usually the
+    job title) up to the line before the next range
+    """
+    starts = [_previous_line_start(text, r.position) for r in ranges]
+    return [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+
+
+def estimate_years_from_mentions(text: str) -> float:
+    """Rough experience estimate for CVs without date ranges: lines that mention a year"""
+    year_lines = sum(1 for line in text.split("\n") if _YEAR.search(line))
+    return min(max(year_lines * 1.2, 1), 15)
@@ -1,6 +1,18 @@
+import os
 import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Page break marker in extracted text; parsing.extractor joins PDF pages with PAGE_SEPARATOR,
+# which keeps it on a line of its own so the last line of a page never runs into the next
+PAGE_BREAK = "\f"
+PAGE_SEPARATOR = "\n" + PAGE_BREAK + "\n"
+# No trimming unless CV_TOKEN_BUDGET asks for it: a cut CV loses whatever falls past the budget
+DEFAULT_TOKEN_BUDGET = 0
 
 def clean_text(t: str) -> str:
+    # Form feeds (PDF page breaks) are kept for compact_cv_text
     t = re.sub(r"\u00A0", " ", t)   # nbsp
     t = re.sub(r"[ \t]+", " ", t)
     t = re.sub(r"\r", "\n", t)
@@ -13,3 +25,160 @@ def summarize_for_similarity(current_title: str, must_hits: list[str], nice_hits
         last_roles.append(f"{r.get('title','')} {r.get('org','')} {r.get('start','')}–{r.get('end','')}")
     skills = ", ".join(must_hits + nice_hits) or ""
     return f"title: {current_title}\nskills: {skills}\nrecent: {' | '.join(last_roles)}"
+
+def estimate_tokens(t: str) -> int:
+    """Rough token count for English prose (~4 characters per token)"""
+    return (len(t) + 3) // 4
+
+def get_token_budget() -> int:
+    """CV token budget for prompts (CV_TOKEN_BUDGET, default 0: no truncation)"""
+    try:
+        return max(0, int(os.getenv("CV_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET)))
+    except ValueError:
+        return DEFAULT_TOKEN_BUDGET
+
+# Section headings and their priority when trimming to budget (lower is kept longer)
+SECTION_PRIORITY = {
+    "summary": 1, "profile": 1, "professional summary": 1, "personal statement": 1, "objective": 1,
+    "experience": 1, "work experience": 1, "professional experience": 1, "employment history": 1,
+    "employment": 1, "work history": 1, "career history": 1,
+    "skills": 1, "technical skills": 1, "key skills": 1, "core competencies": 1,
+    "education": 2, "qualifications": 2, "certifications": 2, "certificates": 2,
+    "projects": 2, "key projects": 2, "training": 2,
+    "publications": 3, "awards": 3, "achievements": 3, "languages": 3, "volunteering": 3,
+    "volunteer experience": 3, "memberships": 3,
+    "interests": 4, "hobbies": 4, "hobbies and interests": 4, "personal interests": 4,
+    "additional information": 4,
+}
+DROPPED_SECTIONS = {"references", "referees", "reference"}
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_URL = re.compile(r"(?:https?://|www\.)\S+|\b(?:linkedin|github)\.com/\S*", re.IGNORECASE)
+_PHONE = re.compile(r"(?<!\w)\+?\(?\d{2,5}\)?[\s.-]?\d{3,6}(?:[\s.-]?\d{3,6})?(?!\w)")
+_CONTACT_LABEL = re.compile(r"^(?:e-?mail|phone|tel|telephone|mobile|mob|cell|linkedin|github|website|web|address)\s*:?$", re.IGNORECASE)
+_PAGE_NUMBER = re.compile(r"^(?:page\s*)?\d{1,3}(?:\s*(?:of|/)\s*\d{1,3})?$", re.IGNORECASE)
+_REFERENCES_LINE = re.compile(r"^references?\s+(?:are\s+)?(?:available\s+)?(?:up)?on\s+request\.?$", re.IGNORECASE)
+
+@dataclass
+class CompactionResult:
+    """Compacted CV text plus what was removed"""
+    text: str
+    original_tokens: int
+    compacted_tokens: int
+    removed: list[str] = field(default_factory=list)
+
+    @property
+    def tokens_saved(self) -> int:
+        # Re-joining sections can add a few separator characters to short CVs
+        return max(0, self.original_tokens - self.compacted_tokens)
+
+def _heading_key(line: str) -> str:
+    return re.sub(r"[^a-z ]", "", line.lower()).strip()
+
+def _remove_phone(match: re.Match) -> str:
+    # Require a phone-length digit run so dates like "2015-2019" survive
+    digits = sum(c.isdigit() for c in match.group())
+    return "" if 10 <= digits <= 15 else match.group()
+
+def _strip_contact(line: str) -> str:
+    """Remove e-mail/phone/URL tokens; returns "" if nothing meaningful is left"""
+    stripped = _PHONE.sub(_remove_phone, _URL.sub("", _EMAIL.sub("", line)))
+    if stripped == line:
+        return line
+    stripped = re.sub(r"^[\s|,;•·/-]+|[\s|,;•·/-]+$", "", stripped)
+    stripped = re.sub(r"\s*[|•·]\s*(?=[|•·]|$)", "", stripped)
+    return "" if not stripped or _CONTACT_LABEL.match(stripped) else stripped
+
+def _remove_repeated_page_lines(pages: list[list[str]]) -> tuple[list[str], int]:
+    """Keep the first occurrence of short lines repeated across pages (headers/footers)"""
+    if len(pages) < 2:
+        return (pages[0] if pages else []), 0
+    min_pages = max(2, len(pages) // 2)
+    counts = Counter(line for page in pages for line in {l for l in page if l and len(l) <= 100})
+    repeated = {line for line, n in counts.items() if n >= min_pages}
+    seen, lines, removed = set(), [], 0
+    for page in pages:
+        for line in page:
+            if line in repeated:
+                if line in seen:
+                    removed += 1
+                    continue
+                seen.add(line)
+            lines.append(line)
+    return lines, removed
+
+def compact_cv_text(text: str, token_budget: Optional[int] = None) -> CompactionResult:
+    """
+    Shrink CV text before prompting: drop repeated page headers/footers, page numbers,
+    contact details and references, then trim to token_budget by section priority
+    (interests and publications go before education, which goes before experience/skills).
+    """
+    original_tokens = estimate_tokens(text)
+    removed: list[str] = []
+
+    pages = [[line.strip() for line in page.split("\n")] for page in text.split(PAGE_BREAK)]
+    lines, repeated = _remove_repeated_page_lines(pages)
+    if repeated:
+        removed.append(f"{repeated} repeated header/footer line(s)")
+
+    # Split into (priority, heading, lines) sections; the preamble (name/title) has priority 0
+    sections: list[list] = [[0, "", []]]
+    contact_lines = page_numbers = 0
+    for line in lines:
+        if _PAGE_NUMBER.match(line):
+            page_numbers += 1
+            continue
+        if _REFERENCES_LINE.match(line):
+            removed.append("references line")
+            continue
+        key = _heading_key(line)
+        if len(line) <= 40 and (key in SECTION_PRIORITY or key in DROPPED_SECTIONS):
+            sections.append([SECTION_PRIORITY.get(key, -1), line, []])
+            continue
+        kept = _strip_contact(line)
+        if kept != line:
+            contact_lines += 1
+            if not kept:
+                continue
+        sections[-1][2].append(kept)
+    if page_numbers:
+        removed.append(f"{page_numbers} page number line(s)")
+    if contact_lines:
+        removed.append(f"{contact_lines} contact detail line(s)")
+    if any(priority == -1 for priority, _, _ in sections):
+        removed.append("references section")
+        sections = [s for s in sections if s[0] != -1]
+
+    def render() -> str:
+        parts = []
+        for _, heading, body in sections:
+            block = "\n".join(([heading] if heading else []) + body).strip()
+            if block:
+                parts.append(block)
+        return re.sub(r"\n{3,}", "\n\n", "\n\n".join(parts))
+
+    compacted = render()
+    budget = get_token_budget() if token_budget is None else token_budget
+    if budget and estimate_tokens(compacted) > budget:
+        # Lowest priority (and, within a priority, latest) sections give way first
+        order = sorted(enumerate(sections), key=lambda item: (item[1][0], item[0]), reverse=True)
+        for _, section in order:
+            if estimate_tokens(compacted) <= budget:
+                break
+            priority, heading, body = section
+            if priority >= 2 and heading:
+                section[1], section[2] = "", []
+                removed.append(f"section '{heading}'")
+            else:
+                excess_chars = (estimate_tokens(compacted) - budget) * 4
+                while body and excess_chars > 0:
+                    excess_chars -= len(body.pop()) + 1
+                removed.append(f"truncated '{heading or 'header'}'")
+            compacted = render()
+
+    return CompactionResult(
+        text=compacted,
+        original_tokens=original_tokens,
+        compacted_tokens=estimate_tokens(compacted),
+        removed=removed,
+    )